@@ -1,12 +1,25 @@
 import os
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import JSONResponse
+import json
+import time
+import asyncio
+import hashlib
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from werkzeug.utils import secure_filename
-from typing import Optional
+from typing import List, Optional
+
+from src.features.shared.llm_metrics import TokenBudgetExceeded
+from src.features.shared.singleflight import SingleFlight
+from src.features.shared.ttl_cache import TTLCache
+from src.features.shared.uploads import upload_slots, ingest, limit_bytes, InvalidUpload, UploadTooLarge
+from src.features.shared.pdf_extract import pdf_extractor, PDFExtractionError, PDFExtractionTimeout
+from src.features.shared.resume_store import resume_store, ResumeRecord, normalize_text
+from src.features.shared.keyword_scorer import KeywordScorer, company_skill_documents
+from src.features.shared.llm_provider import get_provider, user_message
+from src.features.shared.jobs import job_queue, job_links, Job, JobRetry
+from src.features.ats_score.bulk import ATS_BULK_MAX_MB, BulkItem, collect_uploads, extract_ats_score
+from src.features.ats_score.prompts import PromptBudgeter, build_prompt
 
 import os
 from dotenv import load_dotenv
@@ -18,7 +31,10 @@ print("API Key:", api_key)  # This should print your API key
 
 # Load API key from .env
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+# LLM provider: Gemini, or record/replay when LLM_BACKEND says so
+ATS_MODEL = "gemini-1.5-pro-latest"
+llm = get_provider("ats", "gemini", api_key=os.getenv("GEMINI_API_KEY"))
 
 # FastAPI app setup
 app = FastAPI(title="Resume ATS Score Analyzer")
@@ -32,91 +48,370 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure upload folder
-UPLOAD_FOLDER = os.path.join(
-    "src", "features", "resume_analyzer", "uploads")
+# Uploads are parsed from memory; nothing is written to disk
 ALLOWED_EXTENSIONS = {"pdf"}
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)  # Ensure upload folder exists
+
+# Coalesces concurrent /score requests for the same resume and job description
+score_flights = SingleFlight("ats")
+
+# Finished results keyed by resume, job description and analysis option. Extracted
+# text lives in the shared resume store, so switching analysis mode skips extraction
+result_cache = TTLCache(
+    max_entries=int(os.getenv("ATS_CACHE_MAX_ENTRIES", 1000)),
+    ttl_seconds=float(os.getenv("ATS_CACHE_TTL_SECONDS", 24 * 3600)))
+
+# Resume and job description are fitted into ATS_PROMPT_BUDGET_TOKENS before each LLM call
+prompt_budgeter = PromptBudgeter()
 
 # Function to check allowed file type
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Function to extract text from PDF
-def read_pdf(file_path: str) -> str:
-    pdf_reader = PdfReader(file_path)
-    pdf_text = "".join([page.extract_text() or "" for page in pdf_reader.pages])
-    return pdf_text.strip()
+# Function to get AI response from the LLM provider. The prompt already carries the
+# resume and job description
+async def get_gemini_output(prompt: str) -> str:
+    response = await llm.complete(user_message(prompt), model=ATS_MODEL, endpoint="/score")
+    return response.text
+
+def score_key(pdf_hash: str, job_description: Optional[str], analysis_option: str) -> str:
+    """ Requests with the same resume, job description and analysis option share a result """
+    return "|".join([
+        pdf_hash,
+        hashlib.sha256((job_description or "").strip().encode("utf-8")).hexdigest(),
+        analysis_option,
+    ])
+
+
+async def load_resume(resume: Optional[UploadFile], resume_id: Optional[str]) -> ResumeRecord:
+    """ The stored resume for resume_id, or the uploaded file registered as a new one """
+    if resume_id:
+        record = resume_store.get(resume_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired resume_id, please upload the resume again")
+        return record
+
+    if resume is None or not resume.filename:
+        raise HTTPException(status_code=400, detail="Upload a resume or pass a resume_id")
+    if not allowed_file(resume.filename):
+        raise HTTPException(status_code=400, detail="Invalid file! Please upload a PDF.")
+
+    try:
+        # Parsed in the shared PDF worker pool; the bytes are dropped once the text is stored
+        return await resume_store.register_upload(resume)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PDFExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Local keyword scorer: the "Keyword Match" option and the optional pre-check before
+# an LLM call. Company profiles seed the document frequencies used for IDF
+KEYWORD_MATCH = "Keyword Match"
+COMPANY_DATA_FILE = os.path.join("src", "features", "resume_analyzer", "company_data.csv")
+ATS_PRECHECK_MIN_SCORE = float(os.getenv("ATS_PRECHECK_MIN_SCORE", 20))
+keyword_scorer = KeywordScorer().fit_background(company_skill_documents(COMPANY_DATA_FILE))
+
+
+@app.post("/upload")
+async def upload_resume(resume: UploadFile = File(...)):
+    """ Parse a resume once; later /score calls pass the returned resume_id instead of the file """
+    record = await load_resume(resume, None)
+    return {"success": True, **record.summary(resume_store.ttl_seconds)}
+
+
+async def score_resume(pdf_text: str, job_description: Optional[str], analysis_option: str, key: str) -> str:
+    # Deduplicated resume and job description, trimmed by section priority to the token budget
+    fitted = prompt_budgeter.fit(pdf_text, job_description)
+    prompt = build_prompt(fitted.resume, fitted.job_description, analysis_option)
+
+    # Get AI response
+    response = await get_gemini_output(prompt)
+    result_cache.set(key, response)
+    return response
+
+
+async def score_record(record: ResumeRecord, job_description: Optional[str], analysis_option: str,
+                       precheck: bool = False) -> dict:
+    """ The /score response for a stored resume; raises TokenBudgetExceeded when the LLM budget is spent """
+    if analysis_option == KEYWORD_MATCH or (precheck and (job_description or "").strip()):
+        keywords = keyword_scorer.score(record.text, job_description)
+        if analysis_option == KEYWORD_MATCH:
+            return {"response": keywords.report(), "keyword_match": keywords.to_dict(),
+                    "resume_id": record.resume_id}
+        # Resumes that barely touch the job description's keywords are not worth an LLM call
+        if keywords.score is not None and keywords.score < ATS_PRECHECK_MIN_SCORE:
+            return {
+                "response": keywords.report() + f"\nKeyword coverage is below {ATS_PRECHECK_MIN_SCORE:.0f}, "
+                                                "so the full analysis was skipped. Add the missing keywords "
+                                                "that apply to you and try again.",
+                "keyword_match": keywords.to_dict(),
+                "llm_skipped": True,
+                "resume_id": record.resume_id,
+            }
+
+    key = score_key(record.sha256, job_description, analysis_option)
+
+    # Resubmissions are answered without extraction or an LLM call
+    response = result_cache.get(key)
+    if response is not None:
+        return {"response": response, "resume_id": record.resume_id, "cached": True}
+
+    # Identical submissions arriving together share a single LLM call
+    response = await score_flights.do(
+        key, lambda: score_resume(record.text, job_description, analysis_option, key))
+    return {"response": response, "resume_id": record.resume_id}
 
-# Function to get AI response from Gemini
-def get_gemini_output(pdf_text: str, prompt: str) -> str:
-    model = genai.GenerativeModel("gemini-1.5-pro-latest")  # Update model
-    response = model.generate_content(f"{prompt}\n\n{pdf_text}")
-    return response.text  # Ensure correct attribute
 
 @app.post("/score")
 async def analyze_resume(
-    resume: UploadFile = File(...),
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
     job_description: Optional[str] = Form(""),
     analysis_option: str = Form(...),
+    precheck: bool = Form(False),
 ):
-    if not allowed_file(resume.filename):
-        raise HTTPException(status_code=400, detail="Invalid file! Please upload a PDF.")
-    
-    # Securely save the uploaded file
-    filename = secure_filename(resume.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    with open(file_path, "wb") as f:
-        f.write(await resume.read())
-    
-    # Extract text from the PDF
-    pdf_text = read_pdf(file_path)
-
-    # Define prompts for different analysis types
-    if analysis_option == "Quick Scan":
-        prompt = f"""
-        You are ResumeChecker, an expert in resume analysis. Provide a quick scan:
-        - Identify the most suitable profession.
-        - List 3 key strengths.
-        - Suggest 2 quick improvements.
-        - Give an overall ATS score out of 100.
-        
-        Resume: {pdf_text}
-        Job Description: {job_description}
-        """
-    elif analysis_option == "Detailed Analysis":
-        prompt = f"""
-        You are ResumeChecker, an expert in resume analysis. Provide a detailed analysis:
-        - Identify the most suitable profession.
-        - List 5 strengths.
-        - Suggest 3-5 improvements.
-        - Rate: Impact, Brevity, Style, Structure, Skills (out of 10).
-        - Review each section (Summary, Experience, Education).
-        - ATS score out of 100 with reasoning.
-        
-        Resume: {pdf_text}
-        Job Description: {job_description}
-        """
-    else:  # ATS Optimization
-        prompt = f"""
-        You are ResumeChecker, an expert in ATS optimization. Analyze the resume:
-        - Identify missing keywords.
-        - Suggest ATS-friendly formatting.
-        - Recommend keyword optimizations.
-        - Provide 3-5 job-specific suggestions.
-        - ATS compatibility score out of 100.
-        
-        Resume: {pdf_text}
-        Job Description: {job_description}
-        """
-    
-    # Get AI response
-    response = get_gemini_output(pdf_text, prompt)
-    
-    # Clean up file after processing
-    os.unlink(file_path)
-    
-    return JSONResponse(content={"response": response})
+    record = await load_resume(resume, resume_id)
+    try:
+        return JSONResponse(content=await score_record(record, job_description, analysis_option, precheck))
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(int(e.retry_after) + 1)})
+
+
+# Queued scoring: POST /score/jobs answers with a job id at once; the shared job
+# queue runs the analysis and clients poll /jobs/{id} or follow /jobs/{id}/events
+ATS_JOB_CONCURRENCY = int(os.getenv("ATS_JOB_CONCURRENCY", 4))
+
+
+async def score_job(payload: dict, data: Optional[bytes]) -> dict:
+    if data is not None:
+        record = await resume_store.register_bytes(data, payload["filename"])
+    else:
+        # A resume_id submission carries its text, so it still runs after a restart
+        record = (resume_store.get(payload.get("resume_id"))
+                  or resume_store.add(payload["sha256"], payload["filename"], payload["text"]))
+    try:
+        return await score_record(record, payload["job_description"], payload["analysis_option"],
+                                  payload["precheck"])
+    except TokenBudgetExceeded as e:
+        raise JobRetry(str(e), e.retry_after)
+
+
+job_queue.register("ats.score", "ats", score_job, concurrency=ATS_JOB_CONCURRENCY)
+
+
+@app.on_event("startup")
+async def start_jobs():
+    # Picks up jobs queued before a restart
+    job_queue.start()
+
+
+@app.post("/score/jobs", status_code=202)
+async def submit_score_job(
+    request: Request,
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(""),
+    analysis_option: str = Form(...),
+    precheck: bool = Form(False),
+):
+    payload = {"job_description": job_description, "analysis_option": analysis_option, "precheck": precheck}
+    if resume_id:
+        record = resume_store.get(resume_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired resume_id, please upload the resume again")
+        payload.update(resume_id=record.resume_id, sha256=record.sha256, filename=record.filename, text=record.text)
+        job = await job_queue.submit("ats.score", payload)
+    elif resume is not None and resume.filename:
+        if not allowed_file(resume.filename):
+            raise HTTPException(status_code=400, detail="Invalid file! Please upload a PDF.")
+        try:
+            # The upload keeps its memory reservation until the job row holding it is written
+            async with ingest(resume) as ingested:
+                payload["filename"] = ingested.filename
+                job = await job_queue.submit("ats.score", payload, ingested.data)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail="Upload a resume or pass a resume_id")
+
+    return job_links(job, request.scope.get("root_path", ""))
+
+
+def find_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None or job.feature != "ats":
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return find_job(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    find_job(job_id)
+    return StreamingResponse(job_queue.sse(job_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Bulk screening: resumes are processed by a pool of workers per request, while LLM
+# calls from every bulk request share one concurrency cap
+ATS_BULK_WORKERS = int(os.getenv("ATS_BULK_WORKERS", 8))
+bulk_llm_slots = asyncio.Semaphore(int(os.getenv("ATS_BULK_LLM_CONCURRENCY", 4)))
+
+
+async def screen_item(item: BulkItem, job_description: str, analysis_option: str) -> dict:
+    """ One NDJSON result line for a resume of a bulk upload """
+    if item.error:
+        return {"type": "error", "index": item.index, "filename": item.filename, "error": item.error}
+
+    start = time.perf_counter()
+    pdf_hash = hashlib.sha256(item.data).hexdigest()
+    try:
+        record = resume_store.find_by_hash(pdf_hash)
+        if record is not None:
+            text = record.text
+        else:
+            text = normalize_text(await pdf_extractor.extract_text(item.data))
+        item.data = None
+        if not text:
+            raise PDFExtractionError("No text found in PDF")
+
+        keywords = keyword_scorer.score(text, job_description) if job_description else None
+        result = {"type": "result", "index": item.index, "filename": item.filename,
+                  "keyword_score": keywords.score if keywords else None}
+
+        if analysis_option == KEYWORD_MATCH:
+            result.update(ats_score=keywords.score if keywords else None,
+                          response=keywords.report() if keywords else None,
+                          missing_keywords=keywords.missing if keywords else [])
+        else:
+            key = score_key(pdf_hash, job_description, analysis_option)
+            response = result_cache.get(key)
+            result["cached"] = response is not None
+            if response is None:
+                async with bulk_llm_slots:
+                    response = await score_flights.do(
+                        key, lambda: score_resume(text, job_description, analysis_option, key))
+            result.update(ats_score=extract_ats_score(response), response=response)
+    except TokenBudgetExceeded as e:
+        return {"type": "error", "index": item.index, "filename": item.filename, "error": str(e),
+                "retry_after": round(e.retry_after, 1)}
+    except Exception as e:
+        return {"type": "error", "index": item.index, "filename": item.filename, "error": str(e)}
+
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def bulk_summary(results: List[dict], elapsed: float) -> dict:
+    scored = [r for r in results if r["type"] == "result"]
+    ranked = sorted(scored, key=lambda r: (r["ats_score"] is None, -(r["ats_score"] or 0),
+                                           -(r["keyword_score"] or 0)))
+    return {
+        "type": "summary",
+        "total": len(results),
+        "succeeded": len(scored),
+        "failed": len(results) - len(scored),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "ranking": [{"rank": rank, "index": r["index"], "filename": r["filename"],
+                     "ats_score": r["ats_score"], "keyword_score": r["keyword_score"]}
+                    for rank, r in enumerate(ranked, start=1)],
+    }
+
+
+@app.post("/bulk")
+async def bulk_score(
+    resumes: List[UploadFile] = File(...),
+    job_description: Optional[str] = Form(""),
+    analysis_option: str = Form("Quick Scan"),
+):
+    """
+    Screen many resumes (PDFs and/or zips of PDFs) against one job description. Each
+    result is streamed as an NDJSON line when it finishes; a ranked summary line ends the stream.
+    """
+    # The whole upload counts against the shared memory budget: the largest allowed bulk
+    # upload is reserved while reading, then only the resumes not yet screened stay held
+    held = await upload_slots.hold(limit_bytes(ATS_BULK_MAX_MB))
+    try:
+        items = await collect_uploads(resumes)
+    except UploadTooLarge as e:
+        await held.release()
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        await held.release()
+        raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        await held.release()
+        raise HTTPException(status_code=400, detail="No PDF resumes found in the upload")
+    await held.release(held.size - sum(len(item.data) for item in items if item.data))
+
+    job_description = (job_description or "").strip()
+
+    async def result_stream():
+        start = time.perf_counter()
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            pending.put_nowait(item)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                size = len(item.data or b"")
+                result = await screen_item(item, job_description, analysis_option)
+                item.data = None
+                await held.release(size)
+                await finished.put(result)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(ATS_BULK_WORKERS, len(items)))]
+        results = []
+        try:
+            while len(results) < len(items):
+                result = await finished.get()
+                results.append(result)
+                yield json.dumps(result) + "\n"
+            yield json.dumps(bulk_summary(results, time.perf_counter() - start)) + "\n"
+        finally:
+            # The client went away: stop picking up new resumes
+            for task in workers:
+                task.cancel()
+            await held.release()
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson",
+                             headers={"X-Accel-Buffering": "no"})
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "coalescing": score_flights.stats(),
+        "result_cache": result_cache.stats(),
+        "resumes": resume_store.stats(),
+        "keywords": keyword_scorer.stats(),
+        "uploads": upload_slots.stats(),
+        "pdf": pdf_extractor.stats(),
+        "jobs": job_queue.stats(),
+        "prompt": prompt_budgeter.stats(),
+    }
+
+
+@app.delete("/cache")
+async def clear_cache():
+    result_cache.clear()
+    return {"success": True}
+
 
 @app.get("/")
 async def root():
@@ -0,0 +1,110 @@
+import io
+import os
+import re
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.features.shared.uploads import PDF_MAGIC, UploadTooLarge, limit_bytes, read_upload
+
+ATS_BULK_MAX_FILES = int(os.getenv("ATS_BULK_MAX_FILES", 500))
+ATS_BULK_MAX_MB = float(os.getenv("ATS_BULK_MAX_MB", 100))
+
+# "ATS score: 78/100", "Overall ATS Score - 78 out of 100", "**Score:** 78"
+_SCORE_PATTERNS = [
+    re.compile(r"(\d{1,3}(?:\.\d+)?)\s*(?:/|out of)\s*100", re.IGNORECASE),
+    re.compile(r"score[^0-9\n]{0,25}(\d{1,3}(?:\.\d+)?)", re.IGNORECASE),
+]
+
+
+@dataclass
+class BulkItem:
+    index: int
+    filename: str
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+
+
+def extract_ats_score(response: str) -> Optional[float]:
+    """ The 0-100 score stated in an LLM analysis, if it states one """
+    for pattern in _SCORE_PATTERNS:
+        for match in pattern.finditer(response or ""):
+            value = float(match.group(1))
+            if 0 <= value <= 100:
+                return value
+    return None
+
+
+def _zip_entries(archive_name: str, archive: bytes, per_file_limit: int, remaining: int, max_files: int,
+                 items: List[BulkItem]) -> int:
+    """ Append the archive's PDFs to items and return how many bytes they decompressed to """
+    used = 0
+    try:
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(".pdf"):
+                    continue
+                if len(items) >= max_files:
+                    raise ValueError(f"A bulk upload takes at most {max_files} resumes")
+                item = BulkItem(index=len(items), filename=os.path.basename(name))
+                items.append(item)
+                # Sizes are checked against the header before decompressing anything
+                if info.file_size > per_file_limit:
+                    item.error = str(UploadTooLarge(per_file_limit))
+                    continue
+                if used + info.file_size > remaining:
+                    raise UploadTooLarge(remaining)
+                try:
+                    data = zf.read(info)
+                # NotImplementedError is a RuntimeError, so it goes first
+                except NotImplementedError:
+                    item.error = "Unsupported zip compression method"
+                    continue
+                except RuntimeError:
+                    item.error = "Encrypted zip entry"
+                    continue
+                except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                    item.error = f"Corrupt zip entry: {e}"
+                    continue
+                used += len(data)
+                if not data.lstrip().startswith(PDF_MAGIC):
+                    item.error = "Not a PDF"
+                else:
+                    item.data = data
+    except zipfile.BadZipFile:
+        items.append(BulkItem(index=len(items), filename=archive_name, error="Invalid zip archive"))
+    return used
+
+
+async def collect_uploads(uploads: list, per_file_mb: Optional[float] = None,
+                          total_mb: float = ATS_BULK_MAX_MB, max_files: int = ATS_BULK_MAX_FILES) -> List[BulkItem]:
+    """
+    Read PDFs and zips of PDFs into memory up front (uploaded files are closed once the
+    endpoint returns, before a streamed response finishes). Per-file problems become
+    error items; exceeding the total size or file count raises UploadTooLarge / ValueError.
+    """
+    per_file_limit = limit_bytes(per_file_mb)
+    total_limit = limit_bytes(total_mb)
+    items: List[BulkItem] = []
+    total = 0
+    for upload in uploads:
+        filename = upload.filename or "resume.pdf"
+        is_zip = filename.lower().endswith(".zip")
+        if not is_zip and len(items) >= max_files:
+            raise ValueError(f"A bulk upload takes at most {max_files} resumes")
+        try:
+            ingested = await read_upload(upload, max_mb=total_mb if is_zip else per_file_mb, require_pdf=not is_zip)
+        except Exception as e:
+            items.append(BulkItem(index=len(items), filename=filename, error=str(e)))
+            continue
+
+        if is_zip:
+            total += _zip_entries(filename, ingested.data, per_file_limit, total_limit - total, max_files, items)
+        else:
+            total += ingested.size
+            if total > total_limit:
+                raise UploadTooLarge(total_limit)
+            items.append(BulkItem(index=len(items), filename=filename, data=ingested.data))
+    return items
@@ -0,0 +1,347 @@
+import argparse
+import glob
+import logging
+import os
+import re
+import textwrap
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.features.shared.llm_metrics import estimate_tokens, token_counter
+from src.features.shared.resume_store import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Resume plus job description tokens allowed into one ATS prompt (the instructions come on top)
+ATS_PROMPT_BUDGET_TOKENS = int(os.getenv("ATS_PROMPT_BUDGET_TOKENS", 3000))
+# The job description's guaranteed share of that budget when both texts are long
+ATS_PROMPT_JD_SHARE = float(os.getenv("ATS_PROMPT_JD_SHARE", 0.35))
+
+TEMPLATES = {
+    "Quick Scan": """
+        You are ResumeChecker, an expert in resume analysis. Provide a quick scan:
+        - Identify the most suitable profession.
+        - List 3 key strengths.
+        - Suggest 2 quick improvements.
+        - Give an overall ATS score out of 100.
+        """,
+    "Detailed Analysis": """
+        You are ResumeChecker, an expert in resume analysis. Provide a detailed analysis:
+        - Identify the most suitable profession.
+        - List 5 strengths.
+        - Suggest 3-5 improvements.
+        - Rate: Impact, Brevity, Style, Structure, Skills (out of 10).
+        - Review each section (Summary, Experience, Education).
+        - ATS score out of 100 with reasoning.
+        """,
+    "ATS Optimization": """
+        You are ResumeChecker, an expert in ATS optimization. Analyze the resume:
+        - Identify missing keywords.
+        - Suggest ATS-friendly formatting.
+        - Recommend keyword optimizations.
+        - Provide 3-5 job-specific suggestions.
+        - ATS compatibility score out of 100.
+        """,
+}
+
+# Resume sections in the order they are kept when the budget is tight; "header" is
+# whatever precedes the first heading (name, contact details)
+SECTION_PRIORITY = ["skills", "experience", "projects", "education", "summary", "header", "achievements", "other"]
+
+SECTION_HEADINGS: List[Tuple[str, re.Pattern]] = [
+    ("skills", re.compile(r"(?:technical |key |core )?(?:skills?|technologies|tech stack|tools)\b")),
+    ("experience", re.compile(r"(?:work |professional |industry )?(?:experience|employment|internships?|"
+                              r"work history)\b")),
+    ("projects", re.compile(r"(?:academic |personal |key |major )?projects?\b")),
+    ("education", re.compile(r"(?:education(?:al)?|academics?|academic (?:details|background)|qualifications?)\b")),
+    ("summary", re.compile(r"(?:professional |career )?(?:summary|objective|profile|about me)\b")),
+    ("achievements", re.compile(r"(?:certifications?|achievements?|awards?|honou?rs|accomplishments|publications?|"
+                                r"positions? of responsibility|responsibilities|club ?work|extra ?curricular|"
+                                r"leadership|volunteer(?:ing)?|coding profiles?)\b")),
+    ("other", re.compile(r"(?:hobbies|interests|languages|declaration|references|activities|"
+                         r"personal (?:details|information))\b")),
+]
+
+# "Page 2", "2 / 3", "Page 1 of 2" and lines of bullets or rules only
+_PAGE_NOISE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$|^[\W_]+$", re.IGNORECASE)
+_LINE_KEY = re.compile(r"[\W_]+")
+_BULLETS = {"•", "●", "○", "▪", "■", "◦", "-", "*", "–", "➢", "➤", "✓"}
+
+
+def build_prompt(pdf_text: str, job_description: Optional[str], analysis_option: str) -> str:
+    """ The instructions for analysis_option followed by the resume and job description, each included once """
+    instructions = TEMPLATES.get(analysis_option, TEMPLATES["ATS Optimization"])
+    return f"{textwrap.dedent(instructions).strip()}\n\nResume: {pdf_text}\nJob Description: {job_description}"
+
+
+def build_legacy_prompt(pdf_text: str, job_description: Optional[str], analysis_option: str) -> str:
+    """ What get_gemini_output used to send: the template with the resume, then the resume again. Kept for token_report() """
+    instructions = TEMPLATES.get(analysis_option, TEMPLATES["ATS Optimization"])
+    prompt = f"""{instructions}
+        Resume: {pdf_text}
+        Job Description: {job_description}
+        """
+    return f"{prompt}\n\n{pdf_text}"
+
+
+def heading_section(line: str) -> Optional[str]:
+    """ The section a heading line opens ("Technical Skills and Interests" -> "skills"), None for body lines """
+    heading = line.strip().rstrip(":").strip().casefold()
+    if not heading or len(heading) > 40 or len(heading.split()) > 5 or ":" in heading \
+            or any(ch.isdigit() for ch in heading):
+        return None
+    for name, pattern in SECTION_HEADINGS:
+        if pattern.match(heading):
+            return name
+    return None
+
+
+@dataclass
+class Section:
+    name: str
+    lines: List[str] = field(default_factory=list)
+
+
+def clean_lines(text: str) -> Tuple[List[str], int]:
+    """
+    Normalized lines with page numbers, rule lines and repeats dropped. PDF text repeats
+    the name and contact line at the top of every page and sometimes whole bullets; only
+    the first occurrence of a line (compared case- and punctuation-insensitively) is kept.
+    Returns the lines and how many were dropped.
+    """
+    seen = set()
+    lines: List[str] = []
+    dropped = 0
+    bullet = ""
+    for line in normalize_text(text).split("\n"):
+        if not line:
+            continue
+        # Some extractors put a bullet on its own line; it belongs to the next one
+        if line in _BULLETS:
+            bullet = line + " "
+            continue
+        key = _LINE_KEY.sub("", line.casefold())
+        # Repeated headings stay: split_sections() needs them to file what follows
+        if _PAGE_NOISE.match(line) or (key in seen and heading_section(line) is None):
+            dropped += 1
+            bullet = ""
+            continue
+        seen.add(key)
+        lines.append(bullet + line)
+        bullet = ""
+    return lines, dropped
+
+
+def split_sections(lines: List[str]) -> List[Section]:
+    """ Lines grouped under their headings; a heading repeated later (on the next page, say) continues its section """
+    sections = [Section("header")]
+    by_heading: Dict[str, Section] = {}
+    current = sections[0]
+    for line in lines:
+        name = heading_section(line)
+        if name is not None:
+            key = _LINE_KEY.sub("", line.casefold())
+            if key in by_heading:
+                current = by_heading[key]
+                continue
+            current = by_heading[key] = Section(name)
+            sections.append(current)
+        current.lines.append(line)
+    return [section for section in sections if section.lines]
+
+
+def truncate(text: str, tokens: int, count: Callable[[str], int]) -> str:
+    """ The longest prefix of text, cut at a word boundary, that fits in tokens """
+    if count(text) <= tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(text[:middle]) <= tokens:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text[:low]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+
+def fit_lines(lines: List[str], tokens: int, count: Callable[[str], int]) -> Tuple[List[str], int]:
+    """ Leading lines that fit in tokens, the last one shortened if needed; returns them and the tokens used """
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = count(line) + 1
+        if used + cost > tokens:
+            # Only worth a partial line when a useful amount of room is left
+            if tokens - used > 8:
+                partial = truncate(line, tokens - used - 1, count)
+                if partial:
+                    kept.append(partial)
+                    used += count(partial) + 1
+            break
+        kept.append(line)
+        used += cost
+    return kept, used
+
+
+@dataclass
+class FittedPrompt:
+    resume: str
+    job_description: str
+    tokens_before: int
+    tokens_after: int
+    removed_lines: int = 0
+    dropped_sections: List[str] = field(default_factory=list)
+    truncated_sections: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "removed_lines": self.removed_lines,
+            "dropped_sections": self.dropped_sections,
+            "truncated_sections": self.truncated_sections,
+        }
+
+
+class PromptBudgeter:
+    """
+    Prepares the resume and job description for an ATS prompt: both are cleaned of
+    repeated and noise lines, and when they still exceed budget_tokens the resume
+    keeps its sections in SECTION_PRIORITY order (skills and experience first) while
+    the job description keeps at least jd_share of the budget. Kept sections stay in
+    their original order.
+    """
+
+    def __init__(self, budget_tokens: int = ATS_PROMPT_BUDGET_TOKENS, jd_share: float = ATS_PROMPT_JD_SHARE,
+                 count: Callable[[str], int] = estimate_tokens):
+        self.budget_tokens = budget_tokens
+        self.jd_share = jd_share
+        self.count = count
+        self.prompts = 0
+        self.trimmed = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def _cost(self, lines: List[str]) -> int:
+        return sum(self.count(line) + 1 for line in lines)
+
+    def fit(self, resume_text: str, job_description: Optional[str]) -> FittedPrompt:
+        tokens_before = self.count(resume_text or "") + self.count(job_description or "")
+        resume_lines, resume_removed = clean_lines(resume_text)
+        jd_lines, jd_removed = clean_lines(job_description or "")
+        sections = split_sections(resume_lines)
+        resume_lines = [line for section in sections for line in section.lines]
+
+        resume_cost = self._cost(resume_lines)
+        jd_cost = self._cost(jd_lines)
+        dropped: List[str] = []
+        truncated: List[str] = []
+        if resume_cost + jd_cost > self.budget_tokens:
+            jd_budget = min(jd_cost, max(self.budget_tokens - resume_cost, int(self.budget_tokens * self.jd_share)))
+            jd_lines, jd_used = fit_lines(jd_lines, jd_budget, self.count)
+            if jd_used < jd_cost:
+                truncated.append("job_description")
+
+            remaining = self.budget_tokens - jd_used
+            kept: Dict[int, List[str]] = {}
+            order = sorted(range(len(sections)), key=lambda i: (SECTION_PRIORITY.index(sections[i].name), i))
+            for i in order:
+                section = sections[i]
+                cost = self._cost(section.lines)
+                if cost <= remaining:
+                    kept[i] = section.lines
+                    remaining -= cost
+                    continue
+                # A heading alone is noise; take a partial section only if some body fits
+                lines, used = fit_lines(section.lines, remaining, self.count)
+                if len(lines) > 1 or (lines and heading_section(lines[0]) is None):
+                    kept[i] = lines
+                    remaining -= used
+                    truncated.append(section.name)
+                else:
+                    dropped.append(section.name)
+            resume_lines = [line for i in sorted(kept) for line in kept[i]]
+
+        fitted = FittedPrompt(
+            resume="\n".join(resume_lines),
+            job_description="\n".join(jd_lines),
+            tokens_before=tokens_before,
+            tokens_after=0,
+            removed_lines=resume_removed + jd_removed,
+            dropped_sections=dropped,
+            truncated_sections=truncated,
+        )
+        fitted.tokens_after = self.count(fitted.resume) + self.count(fitted.job_description)
+
+        self.prompts += 1
+        self.trimmed += bool(dropped or truncated)
+        self.tokens_before += fitted.tokens_before
+        self.tokens_after += fitted.tokens_after
+        logger.info(f"ATS prompt input: {fitted.tokens_before} -> {fitted.tokens_after} tokens, "
+                    f"{fitted.removed_lines} lines removed, dropped={dropped} truncated={truncated}")
+        return fitted
+
+    def stats(self) -> dict:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "prompts": self.prompts,
+            "trimmed": self.trimmed,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "saved_pct": round(100 * (self.tokens_before - self.tokens_after) / self.tokens_before, 1)
+            if self.tokens_before else None,
+        }
+
+
+def token_report(resumes: Dict[str, str], job_description: str,
+                 budgeter: Optional[PromptBudgeter] = None) -> List[dict]:
+    """ Prompt tokens of the legacy assembly vs. the budgeted one for every resume and analysis option """
+    count_tokens = token_counter()
+    budgeter = budgeter or PromptBudgeter()
+    rows = []
+    for name, text in resumes.items():
+        fitted = budgeter.fit(text, job_description)
+        for option in TEMPLATES:
+            legacy = count_tokens(build_legacy_prompt(text, job_description, option))
+            budgeted = count_tokens(build_prompt(fitted.resume, fitted.job_description, option))
+            rows.append({
+                "resume": name,
+                "analysis_option": option,
+                "legacy_tokens": legacy,
+                "budgeted_tokens": budgeted,
+                "saved_pct": round(100 * (legacy - budgeted) / legacy, 1),
+                **fitted.to_dict(),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    from src.features.shared.pdf_extract import PDF_BACKEND, PDF_MAX_PAGES, extract_page_range
+
+    parser = argparse.ArgumentParser(description="Compare ATS prompt sizes before and after budgeting")
+    parser.add_argument("resumes", nargs="*", help="PDF files (default: the sample uploads)")
+    parser.add_argument("--job-description", default="")
+    parser.add_argument("--budget", type=int, default=ATS_PROMPT_BUDGET_TOKENS)
+    parser.add_argument("--backend", default=PDF_BACKEND)
+    args = parser.parse_args()
+
+    paths = args.resumes or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "uploads", "*.pdf")))
+    texts = {}
+    for path in paths:
+        with open(path, "rb") as file:
+            pages, _ = extract_page_range(file.read(), args.backend, 0, PDF_MAX_PAGES)
+        texts[os.path.basename(path)] = normalize_text("\n".join(page.strip() for page in pages))
+
+    rows = token_report(texts, args.job_description, PromptBudgeter(budget_tokens=args.budget))
+    for row in rows:
+        print(f"{row['resume'][:40]:<40} {row['analysis_option']:<18} legacy={row['legacy_tokens']:>5} "
+              f"budgeted={row['budgeted_tokens']:>5} saved={row['saved_pct']}% "
+              f"removed={row['removed_lines']} dropped={row['dropped_sections']} "
+              f"truncated={row['truncated_sections']}")
+    if rows:
+        legacy_total = sum(row["legacy_tokens"] for row in rows)
+        budgeted_total = sum(row["budgeted_tokens"] for row in rows)
+        print(f"Total: {legacy_total} -> {budgeted_total} prompt tokens "
+              f"({100 * (legacy_total - budgeted_total) / legacy_total:.1f}% fewer)")
@@ -0,0 +1,290 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Face mesh landmark indices (refine_landmarks=True gives 478 points, irises included)
+LANDMARK_COUNT = 478
+LEFT_EYE_INDICES = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
+RIGHT_EYE_INDICES = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+LEFT_IRIS = [474, 475, 476, 477]
+RIGHT_IRIS = [469, 470, 471, 472]
+NOSE_TIP = 1
+CHIN = 199
+LEFT_EYE_LEFT = 33
+RIGHT_EYE_RIGHT = 263
+LEFT_MOUTH = 61
+RIGHT_MOUTH = 291
+
+# Index arrays, rows ordered (left eye, right eye)
+EYE_CONTOURS = np.array([LEFT_EYE_INDICES, RIGHT_EYE_INDICES])
+# Per eye: the two vertical pairs and the horizontal pair of the eye aspect ratio
+EAR_PAIRS = EYE_CONTOURS[:, [[1, 5], [2, 4], [0, 8]]]
+IRISES = np.array([LEFT_IRIS, RIGHT_IRIS])
+# Eye corners the iris position is measured from and to
+IRIS_CORNERS = np.array([[362, 263], [33, 133]])
+# Nose tip to the left face edge, face width, and nose tip to chin
+HEAD_PAIRS = np.array([[NOSE_TIP, LEFT_EYE_LEFT], [LEFT_EYE_LEFT, RIGHT_EYE_RIGHT], [NOSE_TIP, CHIN]])
+
+# The landmarks the attention math reads; only these are copied out of the mesh result
+FEATURE_LANDMARKS = np.unique(np.concatenate(
+    [EYE_CONTOURS.ravel(), IRISES.ravel(), IRIS_CORNERS.ravel(), HEAD_PAIRS.ravel()]))
+_ROW = {int(index): row for row, index in enumerate(FEATURE_LANDMARKS)}
+
+# Averaging matrix: rows are the left and right iris centers, then the left and right eye contour centers
+_MEANS = np.zeros((4, len(FEATURE_LANDMARKS)))
+for _mean, _group in enumerate([LEFT_IRIS, RIGHT_IRIS, LEFT_EYE_INDICES, RIGHT_EYE_INDICES]):
+    _MEANS[_mean, [_ROW[i] for i in _group]] = 1 / len(_group)
+
+# Every distance of a frame as a pair of rows of the pixel array, which is the feature
+# landmarks followed by the two iris centers: 6 eye aspect ratio pairs, the two eye
+# widths, iris center to outer corner per eye, then the head pairs
+_IRIS_CENTER_ROWS = [len(FEATURE_LANDMARKS), len(FEATURE_LANDMARKS) + 1]
+_PAIRS = np.array(
+    [[_ROW[a], _ROW[b]] for a, b in EAR_PAIRS.reshape(-1, 2).tolist()]
+    + [[_ROW[a], _ROW[b]] for a, b in IRIS_CORNERS.tolist()]
+    + [[center, _ROW[corner]] for center, corner in zip(_IRIS_CENTER_ROWS, IRIS_CORNERS[:, 0].tolist())]
+    + [[_ROW[a], _ROW[b]] for a, b in HEAD_PAIRS.tolist()])
+# The same pairs as a +1/-1 matrix, so every difference vector comes from one product
+_DIFFERENCES = np.zeros((len(_PAIRS), len(FEATURE_LANDMARKS) + 2))
+_DIFFERENCES[np.arange(len(_PAIRS)), _PAIRS[:, 0]] = 1
+_DIFFERENCES[np.arange(len(_PAIRS)), _PAIRS[:, 1]] = -1
+
+EYE_OPEN_THRESHOLD = 0.15
+GAZE_CENTER_MIN = 0.25
+GAZE_CENTER_MAX = 0.75
+HEAD_HORIZONTAL_THRESHOLD = 0.2
+
+
+def landmark_array(landmarks, indices: np.ndarray = FEATURE_LANDMARKS) -> np.ndarray:
+    """ Normalized (x, y) of the given face mesh landmarks as an array, read once per frame """
+    mesh = landmarks.landmark
+    return np.array([(lm.x, lm.y) for lm in map(mesh.__getitem__, indices.tolist())], dtype=np.float64)
+
+
+@dataclass
+class FrameFeatures:
+    eye_aspect_ratio: Tuple[float, float]
+    # 0 at the outer eye corner, 1 at the inner one
+    iris_position: Tuple[float, float]
+    iris_centers: List[Tuple[int, int]]
+    head_position: float
+    vertical_ratio: float
+    vertical_gaze: float
+
+    @property
+    def facing_camera(self) -> bool:
+        return 0.5 - HEAD_HORIZONTAL_THRESHOLD < self.head_position < 0.5 + HEAD_HORIZONTAL_THRESHOLD
+
+
+def _ratio(numerator: float, denominator: float, default: float) -> float:
+    return numerator / denominator if denominator != 0 else default
+
+
+def frame_features(points: np.ndarray, image_width: int, image_height: int) -> FrameFeatures:
+    """
+    Eye aspect ratios, iris positions, head pose and vertical gaze from landmark_array().
+    The centroids come from one matrix product and all 13 distances from another and one
+    hypot; distances are between whole-pixel coordinates, as they always were.
+    """
+    means = _MEANS @ points
+    pixels = np.concatenate((points, means[:2]))
+    pixels *= (image_width, image_height)
+    np.trunc(pixels, out=pixels)
+    deltas = _DIFFERENCES @ pixels
+    (l_v1, l_v2, l_h, r_v1, r_v2, r_h, l_width, r_width, l_iris, r_iris,
+     nose_to_left, face_width, face_height) = np.hypot(deltas[:, 0], deltas[:, 1]).tolist()
+    (l_iris_y, r_iris_y, l_eye_y, r_eye_y) = means[:, 1].tolist()
+
+    return FrameFeatures(
+        eye_aspect_ratio=(_ratio(l_v1 + l_v2, 2.0 * l_h, 0.0), _ratio(r_v1 + r_v2, 2.0 * r_h, 0.0)),
+        iris_position=(_ratio(l_iris, l_width, 0.5), _ratio(r_iris, r_width, 0.5)),
+        iris_centers=[(int(x), int(y)) for x, y in pixels[-2:].tolist()],
+        head_position=nose_to_left / face_width if face_width > 0 else 0.5,
+        # The top of the face is taken at the nose tip, so this is 0 whenever the face has a height
+        vertical_ratio=0.0 if face_height > 0 else 0.5,
+        vertical_gaze=((l_eye_y - l_iris_y) + (r_eye_y - r_iris_y)) / 2,
+    )
+
+
+def assess(features: FrameFeatures) -> Tuple[bool, Dict[str, str]]:
+    """ The attentive verdict for one frame and the values shown in the debug overlay """
+    avg_ear = sum(features.eye_aspect_ratio) / 2
+    avg_iris_pos = sum(features.iris_position) / 2
+    facing_camera = features.facing_camera
+
+    eyes_open = avg_ear > EYE_OPEN_THRESHOLD
+    gaze_center = GAZE_CENTER_MIN < avg_iris_pos < GAZE_CENTER_MAX
+    extreme_looking_away = avg_iris_pos < 0.15 or avg_iris_pos > 0.85
+    is_attentive = eyes_open and (gaze_center or facing_camera) and not extreme_looking_away
+
+    debug_info = {
+        "Eye Ratio": f"{avg_ear:.2f}",
+        "Eye Open": "✓" if eyes_open else "✗",
+        "Iris Position": f"{avg_iris_pos:.2f}",
+        "Gaze Center": "✓" if gaze_center else "✗",
+        "Head Position": f"{features.head_position:.2f}",
+        "Facing Camera": "✓" if facing_camera else "✗",
+        "Vertical Gaze": f"{features.vertical_gaze:.3f}",
+        "Looking Far Away": "✓" if extreme_looking_away else "✗",
+    }
+    return is_attentive, debug_info
+
+
+class AttentionSmoother:
+    """ Majority vote over the last size frames, kept in a ring buffer with a running count """
+
+    def __init__(self, size: int = 10, threshold: float = 0.6):
+        self.size = size
+        self.threshold = threshold
+        self._window = [0] * size
+        self._next = 0
+        self._count = 0
+
+    def push(self, attentive: bool) -> bool:
+        """ Record a frame; True while more than threshold of the last size frames were attentive """
+        value = 1 if attentive else 0
+        self._count += value - self._window[self._next]
+        self._window[self._next] = value
+        self._next = (self._next + 1) % self.size
+        return self._count > self.size * self.threshold
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.attention_tracker.attention [--frames 2000]
+# ---------------------------------------------------------------------------
+
+def _legacy_is_user_attentive(landmarks, image_width, image_height):
+    """ The per-landmark implementation this module replaced, kept to check and time against """
+    def coords(idx):
+        lm = landmarks.landmark[idx]
+        return (int(lm.x * image_width), int(lm.y * image_height))
+
+    def distance(p1, p2):
+        return math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
+
+    def ear(indices):
+        points = [coords(idx) for idx in indices]
+        horizontal = distance(points[0], points[8])
+        return (distance(points[1], points[5]) + distance(points[2], points[4])) / (2.0 * horizontal) \
+            if horizontal != 0 else 0
+
+    def iris_position(iris, left_idx, right_idx):
+        iris_x = sum(landmarks.landmark[idx].x for idx in iris) / len(iris)
+        iris_y = sum(landmarks.landmark[idx].y for idx in iris) / len(iris)
+        center = (int(iris_x * image_width), int(iris_y * image_height))
+        eye_left, eye_right = coords(left_idx), coords(right_idx)
+        width = distance(eye_left, eye_right)
+        return distance(center, eye_left) / width if width != 0 else 0.5
+
+    avg_ear = (ear(LEFT_EYE_INDICES) + ear(RIGHT_EYE_INDICES)) / 2
+    avg_iris_pos = (iris_position(LEFT_IRIS, 362, 263) + iris_position(RIGHT_IRIS, 33, 133)) / 2
+    nose, left_face, right_face = coords(NOSE_TIP), coords(LEFT_EYE_LEFT), coords(RIGHT_EYE_RIGHT)
+    face_width = distance(left_face, right_face)
+    head_pos_ratio = distance(nose, left_face) / face_width if face_width > 0 else 0.5
+    facing_camera = 0.3 < head_pos_ratio < 0.7
+
+    vertical_gaze = 0.0
+    for eye, iris in ((LEFT_EYE_INDICES, LEFT_IRIS), (RIGHT_EYE_INDICES, RIGHT_IRIS)):
+        eye_y = sum(landmarks.landmark[idx].y for idx in eye) / len(eye)
+        iris_y = sum(landmarks.landmark[idx].y for idx in iris) / len(iris)
+        vertical_gaze += (eye_y - iris_y) / 2
+
+    eyes_open = avg_ear > EYE_OPEN_THRESHOLD
+    gaze_center = GAZE_CENTER_MIN < avg_iris_pos < GAZE_CENTER_MAX
+    is_attentive = eyes_open and (gaze_center or facing_camera) and not (avg_iris_pos < 0.15 or avg_iris_pos > 0.85)
+    # The iris centroids were summed again to draw them
+    for iris in (LEFT_IRIS, RIGHT_IRIS):
+        sum(landmarks.landmark[idx].x for idx in iris), sum(landmarks.landmark[idx].y for idx in iris)
+    return is_attentive, avg_ear, avg_iris_pos, head_pos_ratio, vertical_gaze
+
+
+class _Landmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x: float, y: float, z: float):
+        self.x, self.y, self.z = x, y, z
+
+
+class _FaceLandmarks:
+    """ Stand-in for a face mesh result, with the same .landmark[i].x access pattern """
+
+    def __init__(self, points: np.ndarray):
+        self.landmark: List[_Landmark] = [_Landmark(*p) for p in points.tolist()]
+
+
+class _CountingLandmarks:
+    """ Wraps a face mesh result and counts .landmark[i] reads, each of which wraps a protobuf message in mediapipe """
+
+    def __init__(self, landmarks):
+        self.landmark = self
+        self.reads = 0
+        self._mesh = landmarks.landmark
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self._mesh[index]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-frame attention math benchmark")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = rng.uniform(0.3, 0.7, size=(LANDMARK_COUNT, 3))
+    frames = [_FaceLandmarks(base + rng.normal(0, 0.02, size=base.shape)) for _ in range(args.frames)]
+
+    mismatches = 0
+    for landmarks in frames:
+        legacy = _legacy_is_user_attentive(landmarks, args.width, args.height)
+        features = frame_features(landmark_array(landmarks), args.width, args.height)
+        attentive, _ = assess(features)
+        current = (attentive, sum(features.eye_aspect_ratio) / 2, sum(features.iris_position) / 2,
+                   features.head_position, features.vertical_gaze)
+        mismatches += legacy[0] != current[0] or not np.allclose(legacy[1:], current[1:], rtol=1e-9, atol=1e-12)
+    print(f"{args.frames} frames, {mismatches} differ from the per-landmark implementation")
+    legacy_reads, array_reads = _CountingLandmarks(frames[0]), _CountingLandmarks(frames[0])
+    _legacy_is_user_attentive(legacy_reads, args.width, args.height)
+    landmark_array(array_reads)
+    print(f"landmark reads per frame: per-landmark {legacy_reads.reads}, vectorized {array_reads.reads}")
+
+    steps = {
+        "legacy": lambda landmarks: _legacy_is_user_attentive(landmarks, args.width, args.height),
+        "vectorized": lambda landmarks: assess(frame_features(landmark_array(landmarks), args.width, args.height)),
+        "copy": landmark_array,
+        "copy_all": lambda landmarks: landmark_array(landmarks, np.arange(LANDMARK_COUNT)),
+    }
+    # Rounds alternate between the variants so a noisy neighbour skews all of them alike
+    best = dict.fromkeys(steps, float("inf"))
+    for _ in range(args.rounds):
+        for name, step in steps.items():
+            start = time.perf_counter()
+            for landmarks in frames:
+                step(landmarks)
+            best[name] = min(best[name], (time.perf_counter() - start) / len(frames) * 1e6)
+    print(f"per frame: per-landmark {best['legacy']:.1f} us, vectorized {best['vectorized']:.1f} us "
+          f"(of which {best['copy']:.1f} us copying the feature landmarks; all {LANDMARK_COUNT} would take "
+          f"{best['copy_all']:.1f} us)")
+
+    smoother, window, size = AttentionSmoother(10), [], 10
+    votes = (rng.random(100000) < 0.6).tolist()
+    start = time.perf_counter()
+    for vote in votes:
+        window.append(vote)
+        if len(window) > size:
+            window.pop(0)
+        sum(window) > size * 0.6
+    list_us = (time.perf_counter() - start) / len(votes) * 1e6
+    start = time.perf_counter()
+    for vote in votes:
+        smoother.push(vote)
+    ring_us = (time.perf_counter() - start) / len(votes) * 1e6
+    print(f"smoothing: list pop(0) + sum {list_us:.2f} us, ring buffer {ring_us:.2f} us per frame")
@@ -0,0 +1,143 @@
+import asyncio
+import importlib
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class LazyFeatureApp:
+    """ ASGI app that imports a feature module on the first request it receives """
+
+    def __init__(self, name: str, module_path: str, attr: str = "app"):
+        self.name = name
+        self.module_path = module_path
+        self.attr = attr
+        self.app = None
+        self.load_seconds: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.app is not None
+
+    async def load(self):
+        if self.app is not None:
+            return self.app
+
+        async with self._lock:
+            if self.app is not None:
+                return self.app
+
+            start = time.perf_counter()
+            try:
+                # Heavy imports (torch, whisper, mediapipe, ...) run in a worker
+                # thread so the event loop keeps serving the features already loaded
+                module = await asyncio.to_thread(importlib.import_module, self.module_path)
+                sub_app = getattr(module, self.attr)
+                # Mounted apps never receive lifespan events, so run their
+                # startup handlers here instead
+                await sub_app.router.startup()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                logger.exception(f"Failed to load feature '{self.name}'")
+                raise
+
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_at = time.time()
+            self.error = None
+            self.app = sub_app
+            logger.info(f"Loaded feature '{self.name}' in {self.load_seconds:.2f}s")
+            return sub_app
+
+    async def shutdown(self) -> None:
+        if self.app is not None:
+            await self.app.router.shutdown()
+
+    async def __call__(self, scope, receive, send):
+        try:
+            sub_app = await self.load()
+        except Exception:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1011})
+                return
+            response = JSONResponse(
+                status_code=503,
+                content={"success": False,
+                         "error": f"Feature '{self.name}' failed to load: {self.error}"}
+            )
+            await response(scope, receive, send)
+            return
+
+        await sub_app(scope, receive, send)
+
+    def report(self) -> dict:
+        return {
+            "module": self.module_path,
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "loaded_at": self.loaded_at,
+            "error": self.error,
+        }
+
+
+class FeatureRegistry:
+    """ Keeps track of the lazily mounted features and their load times """
+
+    def __init__(self):
+        self.features: Dict[str, LazyFeatureApp] = {}
+
+    def register(self, name: str, module_path: str) -> LazyFeatureApp:
+        feature = LazyFeatureApp(name, module_path)
+        self.features[name] = feature
+        return feature
+
+    def eager_names(self, setting: Optional[str] = None) -> List[str]:
+        """ Parse the EAGER_FEATURES setting ("all" or a comma separated list of names) """
+        if setting is None:
+            setting = os.getenv("EAGER_FEATURES", "")
+        names = [name.strip() for name in setting.split(",") if name.strip()]
+        if any(name in ("all", "*") for name in names):
+            return list(self.features)
+
+        unknown = [name for name in names if name not in self.features]
+        if unknown:
+            logger.warning(f"Ignoring unknown eager features: {', '.join(unknown)}")
+        return [name for name in names if name in self.features]
+
+    async def load_eager(self, setting: Optional[str] = None, required: Iterable[str] = ()) -> None:
+        """ Load the EAGER_FEATURES, plus the required ones (e.g. features with queued jobs) """
+        names = self.eager_names(setting)
+        names += [name for name in required if name in self.features and name not in names]
+        for name in names:
+            try:
+                await self.features[name].load()
+            except Exception:
+                # The error is kept in the report and the feature retries on first use
+                pass
+        self.log_report()
+
+    async def shutdown(self) -> None:
+        for feature in self.features.values():
+            await feature.shutdown()
+
+    def report(self) -> dict:
+        features = {name: feature.report() for name, feature in self.features.items()}
+        total = sum(f["load_seconds"] or 0 for f in features.values())
+        return {"features": features, "total_load_seconds": round(total, 3)}
+
+    def log_report(self) -> None:
+        for name, feature in self.features.items():
+            if feature.loaded:
+                status = f"{feature.load_seconds:.2f}s"
+            elif feature.error:
+                status = f"failed ({feature.error})"
+            else:
+                status = "lazy (not loaded yet)"
+            logger.info(f"Feature {name:<10} {status}")
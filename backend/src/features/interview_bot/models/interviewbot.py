@@ -1,18 +1,20 @@
 import os
 import json
-import google.generativeai as genai
 from dotenv import load_dotenv
 import regex as re
 from pydantic import BaseModel
 from src.features.interview_bot.utils.tts import text_to_speech
 from src.features.interview_bot.utils.speechtotext import transcribe
+from src.features.shared.llm_metrics import TokenBudgetExceeded
+from src.features.shared.llm_provider import get_provider, user_message
 
 load_dotenv(".env")
-genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
 
-model = genai.GenerativeModel(
-    model_name="gemini-2.0-flash",
-    system_instruction="""
+# LLM provider: Gemini, or record/replay when LLM_BACKEND says so
+llm = get_provider("interview", "gemini", api_key=os.environ["GOOGLE_API_KEY"])
+
+MODEL_NAME = "gemini-2.0-flash"
+SYSTEM_INSTRUCTION = """
     Role: You are an AI Interview Bot conducting technical and HR interviews for Computer Science and IT candidates.
     Interview Guidelines:
     -Ask both technical and HR questions, following up based on the candidate's responses.
@@ -21,7 +23,7 @@ model = genai.GenerativeModel(
     -For technical terms, provide IPA pronunciation next to the word (e.g. what is [Django](/ˈdʒæŋɡoʊ/) used for?).
     -Ensure responses are clear and easy to pronounce for text-to-speech compatibility.
     """
-)
+
 class CandidateInfo(BaseModel):
     name: str
     education: str
@@ -33,13 +35,20 @@ class CandidateInfo(BaseModel):
 
 class InterviewBot:
     def __init__(self, candidate_info: CandidateInfo):
-        self.chat = model.start_chat()
+        self.history = []
         self.candidate_info = candidate_info
         self.evaluations = {}
         self.qno = 0
         self.current_question = ""
         self.interview_done = False
 
+    def send_message(self, message, endpoint):
+        """ Send a chat turn; the history is only extended once the model has answered """
+        messages = self.history + user_message(message)
+        response = llm.complete_sync(messages, model=MODEL_NAME, endpoint=endpoint, system=SYSTEM_INSTRUCTION)
+        self.history = messages + [{"role": "assistant", "content": response.text}]
+        return response
+
     def generate_prompt(self):
         return f"""
         Conduct an interview for the following candidate:
@@ -76,7 +85,7 @@ class InterviewBot:
     def start_interview(self):
         try:
             prompt = self.generate_prompt()
-            response = self.chat.send_message(prompt)
+            response = self.send_message(prompt, "/start_interview")
             response_formatted = self.response_formater(response)
 
             if "question" not in response_formatted:
@@ -90,6 +99,9 @@ class InterviewBot:
             self.qno += 1
 
             return {"question": self.current_question, "difficulty_level": response_formatted['difficulty_level'],"audio_file": file}
+        except TokenBudgetExceeded as e:
+            print(f"Interview LLM call shed: {e}")
+            return {"error": str(e)}
         except Exception as e:
             print(f"Error starting interview: {e}")
             return {"error": "Failed to start interview"}
@@ -137,7 +149,8 @@ class InterviewBot:
             - "vocabulary_feedback"
             """
 
-            response = model.generate_content(evaluation_prompt)
+            response = llm.complete_sync(user_message(evaluation_prompt), model=MODEL_NAME,
+                                         endpoint="/answer_question/evaluate", system=SYSTEM_INSTRUCTION)
             print(response.text.strip())
             
             match = re.search(r'```json\n(.*?)\n```', response.text, re.DOTALL)
@@ -146,6 +159,9 @@ class InterviewBot:
         except (json.JSONDecodeError, ValueError) as e:
             print(f"Error parsing evaluation response: {e}")
             return {"error": "Invalid evaluation response from LLM"}
+        except TokenBudgetExceeded as e:
+            print(f"Interview LLM call shed: {e}")
+            return {"error": str(e)}
         except Exception as e:
             print(f"Error in evaluating answer: {e}")
             return {"error": "Failed to evaluate answer"}
@@ -162,7 +178,7 @@ class InterviewBot:
             
             self.evaluations[self.qno] = evaluation
 
-            response = self.chat.send_message(ans)
+            response = self.send_message(ans, "/answer_question")
             response_formatted = self.response_formater(response)
             file =text_to_speech(response_formatted['question'])
             self.current_question = self.remove_pronunciations(response_formatted['question'])
@@ -174,6 +190,9 @@ class InterviewBot:
                 self.interview_done = True
             self.qno += 1
             return {"question": self.current_question, "difficulty_level": response_formatted['difficulty_level'],"audio_file": file,"interview_done": response_formatted['interview_done']}
+        except TokenBudgetExceeded as e:
+            print(f"Interview LLM call shed: {e}")
+            return {"error": str(e)}
         except Exception as e:
             print(f"Error in processing answer and question: {e}")
             return {"error": "Failed to process answer"}
@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import logging
 import os
 import sys
 
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
 # Add the project root directory to Python path
 project_root = os.path.abspath(os.path.join(
     os.path.dirname(__file__), '..', '..'))
@@ -42,18 +46,50 @@ os.chdir(backend_dir)
 # Verify the change
 print("Current Working Directory:", os.getcwd())
 
-from src.features.resume_analyzer.app import app as resume_analyzer_app
-from src.features.ats_score.app import app as ats_score_app
-from src.features.mcq.app import app as mcq_app
-from src.features.attention_tracker.app import app as attention_tracker_app
-from src.features.interview_bot.app import app as interview_bot_app
+from src.features.feature_loader import FeatureRegistry
+from src.features.shared.llm_metrics import llm_metrics
+from src.features.shared.pdf_extract import pdf_extractor
+from src.features.shared.jobs import job_queue
+
+# Feature apps are imported on their first request (or at startup when listed
+# in EAGER_FEATURES, e.g. EAGER_FEATURES=mcq,ats or EAGER_FEATURES=all)
+features = FeatureRegistry()
+FEATURE_MODULES = {
+    "ats": "src.features.ats_score.app",
+    "resume": "src.features.resume_analyzer.app",
+    "mcq": "src.features.mcq.app",
+    "attention": "src.features.attention_tracker.app",
+    "interview": "src.features.interview_bot.app",
+}
 
 # Mount feature routes with proper prefixes
-app.mount("/api/ats", ats_score_app)
-app.mount("/api/resume", resume_analyzer_app)
-app.mount("/api/mcq", mcq_app)
-app.mount("/api/attention", attention_tracker_app)
-app.mount("/api/interview", interview_bot_app)
+for name, module_path in FEATURE_MODULES.items():
+    app.mount(f"/api/{name}", features.register(name, module_path))
+
+
+@app.on_event("startup")
+async def load_eager_features():
+    # Job handlers are registered when their feature is imported, so features with jobs
+    # left from a previous run load now and their jobs resume without waiting for a request
+    await features.load_eager(required=job_queue.store.pending_features())
+
+
+@app.on_event("shutdown")
+async def shutdown_features():
+    # Unfinished jobs go back to the queue for the next start
+    await job_queue.shutdown()
+    await features.shutdown()
+    pdf_extractor.shutdown()
+
+
+@app.get("/features")
+def feature_report():
+    return features.report()
+
+
+@app.get("/metrics/llm")
+def llm_metrics_report():
+    return llm_metrics.report()
 
 # Root endpoint
 @app.get("/")
@@ -66,7 +102,9 @@ def read_root():
             "/api/mcq - MCQ Generator",
             "/api/attention - Attention Tracking",
             "/api/interview - Interview Bot"
-        ]
+        ],
+        "feature_report": "/features",
+        "llm_metrics": "/metrics/llm"
     }
 
 if __name__ == "__main__":
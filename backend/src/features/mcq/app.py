@@ -1,12 +1,24 @@
-from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+import asyncio
 import json
 import os
-from openai import AzureOpenAI
-from typing import Optional
-from pydantic import BaseModel
+import uuid
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from fastapi.concurrency import run_in_threadpool
+
+from src.features.mcq.llm_client import AsyncLLMClient, LLMBusyError, LLMTimeoutError
+from src.features.mcq.cache import MCQCache, DEFAULT_CACHE_PATH, make_cache_key
+from src.features.mcq.question_bank import Cell, QuestionBank, DEFAULT_BANK_PATH, question_fingerprint
+from src.features.mcq.stream_parser import IncrementalQuestionParser
+from src.features.mcq.topic_catalog import TopicCatalog
+from src.features.mcq.prompts import build_mcq_prompt
+from src.features.shared.llm_metrics import TokenBudgetExceeded
+from src.features.shared.singleflight import SingleFlight
+from src.features.shared.llm_provider import get_provider, user_message
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -18,17 +30,60 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 TOPICS_FILE_PATH = os.path.join(STATIC_DIR, "topics_and_subtopics.json")
 
+# Topics are kept in memory and reloaded only when the file changes
+topic_catalog = TopicCatalog(TOPICS_FILE_PATH)
+
 # Configure templates and static files
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-# Configure OpenAI client for Azure
-client = AzureOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    api_version="2024-08-01-preview",
-    azure_endpoint="https://imopenaiswedencentral.openai.azure.com/"
+# Configure async LLM client (Azure OpenAI, or record/replay) with bounded concurrency
+MCQ_MODEL = "GPT4OAISpeaking"
+MCQ_LLM_CONCURRENCY = int(os.getenv("MCQ_LLM_CONCURRENCY", 8))
+client = AsyncLLMClient(
+    get_provider(
+        "mcq", "azure_openai",
+        api_key=os.getenv("OPENAI_API_KEY"),
+        api_version="2024-08-01-preview",
+        azure_endpoint="https://imopenaiswedencentral.openai.azure.com/",
+        max_connections=MCQ_LLM_CONCURRENCY,
+        timeout=float(os.getenv("MCQ_LLM_TIMEOUT", 60))
+    ),
+    max_concurrency=MCQ_LLM_CONCURRENCY,
+    call_timeout=float(os.getenv("MCQ_LLM_TIMEOUT", 60)),
+    queue_timeout=float(os.getenv("MCQ_LLM_QUEUE_TIMEOUT", 30))
+)
+
+# Cache of generated MCQ sets keyed by the normalized request and prompt version
+mcq_cache = MCQCache(
+    path=os.getenv("MCQ_CACHE_PATH", DEFAULT_CACHE_PATH),
+    ttl_seconds=float(os.getenv("MCQ_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("MCQ_CACHE_MAX_ENTRIES", 2000))
 )
 
+# Pre-generated questions per (subject, topic, difficulty), topped up in the background
+question_bank = QuestionBank(
+    path=os.getenv("MCQ_BANK_PATH", DEFAULT_BANK_PATH),
+    target_per_cell=int(os.getenv("MCQ_BANK_TARGET", 30)),
+    low_watermark=int(os.getenv("MCQ_BANK_LOW_WATERMARK", 15)),
+    max_serves=int(os.getenv("MCQ_BANK_MAX_SERVES", 20)),
+    prewarm=os.getenv("MCQ_BANK_PREWARM", "0") == "1",
+    active_ttl_seconds=float(os.getenv("MCQ_BANK_ACTIVE_TTL_SECONDS", 24 * 3600))
+)
+# Refill batches sample above zero so a cell keeps growing past its first set
+MCQ_BANK_TEMPERATURE = float(os.getenv("MCQ_BANK_TEMPERATURE", 0.7))
+
+QUESTIONS_PER_SET = 15
+
+# Identical requests arriving together share one LLM generation
+mcq_flights = SingleFlight("mcq")
+
+# Batch papers resolve their sections concurrently, bounded across all batch requests
+MCQ_BATCH_CONCURRENCY = int(os.getenv("MCQ_BATCH_CONCURRENCY", 4))
+MCQ_BATCH_MAX_SPECS = int(os.getenv("MCQ_BATCH_MAX_SPECS", 20))
+MCQ_BATCH_MAX_COUNT = int(os.getenv("MCQ_BATCH_MAX_COUNT", 50))
+batch_semaphore = asyncio.Semaphore(MCQ_BATCH_CONCURRENCY)
+
 # Define a Pydantic model for the MCQ request
 
 
@@ -36,6 +91,7 @@ class MCQRequest(BaseModel):
     subject: str
     difficulty: str
     topic: Optional[str] = "NA"
+    session_id: Optional[str] = None
 
 # Ensure the static directory exists and create default topics if needed
 
@@ -54,6 +110,15 @@ async def startup_event():
         with open(TOPICS_FILE_PATH, 'w') as file:
             json.dump(default_topics, file, indent=4)
 
+    if os.getenv("MCQ_BANK_REFILL", "1") == "1":
+        question_bank.start(generate_bank_questions)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await question_bank.stop()
+    await client.aclose()
+
 # Load topics and subtopics for the dropdown
 
 
@@ -63,8 +128,7 @@ async def index(request: Request):
         raise HTTPException(
             status_code=500, detail=f"File not found: {TOPICS_FILE_PATH}")
 
-    with open(TOPICS_FILE_PATH, 'r') as file:
-        topics_data = json.load(file)
+    topics_data = topic_catalog.all()
 
     return templates.TemplateResponse("index.html", {"request": request, "topics_data": topics_data})
 
@@ -80,148 +144,366 @@ async def generate_mcq(request: Request, mcq_request: MCQRequest = None):
         subject = form_data.get('subject')
         difficulty = form_data.get('difficulty')
         topic = form_data.get('topic', 'NA')
+        session_id = form_data.get('session_id')
     else:
         subject = mcq_request.subject
         difficulty = mcq_request.difficulty
         topic = mcq_request.topic
+        session_id = mcq_request.session_id
+    session_id = session_id or str(uuid.uuid4())
 
-    with open(TOPICS_FILE_PATH, 'r') as file:
-        topics_and_subtopics = json.load(file)
+    # Serve straight from the question bank when it holds enough unseen questions
+    questions = await run_in_threadpool(
+        question_bank.draw, subject, topic, difficulty, QUESTIONS_PER_SET, session_id)
+    if questions is not None:
+        return {"question": questions, "session_id": session_id}
 
     try:
-        mcq_data = generate_mcqs_with_ai(
-            subject, difficulty, topic, topics_and_subtopics)
+        questions = await unseen_questions(subject, difficulty, topic, QUESTIONS_PER_SET, session_id)
+    except Exception as e:
+        raise to_http_error(e)
+    questions = [{**question, "id": number} for number, question in enumerate(questions, start=1)]
+    question_bank.sessions.mark(session_id, fingerprints({"question": questions}))
+    return {"question": questions, "session_id": session_id}
+
+
+def to_http_error(e: Exception) -> HTTPException:
+    """ Map generation failures onto the status codes the MCQ endpoints return """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, json.JSONDecodeError):
+        return HTTPException(status_code=500, detail="Failed to parse AI response")
+    if isinstance(e, TokenBudgetExceeded):
+        return HTTPException(status_code=429, detail=str(e),
+                             headers={"Retry-After": str(int(e.retry_after) + 1)})
+    if isinstance(e, LLMBusyError):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, LLMTimeoutError):
+        return HTTPException(status_code=504, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+async def load_or_generate_set(subject, difficulty, topic) -> dict:
+    """ A full question set from the cache, or generated once for all concurrent callers """
+    cache_key = make_cache_key(subject, difficulty, topic)
+    mcq_data = await run_in_threadpool(mcq_cache.get, cache_key)
+    if mcq_data is not None:
+        return mcq_data
+    return await mcq_flights.do(
+        cache_key, lambda: generate_and_store(subject, difficulty, topic, cache_key))
 
-        if isinstance(mcq_data, str):
-            mcq_data = json.loads(mcq_data)
 
-        return mcq_data
-    except json.JSONDecodeError:
+async def unseen_questions(subject, difficulty, topic, count: int, session_id: Optional[str],
+                           endpoint: str = "/generate_mcq") -> List[dict]:
+    """
+    Up to count questions the session has not been shown: the cached (or coalesced) full
+    set first, then a generation sized to whatever is still missing, whose prompt lists
+    the cell's known questions so it writes new ones.
+    """
+    seen = question_bank.sessions.seen(session_id)
+    mcq_data = await load_or_generate_set(subject, difficulty, topic)
+    cached = [q for q in mcq_data.get("question", []) if isinstance(q, dict)]
+    questions = [q for q in cached if question_fingerprint(q) not in seen][:count]
+
+    missing = count - len(questions)
+    if missing > 0:
+        cell = question_bank.cell_for(subject, topic, difficulty)
+        avoid = [q.get("question_text", "") for q in cached]
+        avoid += await run_in_threadpool(question_bank.question_texts, cell)
+        content = await generate_mcqs_with_ai(subject, difficulty, topic, endpoint=endpoint, count=missing,
+                                              avoid=avoid)
+        extra = json.loads(content) if isinstance(content, str) else content
+        extra = [q for q in extra.get("question", []) if isinstance(q, dict)]
+        await run_in_threadpool(question_bank.add_questions, cell, extra)
+        taken = seen | {question_fingerprint(q) for q in questions}
+        questions += [q for q in extra if question_fingerprint(q) not in taken][:missing]
+    return questions
+
+
+async def generate_and_store(subject, difficulty, topic, cache_key) -> dict:
+    """ Generate a fresh MCQ set and keep it in both the cache and the question bank """
+    mcq_data = await generate_mcqs_with_ai(subject, difficulty, topic)
+
+    if isinstance(mcq_data, str):
+        mcq_data = json.loads(mcq_data)
+
+    await run_in_threadpool(mcq_cache.set, cache_key, mcq_data)
+    cell = question_bank.cell_for(subject, topic, difficulty)
+    await run_in_threadpool(question_bank.add_questions, cell, mcq_data.get("question", []))
+    return mcq_data
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/generate_mcq/stream")
+async def generate_mcq_stream(mcq_request: MCQRequest):
+    """ Same as /generate_mcq, but each question is sent as a Server-Sent Event once it is complete """
+    if not os.path.exists(TOPICS_FILE_PATH):
         raise HTTPException(
-            status_code=500, detail="Failed to parse AI response")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-def generate_mcqs_with_ai(subject, difficulty, topic, topics_and_subtopics):
-    delimiter = "####"
-
-    prompt = f"""
-    You are an expert educational content creator specializing in Computer Science subjects. Your task is to generate high-quality technical questions based on user specifications.
-
-    {delimiter}
-    Context:
-    You will receive three key inputs:
-    1. Subject(```{subject}```) (One of: OS, CN, OOPS, DBMS)
-    2. Difficulty Level(```{difficulty}```)(Easy, Medium, Hard)
-    3. Topic(```{topic}```): Specific topics within the subject. This is an optional input. If the user inputs "NA","Na" OR "na" simply mix all the topics and create the questions. You can refer to all the available topic in ```{topics_and_subtopics}```.
-    {delimiter}
-
-    {delimiter}
-    Question Distribution:
-    - Generate exactly 15 questions total
-    - Include exactly 6 numerical problem-solving questions per subject
-    - Ensure even distribution across specified topics when multiple topics are provided
-    {delimiter}
-
-    {delimiter}
-    Question Quality Requirements:
-    1. Technical Accuracy:
-       - Generate only factually correct questions based on established CS principles
-       - Avoid any hallucinations or speculative content
-       - Include only industry-standard, verified information
-
-    2. Conceptual Testing:
-       - Focus on testing deep understanding rather than memorization
-       - Include questions that require problem-solving skills
-       - Test application of concepts in practical scenarios
-       - Incorporate questions that connect multiple related concepts
-
-    3. Option Design Requirements:
-       - Include plausible distractors that represent common misconceptions
-       - Vary the length of correct answers (avoid making the longest option always correct)
-       - Strategically include "All of the above" or "None of the above" options
-       - Distribute correct answers evenly among A, B, C, and D (avoid answer bias)
-       - Ensure options are mutually exclusive and collectively exhaustive
-
-    4. Bias Prevention:
-       - Use neutral language
-       - Avoid culture-specific references
-       - Ensure questions are accessible to all skill levels within the specified difficulty
-       - Remove any gender, age, or geographic biases
-       - Use inclusive technical scenarios
-    {delimiter}
-
-    {delimiter}
-    Difficulty Calibration:
-    1. Easy:
-       - Basic concept application
-       - Single-step problem solving
-       - Direct recall and understanding
-
-    2. Medium:
-       - Multi-step problem solving
-       - Concept integration
-       - Practical application scenarios
-
-    3. Hard:
-       - Complex problem analysis
-       - Multiple concept integration
-       - Advanced application scenarios
-       - Edge case considerations
-    {delimiter}
-
-    {delimiter}
-    Output Format:
-    Strictly adhere to this JSON format:
-    {{
-      "question": [
-        {{
-          "id": number,
-          "subject": "string",
-          "topic": "string",
-          "difficulty": "string",
-          "question_type": "multiple_choice",
-          "question_text": "string",
-          "options": [
-            {{"key": "A", "text": "string"}},
-            {{"key": "B", "text": "string"}},
-            {{"key": "C", "text": "string"}},
-            {{"key": "D", "text": "string"}}
-          ],
-          "correct_answer": "string",
-          "explanation": "string",
-          "status":"string"
-        }}
-      ]
-    }}
-
-    {delimiter}
-
-    {delimiter}
-    "status" should be set as "original" for all the questions.
-    {delimiter}
+            status_code=500, detail=f"File not found: {TOPICS_FILE_PATH}")
+
+    subject = mcq_request.subject
+    difficulty = mcq_request.difficulty
+    topic = mcq_request.topic
+    session_id = mcq_request.session_id or str(uuid.uuid4())
+
+    async def event_stream():
+        yield sse_event("session", {"session_id": session_id})
+
+        questions = await run_in_threadpool(
+            question_bank.draw, subject, topic, difficulty, QUESTIONS_PER_SET, session_id)
+        if questions is not None:
+            for question in questions:
+                yield sse_event("question", question)
+            yield sse_event("done", {"count": len(questions), "session_id": session_id})
+            return
+
+        # The cached set minus what this session has already seen, topped up live below
+        seen = question_bank.sessions.seen(session_id)
+        cache_key = make_cache_key(subject, difficulty, topic)
+        mcq_data = await run_in_threadpool(mcq_cache.get, cache_key)
+        cached = [q for q in (mcq_data or {}).get("question", []) if isinstance(q, dict)]
+        questions = [{**q, "id": number} for number, q in enumerate(
+            (q for q in cached if question_fingerprint(q) not in seen), start=1)][:QUESTIONS_PER_SET]
+        for question in questions:
+            yield sse_event("question", question)
+        seen |= {question_fingerprint(q) for q in questions}
+
+        missing = QUESTIONS_PER_SET - len(questions)
+        parser = IncrementalQuestionParser()
+        generated = []
+        cell = question_bank.cell_for(subject, topic, difficulty)
+        if missing > 0:
+            try:
+                # Without a cached set this is the first generation for the cell; otherwise the
+                # prompt lists the known questions so the model writes new ones
+                avoid = []
+                if cached:
+                    avoid = [q.get("question_text", "") for q in cached]
+                    avoid += await run_in_threadpool(question_bank.question_texts, cell)
+                prompt = build_mcq_prompt(subject, difficulty, topic, topic_catalog.topics_for(subject),
+                                          count=missing, avoid=avoid)
+                async for chunk in client.chat_stream(
+                        model=MCQ_MODEL,
+                        messages=user_message(prompt),
+                        temperature=0.0,
+                        endpoint="/generate_mcq/stream"):
+                    for question in parser.feed(chunk):
+                        generated.append(question)
+                        fingerprint = question_fingerprint(question)
+                        if fingerprint in seen or len(questions) == QUESTIONS_PER_SET:
+                            continue
+                        seen.add(fingerprint)
+                        question["id"] = len(questions) + 1
+                        questions.append(question)
+                        yield sse_event("question", question)
+            except Exception as e:
+                question_bank.sessions.mark(session_id, fingerprints({"question": questions}))
+                yield sse_event("error", {"detail": str(e), "count": len(questions)})
+                return
+
+        if not cached and len(generated) == QUESTIONS_PER_SET:
+            await run_in_threadpool(mcq_cache.set, cache_key, {"question": generated})
+        await run_in_threadpool(question_bank.add_questions, cell, generated)
+        question_bank.sessions.mark(session_id, fingerprints({"question": questions}))
+        yield sse_event("done", {"count": len(questions), "session_id": session_id,
+                                 "skipped": parser.skipped})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class BatchSpec(BaseModel):
+    subject: str
+    difficulty: str
+    topic: Optional[str] = "NA"
+    count: int = Field(QUESTIONS_PER_SET, ge=1, le=MCQ_BATCH_MAX_COUNT)
+
+
+class BatchRequest(BaseModel):
+    specs: List[BatchSpec]
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+async def resolve_spec(spec: BatchSpec, session_id: str, count: Optional[int] = None) -> List[dict]:
+    """
+    Questions for one section of a batch paper: the bank first, then the cached (or
+    coalesced) full set, then a generation sized to whatever is still missing. count
+    overrides spec.count when several sections share the spec's cell.
+    """
+    count = count or spec.count
+    async with batch_semaphore:
+        questions = await run_in_threadpool(
+            question_bank.draw, spec.subject, spec.topic, spec.difficulty, count, session_id)
+        if questions is not None:
+            return questions
+        return await unseen_questions(spec.subject, spec.difficulty, spec.topic, count, session_id,
+                                      endpoint="/generate_mcq/batch")
+
+
+def merge_section(paper: List[dict], seen: set, spec: BatchSpec, questions: List[dict]) -> int:
+    """ Append a section to the paper, dropping duplicates and renumbering ids. Returns how many were added """
+    added = 0
+    for question in questions:
+        fingerprint = question_fingerprint(question)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        paper.append({**question, "id": len(paper) + 1})
+        added += 1
+    return added
+
+
+def section_summary(index: int, spec: BatchSpec, added: int) -> dict:
+    return {"index": index, "subject": spec.subject, "difficulty": spec.difficulty,
+            "topic": spec.topic, "requested": spec.count, "returned": added}
+
+
+@app.post("/generate_mcq/batch")
+async def generate_mcq_batch(batch: BatchRequest):
     """
+    Build a whole paper from several (subject, difficulty, topic, count) specs. Specs are
+    resolved concurrently under MCQ_BATCH_CONCURRENCY and merged into one de-duplicated
+    list. With "stream": true each section is sent as a Server-Sent Event when it is ready.
+    """
+    if not os.path.exists(TOPICS_FILE_PATH):
+        raise HTTPException(
+            status_code=500, detail=f"File not found: {TOPICS_FILE_PATH}")
 
-    response = client.chat.completions.create(
-        model="GPT4OAISpeaking",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.0
+    specs = batch.specs
+    if not 1 <= len(specs) <= MCQ_BATCH_MAX_SPECS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch takes between 1 and {MCQ_BATCH_MAX_SPECS} specs")
+    session_id = batch.session_id or str(uuid.uuid4())
+
+    # Specs for the same cell are resolved as one draw and split afterwards; drawn
+    # separately they would get the same rows and the later sections would come back short
+    groups: Dict[Cell, List[int]] = {}
+    for index, spec in enumerate(specs):
+        groups.setdefault(question_bank.cell_for(spec.subject, spec.topic, spec.difficulty), []).append(index)
+
+    async def indexed(indexes: List[int]):
+        """ (index, questions, error) for every spec of one cell """
+        try:
+            questions = await resolve_spec(specs[indexes[0]], session_id, sum(specs[i].count for i in indexes))
+        except Exception as e:
+            return [(index, None, e) for index in indexes]
+        results, start = [], 0
+        for index in indexes:
+            results.append((index, questions[start:start + specs[index].count], None))
+            start += specs[index].count
+        return results
+
+    tasks = [asyncio.ensure_future(indexed(indexes)) for indexes in groups.values()]
+
+    if not batch.stream:
+        try:
+            results = sorted((result for group in await asyncio.gather(*tasks) for result in group),
+                             key=lambda result: result[0])
+        finally:
+            for task in tasks:
+                task.cancel()
+        failed = [(i, e) for i, _, e in results if e is not None]
+        if len(failed) == len(specs):
+            raise to_http_error(failed[0][1])
+
+        paper, seen, sections = [], set(), []
+        for index, questions, error in results:
+            if error is not None:
+                sections.append({**section_summary(index, specs[index], 0),
+                                 "error": to_http_error(error).detail})
+                continue
+            added = merge_section(paper, seen, specs[index], questions)
+            sections.append(section_summary(index, specs[index], added))
+        question_bank.sessions.mark(session_id, list(seen))
+        return {"question": paper, "sections": sections, "session_id": session_id}
+
+    async def event_stream():
+        paper, seen = [], set()
+        yield sse_event("session", {"session_id": session_id, "sections": len(specs)})
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for index, questions, error in await next_done:
+                    if error is not None:
+                        yield sse_event("error", {**section_summary(index, specs[index], 0),
+                                                  "detail": to_http_error(error).detail})
+                        continue
+                    start = len(paper)
+                    added = merge_section(paper, seen, specs[index], questions)
+                    yield sse_event("section", {**section_summary(index, specs[index], added),
+                                                "question": paper[start:]})
+        finally:
+            for task in tasks:
+                task.cancel()
+            question_bank.sessions.mark(session_id, list(seen))
+        yield sse_event("done", {"count": len(paper), "session_id": session_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-    content = response.choices[0].message.content
 
-    try:
-        token_dict = {
-            'prompt_tokens': response.usage.prompt_tokens,
-            'completion_tokens': response.usage.completion_tokens,
-            'total_tokens': response.usage.total_tokens,
-        }
-        print(f"Prompt Cost: {token_dict}")
-    except:
-        print("Token usage information not available")
+def fingerprints(mcq_data: dict) -> list:
+    return [question_fingerprint(q) for q in mcq_data.get("question", []) if isinstance(q, dict)]
+
+
+async def generate_bank_questions(subject: str, difficulty: str, topic: str) -> list:
+    """
+    Generate one batch of questions for a question bank cell. The prompt lists the cell's
+    newest questions and the sampling is not greedy, so each batch adds new questions
+    instead of repeating the cell's first set
+    """
+    cell = question_bank.cell_for(subject, topic, difficulty)
+    avoid = await asyncio.to_thread(question_bank.question_texts, cell)
+    content = await generate_mcqs_with_ai(subject, difficulty, topic, endpoint="bank_refill", avoid=avoid,
+                                          temperature=MCQ_BANK_TEMPERATURE)
+    mcq_data = json.loads(content) if isinstance(content, str) else content
+    return mcq_data.get("question", [])
+
+
+@app.get("/bank/stats")
+async def bank_stats():
+    return await run_in_threadpool(question_bank.stats)
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return {**client.stats(), "coalescing": mcq_flights.stats()}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return mcq_cache.stats()
+
+
+@app.delete("/cache")
+async def clear_cache():
+    await run_in_threadpool(mcq_cache.clear)
+    return {"success": True}
+
+
+async def generate_mcqs_with_ai(subject, difficulty, topic, endpoint="/generate_mcq", count=QUESTIONS_PER_SET,
+                                avoid=(), temperature=0.0):
+    prompt = build_mcq_prompt(subject, difficulty, topic, topic_catalog.topics_for(subject), count=count,
+                              avoid=avoid)
+
+    # Token usage and latency are recorded by the provider in shared.llm_metrics
+    response = await client.chat(
+        model=MCQ_MODEL,
+        messages=user_message(prompt),
+        temperature=temperature,
+        endpoint=endpoint
+    )
 
-    return content
+    return response.text
 
 
 # Run the application
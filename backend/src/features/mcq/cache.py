@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Bump whenever the MCQ prompt changes so stale answers are not served
+PROMPT_VERSION = "2"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, "cache", "mcq_cache.sqlite3")
+
+
+def normalize_request(subject: Optional[str], difficulty: Optional[str], topic: Optional[str]) -> tuple:
+    subject = " ".join((subject or "").split()).upper()
+    difficulty = " ".join((difficulty or "").split()).capitalize()
+    topic = " ".join((topic or "").split())
+    topic = "NA" if topic.upper() in ("", "NA") else topic.lower()
+    return subject, difficulty, topic
+
+
+def make_cache_key(subject: Optional[str], difficulty: Optional[str], topic: Optional[str],
+                   prompt_version: str = PROMPT_VERSION) -> str:
+    payload = json.dumps(
+        [prompt_version, *normalize_request(subject, difficulty, topic)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MCQCache:
+    """ SQLite backed cache of generated MCQ sets with TTL and LRU eviction """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 2000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS mcq_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS mcq_cache_last_access ON mcq_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM mcq_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM mcq_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE mcq_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mcq_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now))
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds:
+            cursor = self._conn.execute(
+                "DELETE FROM mcq_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self.evictions += cursor.rowcount
+
+        count = self._conn.execute("SELECT COUNT(*) FROM mcq_cache").fetchone()[0]
+        if count > self.max_entries:
+            # Drop the least recently used entries
+            cursor = self._conn.execute("""
+                DELETE FROM mcq_cache WHERE key IN (
+                    SELECT key FROM mcq_cache ORDER BY last_access ASC LIMIT ?
+                )
+            """, (count - self.max_entries,))
+            self.evictions += cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM mcq_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM mcq_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "prompt_version": PROMPT_VERSION,
+        }
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, List
+
+from src.features.shared.llm_metrics import llm_metrics, estimate_tokens
+from src.features.shared.llm_provider import LLMProvider, LLMResponse, messages_text
+
+logger = logging.getLogger(__name__)
+
+
+class LLMTimeoutError(Exception):
+    """ The model did not answer within the per-call timeout """
+
+
+class LLMBusyError(Exception):
+    """ Every concurrency slot stayed taken for longer than the queue timeout """
+
+
+class AsyncLLMClient:
+    """
+    Async LLM client shared by every MCQ request. A semaphore bounds the number of
+    generations in flight; the provider (live, record or replay) does the actual call.
+    """
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int = 8, call_timeout: float = 60.0,
+                 queue_timeout: float = 30.0):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _acquire(self, messages: List[dict]) -> None:
+        # Shed over-budget calls before they take a queue slot
+        llm_metrics.check_budget(self.provider.feature, estimate_tokens(messages_text(messages)))
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError(
+                f"All {self.max_concurrency} generation slots busy for {self.queue_timeout:.0f}s")
+        finally:
+            self.waiting -= 1
+
+    async def chat(self, model: str, messages: List[dict], temperature: float = 0.0,
+                   endpoint: str = "/generate_mcq") -> LLMResponse:
+        """ Run one chat completion under the concurrency limit and per-call timeout """
+        await self._acquire(messages)
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(
+                self.provider.complete(messages, model=model, endpoint=endpoint, temperature=temperature),
+                timeout=self.call_timeout
+            )
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"LLM call exceeded {self.call_timeout:.0f}s")
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def chat_stream(self, model: str, messages: List[dict], temperature: float = 0.0,
+                          endpoint: str = "/generate_mcq/stream") -> AsyncIterator[str]:
+        """ Stream the completion text chunk by chunk. The call timeout covers the whole stream """
+        await self._acquire(messages)
+        self.in_flight += 1
+        deadline = time.monotonic() + self.call_timeout
+        chunks = self.provider.stream(messages, model=model, endpoint=endpoint, temperature=temperature)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), timeout=max(deadline - time.monotonic(), 0))
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"LLM stream exceeded {self.call_timeout:.0f}s")
+        finally:
+            await chunks.aclose()
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.provider.backend,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "call_timeout": self.call_timeout,
+            "queue_timeout": self.queue_timeout,
+        }
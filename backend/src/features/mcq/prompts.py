@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+from typing import List, Optional, Sequence
+
+from src.features.shared.llm_metrics import token_counter
+
+DIFFICULTY_CALIBRATION = {
+    "Easy": "basic concept application, single-step problems, direct recall",
+    "Medium": "multi-step problems, concept integration, practical scenarios",
+    "Hard": "complex analysis, multiple concepts combined, advanced scenarios and edge cases",
+}
+
+OUTPUT_SCHEMA = (
+    '{"question":[{"id":1,"subject":"...","topic":"...","difficulty":"...",'
+    '"question_type":"multiple_choice","question_text":"...",'
+    '"options":[{"key":"A","text":"..."},{"key":"B","text":"..."},{"key":"C","text":"..."},{"key":"D","text":"..."}],'
+    '"correct_answer":"A|B|C|D","explanation":"...","status":"original"}]}'
+)
+
+COMPACT_TEMPLATE = """You are an expert Computer Science educator. Write {count} multiple-choice questions.
+Subject: {subject}
+Difficulty: {difficulty} ({calibration})
+{topic_line}
+
+Rules:
+- Exactly {count} questions, {numerical} of them numerical problem-solving, spread evenly across the topics.
+- Factually correct, established CS principles only; test understanding and application, not recall.
+- Options A-D are mutually exclusive with plausible distractors based on common misconceptions; vary answer length; spread correct answers evenly over A-D; use "All/None of the above" sparingly.
+- Neutral, inclusive language with no cultural, gender, age or regional bias.{avoid}
+
+Return only JSON in this shape:
+{schema}"""
+
+
+# Existing questions listed in a prompt so the model writes new ones; capped to keep the prompt compact
+MAX_AVOID_QUESTIONS = 30
+MAX_AVOID_CHARS = 120
+
+
+def build_mcq_prompt(subject: str, difficulty: str, topic: Optional[str], subject_topics: List[str],
+                     count: int = 15, avoid: Sequence[str] = ()) -> str:
+    """
+    Compact MCQ prompt that lists only the requested topic or the subject's own topics.
+    avoid holds existing question texts the new questions must not repeat.
+    """
+    topic = (topic or "").strip()
+    if topic and topic.upper() != "NA":
+        topic_line = f"Topic: {topic}"
+    elif subject_topics:
+        topic_line = f"Topics (mix them): {'; '.join(subject_topics)}"
+    else:
+        topic_line = "Topics: mix the core topics of the subject"
+
+    avoid = [" ".join(text.split())[:MAX_AVOID_CHARS] for text in avoid if text and text.strip()]
+    avoid_block = ""
+    if avoid:
+        avoid_block = "\n- Do not repeat or rephrase any of these existing questions:\n" + "\n".join(
+            f"  - {text}" for text in avoid[:MAX_AVOID_QUESTIONS])
+
+    difficulty = (difficulty or "").strip().capitalize()
+    return COMPACT_TEMPLATE.format(
+        count=count,
+        numerical=round(count * 6 / 15),
+        subject=subject,
+        difficulty=difficulty,
+        calibration=DIFFICULTY_CALIBRATION.get(difficulty, "as appropriate for the level"),
+        topic_line=topic_line,
+        avoid=avoid_block,
+        schema=OUTPUT_SCHEMA,
+    )
+
+
+def build_legacy_prompt(subject, difficulty, topic, topics_and_subtopics):
+    """ The original template, which embeds the whole topic catalog. Kept for token_report() """
+    delimiter = "####"
+
+    prompt = f"""
+    You are an expert educational content creator specializing in Computer Science subjects. Your task is to generate high-quality technical questions based on user specifications.
+
+    {delimiter}
+    Context:
+    You will receive three key inputs:
+    1. Subject(```{subject}```) (One of: OS, CN, OOPS, DBMS)
+    2. Difficulty Level(```{difficulty}```)(Easy, Medium, Hard)
+    3. Topic(```{topic}```): Specific topics within the subject. This is an optional input. If the user inputs "NA","Na" OR "na" simply mix all the topics and create the questions. You can refer to all the available topic in ```{topics_and_subtopics}```.
+    {delimiter}
+
+    {delimiter}
+    Question Distribution:
+    - Generate exactly 15 questions total
+    - Include exactly 6 numerical problem-solving questions per subject
+    - Ensure even distribution across specified topics when multiple topics are provided
+    {delimiter}
+
+    {delimiter}
+    Question Quality Requirements:
+    1. Technical Accuracy:
+       - Generate only factually correct questions based on established CS principles
+       - Avoid any hallucinations or speculative content
+       - Include only industry-standard, verified information
+
+    2. Conceptual Testing:
+       - Focus on testing deep understanding rather than memorization
+       - Include questions that require problem-solving skills
+       - Test application of concepts in practical scenarios
+       - Incorporate questions that connect multiple related concepts
+
+    3. Option Design Requirements:
+       - Include plausible distractors that represent common misconceptions
+       - Vary the length of correct answers (avoid making the longest option always correct)
+       - Strategically include "All of the above" or "None of the above" options
+       - Distribute correct answers evenly among A, B, C, and D (avoid answer bias)
+       - Ensure options are mutually exclusive and collectively exhaustive
+
+    4. Bias Prevention:
+       - Use neutral language
+       - Avoid culture-specific references
+       - Ensure questions are accessible to all skill levels within the specified difficulty
+       - Remove any gender, age, or geographic biases
+       - Use inclusive technical scenarios
+    {delimiter}
+
+    {delimiter}
+    Difficulty Calibration:
+    1. Easy:
+       - Basic concept application
+       - Single-step problem solving
+       - Direct recall and understanding
+
+    2. Medium:
+       - Multi-step problem solving
+       - Concept integration
+       - Practical application scenarios
+
+    3. Hard:
+       - Complex problem analysis
+       - Multiple concept integration
+       - Advanced application scenarios
+       - Edge case considerations
+    {delimiter}
+
+    {delimiter}
+    Output Format:
+    Strictly adhere to this JSON format:
+    {{
+      "question": [
+        {{
+          "id": number,
+          "subject": "string",
+          "topic": "string",
+          "difficulty": "string",
+          "question_type": "multiple_choice",
+          "question_text": "string",
+          "options": [
+            {{"key": "A", "text": "string"}},
+            {{"key": "B", "text": "string"}},
+            {{"key": "C", "text": "string"}},
+            {{"key": "D", "text": "string"}}
+          ],
+          "correct_answer": "string",
+          "explanation": "string",
+          "status":"string"
+        }}
+      ]
+    }}
+
+    {delimiter}
+
+    {delimiter}
+    "status" should be set as "original" for all the questions.
+    {delimiter}
+    """
+    return prompt
+
+
+def token_report(topics_and_subtopics: dict, topic_for_subject: Optional[dict] = None) -> List[dict]:
+    """ Prompt tokens of the legacy template vs. the compact one for every subject and difficulty """
+    from src.features.mcq.question_bank import canonical_subject
+
+    count_tokens = token_counter()
+    rows = []
+    for subject, topics in topics_and_subtopics.items():
+        topic = (topic_for_subject or {}).get(subject, "NA")
+        for difficulty in DIFFICULTY_CALIBRATION:
+            legacy = count_tokens(build_legacy_prompt(subject, difficulty, topic, topics_and_subtopics))
+            compact = count_tokens(build_mcq_prompt(
+                canonical_subject(subject), difficulty, topic, topics))
+            rows.append({
+                "subject": subject,
+                "difficulty": difficulty,
+                "topic": topic,
+                "legacy_tokens": legacy,
+                "compact_tokens": compact,
+                "saved_pct": round(100 * (legacy - compact) / legacy, 1),
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare MCQ prompt sizes")
+    parser.add_argument("--topics", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "static", "topics_and_subtopics.json"))
+    args = parser.parse_args()
+
+    with open(args.topics, "r") as file:
+        catalog = json.load(file)
+
+    rows = token_report(catalog)
+    for row in rows:
+        print(f"{row['subject']:<20} {row['difficulty']:<7} legacy={row['legacy_tokens']:>5} "
+              f"compact={row['compact_tokens']:>5} saved={row['saved_pct']}%")
+    legacy_total = sum(row["legacy_tokens"] for row in rows)
+    compact_total = sum(row["compact_tokens"] for row in rows)
+    print(f"Total: {legacy_total} -> {compact_total} prompt tokens "
+          f"({100 * (legacy_total - compact_total) / legacy_total:.1f}% fewer)")
@@ -0,0 +1,407 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BANK_PATH = os.path.join(BASE_DIR, "cache", "question_bank.sqlite3")
+TOPICS_FILE_PATH = os.path.join(BASE_DIR, "static", "topics_and_subtopics.json")
+OVERVIEW_FILE_PATH = os.path.join(BASE_DIR, "overview.json")
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+OPTION_KEYS = ("A", "B", "C", "D")
+MIXED_TOPIC = "NA"
+
+# Names used by the frontend and overview.json mapped to the keys of topics_and_subtopics.json
+SUBJECT_ALIASES = {
+    "OS": "OS",
+    "OPERATING SYSTEMS": "OS",
+    "CN": "Computer Networks",
+    "COMPUTER NETWORKS": "Computer Networks",
+    "DBMS": "DBMS",
+    "DATABASE MANAGEMENT SYSTEMS": "DBMS",
+    "OOP": "OOP",
+    "OOPS": "OOP",
+    "OBJECT-ORIENTED PROGRAMMING SYSTEMS": "OOP",
+}
+
+Cell = Tuple[str, str, str]  # (subject, topic, difficulty)
+
+
+def canonical_subject(subject: Optional[str]) -> str:
+    subject = " ".join((subject or "").split())
+    return SUBJECT_ALIASES.get(subject.upper(), subject)
+
+
+def canonical_difficulty(difficulty: Optional[str]) -> str:
+    return " ".join((difficulty or "").split()).capitalize()
+
+
+def canonical_topic(topic: Optional[str]) -> str:
+    topic = " ".join((topic or "").split())
+    return MIXED_TOPIC if topic.upper() in ("", "NA") else topic
+
+
+def load_subject_topics(topics_path: str = TOPICS_FILE_PATH,
+                        overview_path: str = OVERVIEW_FILE_PATH) -> Dict[str, List[str]]:
+    """ Merge topics_and_subtopics.json with the topic names listed in overview.json """
+    subject_topics: Dict[str, List[str]] = {}
+    try:
+        with open(topics_path, "r") as file:
+            for subject, topics in json.load(file).items():
+                subject_topics[canonical_subject(subject)] = list(topics)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Could not load topics file {topics_path}: {e}")
+
+    try:
+        with open(overview_path, "r") as file:
+            overview = json.load(file)
+        for subject in overview.get("subjects", []):
+            topics = subject_topics.setdefault(canonical_subject(subject["name"]), [])
+            known = {t.lower() for t in topics}
+            topics.extend(t["name"] for t in subject.get("topics", [])
+                          if t["name"].lower() not in known and t["name"] != "Introduction")
+    except (OSError, json.JSONDecodeError, KeyError) as e:
+        logger.error(f"Could not load overview file {overview_path}: {e}")
+
+    return subject_topics
+
+
+def question_fingerprint(question: dict) -> str:
+    text = " ".join(str(question.get("question_text", "")).lower().split())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def validate_question(question: dict) -> Optional[dict]:
+    """ Return a cleaned copy of an LLM generated question, or None if it is unusable """
+    if not isinstance(question, dict):
+        return None
+    text = question.get("question_text")
+    options = question.get("options")
+    if not isinstance(text, str) or not text.strip() or not isinstance(options, list):
+        return None
+
+    cleaned_options = []
+    for option in options:
+        if not isinstance(option, dict) or not str(option.get("text", "")).strip():
+            return None
+        cleaned_options.append({"key": str(option.get("key", "")).strip().upper(),
+                                "text": str(option["text"]).strip()})
+    if [o["key"] for o in cleaned_options] != list(OPTION_KEYS):
+        return None
+    if len({o["text"].lower() for o in cleaned_options}) != len(cleaned_options):
+        return None
+
+    answer = str(question.get("correct_answer", "")).strip()
+    if answer.upper() in OPTION_KEYS:
+        answer = answer.upper()
+    else:
+        # Some answers come back as the option text instead of its key
+        matches = [o["key"] for o in cleaned_options if o["text"].lower() == answer.lower()]
+        if not matches:
+            return None
+        answer = matches[0]
+
+    cleaned = dict(question)
+    cleaned.update({
+        "question_type": "multiple_choice",
+        "question_text": text.strip(),
+        "options": cleaned_options,
+        "correct_answer": answer,
+        "status": "original",
+    })
+    return cleaned
+
+
+class SessionTracker:
+    """ Remembers which questions each quiz session has already been shown """
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_sessions: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Tuple[float, Set[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, session_id: Optional[str]) -> Set[str]:
+        if not session_id:
+            return set()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                return set()
+            return set(entry[1])
+
+    def mark(self, session_id: Optional[str], fingerprints: Iterable[str]) -> None:
+        if not session_id:
+            return
+        now = time.time()
+        with self._lock:
+            _, seen = self._sessions.pop(session_id, (now, set()))
+            seen.update(fingerprints)
+            self._sessions[session_id] = (now, seen)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+
+class QuestionBank:
+    """ Inventory of validated questions per (subject, topic, difficulty) cell """
+
+    def __init__(self, path: str = DEFAULT_BANK_PATH, target_per_cell: int = 30,
+                 low_watermark: int = 15, max_serves: int = 20, prewarm: bool = False,
+                 subject_topics: Optional[Dict[str, List[str]]] = None, active_ttl_seconds: float = 24 * 3600):
+        self.path = path
+        self.target_per_cell = target_per_cell
+        self.low_watermark = low_watermark
+        self.max_serves = max_serves
+        self.prewarm = prewarm
+        # A cell stays on the refill list for this long after it was last requested
+        self.active_ttl_seconds = active_ttl_seconds
+        self.subject_topics = subject_topics if subject_topics is not None else load_subject_topics()
+        self.sessions = SessionTracker()
+        self.served_from_bank = 0
+        self.bank_misses = 0
+        # Catalog cells requested recently, with the time of their last request
+        self._active_cells: Dict[Cell, float] = {}
+        self._refill_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refill_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                subject TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                fingerprint TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                serve_count INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS questions_cell ON questions (subject, difficulty, topic)")
+        self._conn.commit()
+
+    def cells(self) -> List[Cell]:
+        return [(subject, topic, difficulty)
+                for subject, topics in self.subject_topics.items()
+                for topic in [MIXED_TOPIC, *topics]
+                for difficulty in DIFFICULTIES]
+
+    def cell_for(self, subject: str, topic: str, difficulty: str) -> Cell:
+        subject = canonical_subject(subject)
+        topic = canonical_topic(topic)
+        # Match the topic spelling used in the catalog so cells are shared
+        for known in self.subject_topics.get(subject, []):
+            if known.lower() == topic.lower():
+                topic = known
+                break
+        return subject, topic, canonical_difficulty(difficulty)
+
+    def is_known(self, cell: Cell) -> bool:
+        """ Whether cell is in the catalog; only those are generated in the background """
+        subject, topic, difficulty = cell
+        return difficulty in DIFFICULTIES and (topic == MIXED_TOPIC or topic in self.subject_topics.get(subject, []))
+
+    def add_questions(self, cell: Cell, questions: Iterable[dict]) -> int:
+        """ Validate and store questions in a cell, skipping duplicates. Returns the number added """
+        subject, topic, difficulty = cell
+        rows = []
+        for question in questions:
+            cleaned = validate_question(question)
+            if cleaned is None:
+                continue
+            cleaned.update({"subject": subject, "difficulty": difficulty})
+            if topic != MIXED_TOPIC:
+                cleaned["topic"] = topic
+            rows.append((subject, topic, difficulty, question_fingerprint(cleaned),
+                         json.dumps(cleaned), time.time()))
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO questions (subject, topic, difficulty, fingerprint, payload, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def inventory(self, cell: Cell) -> int:
+        subject, topic, difficulty = cell
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE subject = ? AND topic = ? AND difficulty = ?",
+                (subject, topic, difficulty)).fetchone()[0]
+
+    def question_texts(self, cell: Cell, limit: int = 30) -> List[str]:
+        """ Texts of the cell's newest questions (every topic for a mixed cell), for generation prompts to avoid """
+        subject, topic, difficulty = cell
+        query = "SELECT payload FROM questions WHERE subject = ? AND difficulty = ?"
+        params: tuple = (subject, difficulty)
+        if topic != MIXED_TOPIC:
+            query += " AND topic = ?"
+            params += (topic,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id DESC LIMIT ?", params + (limit,)).fetchall()
+        return [json.loads(payload).get("question_text", "") for payload, in rows]
+
+    def draw(self, subject: str, topic: str, difficulty: str, count: int = 15,
+             session_id: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Assemble a question set from the bank. Mixed ("NA") requests draw across every
+        topic of the subject. Returns None when the bank cannot fill the whole set.
+        """
+        cell = self.cell_for(subject, topic, difficulty)
+        self.mark_active(cell)
+        subject, topic, difficulty = cell
+        seen = self.sessions.seen(session_id)
+
+        query = "SELECT id, topic, fingerprint, payload FROM questions WHERE subject = ? AND difficulty = ?"
+        params: tuple = (subject, difficulty)
+        if topic != MIXED_TOPIC:
+            query += " AND topic = ?"
+            params += (topic,)
+
+        with self._lock:
+            rows = [row for row in self._conn.execute(query, params) if row[2] not in seen]
+            if len(rows) < count:
+                self.bank_misses += 1
+                return None
+
+            # Round-robin across topics so mixed sets stay evenly distributed
+            by_topic: Dict[str, list] = {}
+            for row in rows:
+                by_topic.setdefault(row[1], []).append(row)
+            for topic_rows in by_topic.values():
+                random.shuffle(topic_rows)
+            picked = []
+            topic_rows_list = list(by_topic.values())
+            random.shuffle(topic_rows_list)
+            while len(picked) < count:
+                for topic_rows in topic_rows_list:
+                    if topic_rows and len(picked) < count:
+                        picked.append(topic_rows.pop())
+
+            ids = [row[0] for row in picked]
+            placeholders = ",".join("?" * len(ids))
+            self._conn.execute(
+                f"UPDATE questions SET serve_count = serve_count + 1 WHERE id IN ({placeholders})", ids)
+            # Retire questions that have been shown often enough; the refill task replaces them
+            self._conn.execute(
+                "DELETE FROM questions WHERE serve_count >= ?", (self.max_serves,))
+            self._conn.commit()
+            self.served_from_bank += 1
+
+        questions = []
+        for number, row in enumerate(picked, start=1):
+            question = json.loads(row[3])
+            question["id"] = number
+            questions.append(question)
+        self.sessions.mark(session_id, (row[2] for row in picked))
+        self.request_refill()
+        return questions
+
+    def mark_active(self, cell: Cell) -> None:
+        # Subjects and topics come straight from the client; made-up ones are served
+        # live but never queued for refill, which keeps the active set within the catalog
+        if not self.is_known(cell):
+            return
+        is_new = cell not in self._active_cells
+        self._active_cells[cell] = time.time()
+        if is_new:
+            self.request_refill()
+
+    def active_cells(self) -> List[Cell]:
+        """ Cells requested within active_ttl_seconds; older ones are dropped """
+        cutoff = time.time() - self.active_ttl_seconds
+        for cell, last_requested in list(self._active_cells.items()):
+            if last_requested < cutoff:
+                self._active_cells.pop(cell, None)
+        return list(self._active_cells)
+
+    def request_refill(self) -> None:
+        # draw() runs in the threadpool, so wake the refill task through its loop
+        if self._refill_event is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._refill_event.set)
+
+    def cells_needing_refill(self) -> List[Cell]:
+        cells = self.cells() if self.prewarm else self.active_cells()
+        if not cells:
+            return []
+        with self._lock:
+            counts = {(row[0], row[1], row[2]): row[3] for row in self._conn.execute(
+                "SELECT subject, topic, difficulty, COUNT(*) FROM questions GROUP BY subject, topic, difficulty")}
+        low = [cell for cell in cells if counts.get(cell, 0) < self.low_watermark]
+        # Emptiest cells first
+        return sorted(low, key=lambda cell: counts.get(cell, 0))
+
+    async def refill_loop(self, generate: Callable[[str, str, str], Awaitable[List[dict]]],
+                          interval_seconds: float = 60.0, error_backoff_seconds: float = 30.0) -> None:
+        """ Top up drained cells until target_per_cell, generating one batch at a time """
+        self._loop = asyncio.get_running_loop()
+        self._refill_event = asyncio.Event()
+        self._refill_event.set()
+        while True:
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), timeout=interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_event.clear()
+
+            for cell in await asyncio.to_thread(self.cells_needing_refill):
+                while await asyncio.to_thread(self.inventory, cell) < self.target_per_cell:
+                    subject, topic, difficulty = cell
+                    try:
+                        questions = await generate(subject, difficulty, topic)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Question bank refill failed for {cell}: {e}")
+                        await asyncio.sleep(error_backoff_seconds)
+                        break
+                    added = await asyncio.to_thread(self.add_questions, cell, questions)
+                    logger.info(f"Question bank refilled {cell} with {added} questions")
+                    if added == 0:
+                        # The model keeps producing duplicates or invalid questions
+                        break
+
+    def start(self, generate: Callable[[str, str, str], Awaitable[List[dict]]]) -> None:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self.refill_loop(generate))
+
+    async def stop(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        return {
+            "questions": total,
+            "active_cells": len(self._active_cells),
+            "cells_needing_refill": len(self.cells_needing_refill()),
+            "target_per_cell": self.target_per_cell,
+            "low_watermark": self.low_watermark,
+            "sets_served_from_bank": self.served_from_bank,
+            "bank_misses": self.bank_misses,
+            "refill_running": self._refill_task is not None and not self._refill_task.done(),
+        }
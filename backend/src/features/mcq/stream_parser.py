@@ -0,0 +1,67 @@
+import json
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalQuestionParser:
+    """
+    Pulls complete question objects out of a streamed {"question": [{...}, ...]} JSON
+    document as soon as each object's closing brace arrives. Anything outside the
+    outermost object (such as ```json fences) is ignored.
+    """
+
+    # Depth of the question objects: 1 = top-level object, 2 = "question" array
+    QUESTION_DEPTH = 2
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._capturing = False
+        self.parsed = 0
+        self.skipped = 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        completed = []
+        for char in chunk:
+            if self._capturing:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._depth == self.QUESTION_DEPTH and not self._capturing:
+                    self._capturing = True
+                    self._buffer = ["{"]
+                self._depth += 1
+            elif char in "}]":
+                self._depth = max(self._depth - 1, 0)
+                if self._capturing and self._depth == self.QUESTION_DEPTH:
+                    self._capturing = False
+                    question = self._decode("".join(self._buffer))
+                    if question is not None:
+                        completed.append(question)
+        return completed
+
+    def _decode(self, text: str):
+        try:
+            question = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed streamed question: {e}")
+            self.skipped += 1
+            return None
+        self.parsed += 1
+        return question
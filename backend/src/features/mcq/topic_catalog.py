@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from src.features.mcq.question_bank import canonical_subject
+
+logger = logging.getLogger(__name__)
+
+
+class TopicCatalog:
+    """ In-memory copy of topics_and_subtopics.json, reloaded when the file's mtime changes """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.reloads = 0
+        self._mtime: Optional[float] = None
+        self._topics: Dict[str, List[str]] = {}
+        self._by_subject: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.path}")
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r") as file:
+                topics = json.load(file)
+            self._topics = topics
+            self._by_subject = {canonical_subject(subject): list(subject_topics)
+                                for subject, subject_topics in topics.items()}
+            self._mtime = mtime
+            self.reloads += 1
+            logger.info(f"Loaded MCQ topic catalog ({len(topics)} subjects) from {self.path}")
+
+    def all(self) -> Dict[str, List[str]]:
+        """ The whole catalog as stored in the file """
+        self._refresh()
+        return self._topics
+
+    def topics_for(self, subject: Optional[str]) -> List[str]:
+        """ Topics of one subject, accepting aliases such as "CN" or "OOPS" """
+        self._refresh()
+        return self._by_subject.get(canonical_subject(subject), [])
@@ -1,19 +1,35 @@
 import os
 import logging
 import yaml
-import fitz  # PyMuPDF
 import pandas as pd
 import re
 import json
+import hashlib
 import nltk
 import google.generativeai as genai
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from src.features.shared.llm_metrics import TokenBudgetExceeded
+from src.features.shared.llm_provider import get_provider, user_message
+from src.features.shared.jobs import job_queue, job_links, Job, JobRetry
+from src.features.shared.uploads import ingest, InvalidUpload, UploadTooLarge
+from src.features.shared.pdf_extract import PDFExtractionError
+from src.features.shared.resume_store import resume_store, ResumeRecord
+from src.features.shared.keyword_scorer import KeywordScorer
+from src.features.shared.match_matrix import MatchMatrix, ranked
+from src.features.shared.skill_ontology import skill_ontology, normalize_skill
+from src.features.shared.ttl_cache import TTLCache
+from src.features.resume_analyzer.company_store import CompanyStore, SnapshotCache
+from src.features.resume_analyzer.company_search import CompanySearchIndex
+from src.features.resume_analyzer.eligibility import EligibilityIndex
+from src.features.resume_analyzer.skill_extractor import SkillExtractor
+
 # Load environment variables
 load_dotenv()
 
@@ -53,6 +69,9 @@ def configure_gemini_api() -> None:
 # # Initialize Gemini API
 # configure_gemini_api()
 
+# LLM provider: Gemini, or record/replay when LLM_BACKEND says so
+llm = get_provider("resume", "gemini", api_key=os.getenv("GEMINI_API_KEY"))
+
 # FastAPI App Setup
 app = FastAPI(title="Resume Analyzer",
               description="API for analyzing resumes and checking company eligibility")
@@ -80,13 +99,48 @@ class EligibilityRequest(BaseModel):
     branch: str
     skills: List[str]
 
-# Load company data
+class EligibleCompaniesRequest(BaseModel):
+    cgpa: float
+    hsc: float
+    ssc: float
+    branch: str
+    skills: List[str] = []
+    limit: int = 20
+
+class MatchRequest(BaseModel):
+    # Students: stored resumes and/or raw texts keyed by a label of the caller's choice
+    resume_ids: List[str] = []
+    texts: Dict[str, str] = {}
+    # Job descriptions keyed by label; company_data.csv profiles when empty
+    job_descriptions: Dict[str, str] = {}
+    top_k: int = 5
+
+
+# Resume x job description similarity, tokenized the same way as the ATS keyword scorer
+match_terms = KeywordScorer()
+match_matrix = MatchMatrix(terms=lambda text: match_terms.terms(text)[0])
+
+# Load company data once; the store re-reads the CSV only when its mtime changes
 COMPANY_DATA_FILE = os.path.join(
     "src", "features", "resume_analyzer", "company_data.csv")
-
-UPLOAD_FOLDER = os.path.join(
-    "src", "features", "resume_analyzer", "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+company_store = CompanyStore(COMPANY_DATA_FILE)
+# Threshold arrays and skill/branch bitsets over every company, rebuilt per CSV version
+eligibility_indexes = SnapshotCache(
+    lambda snapshot: EligibilityIndex(snapshot.companies, version=snapshot.version))
+# Name and profile search; a CSV change is applied to the existing index as a diff
+company_search = SnapshotCache(
+    lambda snapshot: CompanySearchIndex(snapshot.companies, version=snapshot.version),
+    update=lambda index, snapshot: index.update(snapshot.companies, snapshot.version))
+# Local resume parser; its skill dictionary includes every "Skills Required" entry
+skill_extractors = SnapshotCache(
+    lambda snapshot: SkillExtractor(snapshot.companies, version=snapshot.version))
+
+# Below this confidence the local parse is unusual enough to ask the LLM
+RESUME_LOCAL_MIN_CONFIDENCE = float(os.getenv("RESUME_LOCAL_MIN_CONFIDENCE", 0.6))
+# Parsed resumes keyed by text hash
+parse_cache = TTLCache(
+    max_entries=int(os.getenv("RESUME_PARSE_CACHE_MAX_ENTRIES", 1000)),
+    ttl_seconds=float(os.getenv("RESUME_PARSE_CACHE_TTL_SECONDS", 24 * 3600)))
 
 CONFIG = os.path.join(
     "src", "features", "resume_analyzer", "config.yaml")
@@ -104,37 +158,13 @@ def load_config(config_path: str = CONFIG) -> dict:
         return {"MODEL": "gemini-1.5-pro"}
 
 
+# Read once at import; restart the service to pick up config.yaml changes
+config = load_config()
 
 
-def load_company_data(csv_path: str = COMPANY_DATA_FILE) -> pd.DataFrame:
-    current_directory = os.getcwd()
-    print("Current Working Directory:", current_directory)
-    try:
-        return pd.read_csv(csv_path)
-    except FileNotFoundError:
-        logger.error(f"Company data file not found: {csv_path}")
-        # Create an empty DataFrame with expected columns
-        return pd.DataFrame(columns=["Company Name", "Skills Required", "CGPA", "HSC", "SSC", "Branch"])
-    except Exception as e:
-        logger.error(f"Error loading company data: {e}")
-        return pd.DataFrame(columns=["Company Name", "Skills Required", "CGPA", "HSC", "SSC", "Branch"])
-
-
-def extract_pdf_text(file_path: str) -> str:
-    try:
-        doc = fitz.open(file_path)
-        text = " ".join(page.get_text() for page in doc)
-        doc.close()
-        return text
-    except Exception as e:
-        logger.error(f"PDF extraction error: {e}")
-        return ""
-
-
-def parse_resume(text: str, config: dict) -> dict:
+async def parse_resume_with_llm(text: str, config: dict) -> dict:
     try:
         model_name = config.get('MODEL', 'gemini-1.5-pro')
-        model = genai.GenerativeModel(model_name)
         prompt = """
         Analyze this resume text and extract:
         1. Skills: Technical, soft skills, domain knowledge
@@ -144,7 +174,8 @@ def parse_resume(text: str, config: dict) -> dict:
         Return as JSON with keys: skills, experience_domains, academic_details
         """
 
-        response = model.generate_content([prompt, text])
+        response = await llm.complete(
+            user_message(f"{prompt}\n\n{text}"), model=model_name, endpoint="/analyze")
 
         if response.text:
             try:
@@ -156,20 +187,48 @@ def parse_resume(text: str, config: dict) -> dict:
                 logger.error(f"JSON decode error: {response.text}")
                 return {"skills": [], "experience_domains": [], "academic_details": {}}
         return {"skills": [], "experience_domains": [], "academic_details": {}}
+    except TokenBudgetExceeded:
+        raise
     except Exception as e:
         logger.error(f"Resume parsing error: {e}")
         return {"skills": [], "experience_domains": [], "academic_details": {}}
 
-# Check missing skills against required ones
 
+def merge_skills(primary: List[str], extra: List[str], extractor: SkillExtractor) -> List[str]:
+    """ primary, then the skills from extra it does not already name (synonyms included) """
+    def key(skill):
+        skill_id = extractor.ontology.lookup(skill)
+        return skill_id if skill_id is not None else normalize_skill(skill)
+    seen = {key(skill) for skill in primary}
+    return list(primary) + [skill for skill in extra if key(skill) not in seen]
+
+
+async def parse_resume(text: str, config: dict) -> Tuple[dict, str]:
+    """
+    Skills, experience domains and academics, and which parser produced them. The local
+    extractor answers in milliseconds; the LLM is asked only when it recognised too little
+    """
+    extractor = await skill_extractors.get_async(company_store.snapshot())
+    key = f"{extractor.version}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+    cached = parse_cache.get(key)
+    if cached is not None:
+        return cached
+
+    profile = extractor.extract(text)
+    if profile.confidence >= RESUME_LOCAL_MIN_CONFIDENCE:
+        result = (profile.to_dict(), "local")
+    else:
+        logger.info(f"Local resume parse confidence {profile.confidence}, asking the LLM")
+        parsed = await parse_resume_with_llm(text, config)
+        if not parsed.get("skills"):
+            # The LLM failed or found nothing; the local parse is still better than nothing
+            return profile.to_dict(), "local"
+        if isinstance(parsed["skills"], list):
+            parsed["skills"] = merge_skills(parsed["skills"], profile.skills, extractor)
+        result = (parsed, "llm")
+    parse_cache.set(key, result)
+    return result
 
-def check_skills_match(candidate_skills: List[str], required_skills: str) -> List[str]:
-    if not required_skills or pd.isna(required_skills):
-        return []
-    required_skills_list = [skill.strip().lower()
-                            for skill in required_skills.split(',')]
-    candidate_skills_lower = [skill.lower() for skill in candidate_skills]
-    return [skill for skill in required_skills_list if skill not in candidate_skills_lower]
 
 # Check eligibility based on academic criteria
 
@@ -211,9 +270,66 @@ def check_eligibility(company_row, cgpa, hsc, ssc, branch):
     return eligible, reasons
 
 
+async def analyze_record(record: ResumeRecord, company: Optional[str], cgpa: Optional[float],
+                         hsc: Optional[float], ssc: Optional[float], branch: Optional[str]) -> dict:
+    """ The /analyze response for a stored resume, with the eligibility check when a company is given """
+    cv_text = record.text
+    if not cv_text:
+        raise PDFExtractionError("Failed to extract text from resume")
+
+    # Parse resume
+    extracted_data, parsed_by = await parse_resume(cv_text, config)
+    response_data = {
+        "success": True,
+        "resume_id": record.resume_id,
+        "skills": extracted_data.get("skills", []),
+        "experience_domains": extracted_data.get("experience_domains", []),
+        "academic_details": extracted_data.get("academic_details", {}),
+        "parsed_by": parsed_by
+    }
+
+    # If company is provided, check eligibility
+    if company and cgpa is not None and hsc is not None and ssc is not None and branch:
+        # O(1) lookup in the in-memory company index
+        company_entry = company_store.get(company)
+        if company_entry is not None:
+            company_data = company_entry.row
+
+            # Check missing skills; synonyms ("JS" / "JavaScript") share one ontology ID
+            missing_skills = skill_ontology.missing(
+                extracted_data.get("skills", []), company_entry.skills)
+
+            # Check eligibility based on academic criteria
+            eligible, reasons = check_eligibility(
+                company_data, cgpa, hsc, ssc, branch)
+
+            # Add eligibility info to response
+            response_data.update({
+                "eligibility": "Eligible" if eligible else "Not Eligible",
+                "missing_skills": missing_skills,
+                "reasons": reasons if not eligible else []
+            })
+
+    return response_data
+
+
+@app.post("/upload")
+async def upload_resume(resume: UploadFile = File(...)):
+    """ Parse a resume once; /analyze (and the ATS /score) then take the returned resume_id """
+    try:
+        record = await resume_store.register_upload(
+            resume, max_mb=config.get("FILE_SIZE_LIMIT_MB"))
+        return JSONResponse(content={"success": True, **record.summary(resume_store.ttl_seconds)})
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"success": False, "error": str(e)})
+    except (InvalidUpload, PDFExtractionError) as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+
+
 @app.post("/analyze")
 async def analyze_resume(
-    resume: UploadFile = File(...),
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
     company: Optional[str] = Form(None),
     cgpa: Optional[float] = Form(None),
     hsc: Optional[float] = Form(None),
@@ -221,140 +337,234 @@ async def analyze_resume(
     branch: Optional[str] = Form(None)
 ):
     try:
-        # Save uploaded file
-        file_path = os.path.join(UPLOAD_FOLDER, resume.filename)
-        with open(file_path, "wb") as f:
-            f.write(await resume.read())
-
-        # Extract text from PDF
-        cv_text = extract_pdf_text(file_path)
-        if not cv_text:
-            os.unlink(file_path)
+        if resume_id:
+            record = resume_store.get(resume_id)
+            if record is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={"success": False,
+                             "error": "Unknown or expired resume_id, please upload the resume again"}
+                )
+        elif resume is not None:
+            # Read the upload into memory under the configured size limit and parse it there
+            record = await resume_store.register_upload(
+                resume, max_mb=config.get("FILE_SIZE_LIMIT_MB"))
+        else:
             return JSONResponse(
                 status_code=400,
-                content={"success": False,
-                         "error": "Failed to extract text from resume"}
+                content={"success": False, "error": "Upload a resume or pass a resume_id"}
             )
 
-        # Load configuration
-        config = load_config()
-
-        # Parse resume
-        extracted_data = parse_resume(cv_text, config)
-        response_data = {
-            "success": True,
-            "skills": extracted_data.get("skills", []),
-            "experience_domains": extracted_data.get("experience_domains", []),
-            "academic_details": extracted_data.get("academic_details", {})
-        }
-
-        # If company is provided, check eligibility
-        if company and cgpa is not None and hsc is not None and ssc is not None and branch:
-            # Load company data
-            df = load_company_data()
-
-            # Check if company exists
-            company_row = df[df["Company Name"] == company]
-            if not company_row.empty:
-                company_data = company_row.iloc[0].to_dict()
-
-                # Check missing skills
-                required_skills = company_data.get("Skills Required", "")
-                missing_skills = check_skills_match(
-                    extracted_data.get("skills", []), required_skills)
-
-                # Check eligibility based on academic criteria
-                eligible, reasons = check_eligibility(
-                    company_data, cgpa, hsc, ssc, branch)
-
-                # Add eligibility info to response
-                response_data.update({
-                    "eligibility": "Eligible" if eligible else "Not Eligible",
-                    "missing_skills": missing_skills,
-                    "reasons": reasons if not eligible else []
-                })
-
-        # Clean up file
-        os.unlink(file_path)
-
-        return JSONResponse(content=response_data)
+        return JSONResponse(content=await analyze_record(record, company, cgpa, hsc, ssc, branch))
 
+    except UploadTooLarge as e:
+        return JSONResponse(
+            status_code=413,
+            content={"success": False, "error": str(e)}
+        )
+    except (InvalidUpload, PDFExtractionError) as e:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": str(e)}
+        )
+    except TokenBudgetExceeded as e:
+        logger.warning(f"Resume processing shed: {e}")
+        return JSONResponse(
+            status_code=429,
+            content={"success": False, "error": str(e)},
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
     except Exception as e:
         logger.error(f"Resume processing error: {e}")
-        # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.unlink(file_path)
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
 
 
-@app.get("/companies")
-async def get_companies():
+# Queued analysis: POST /analyze/jobs answers with a job id at once; the shared job
+# queue runs the analysis and clients poll /jobs/{id} or follow /jobs/{id}/events
+RESUME_JOB_CONCURRENCY = int(os.getenv("RESUME_JOB_CONCURRENCY", 2))
+
+
+async def analyze_job(payload: dict, data: Optional[bytes]) -> dict:
+    if data is not None:
+        record = await resume_store.register_bytes(data, payload["filename"])
+    else:
+        # A resume_id submission carries its text, so it still runs after a restart
+        record = (resume_store.get(payload.get("resume_id"))
+                  or resume_store.add(payload["sha256"], payload["filename"], payload["text"]))
     try:
-        # Load company data
-        df = load_company_data()
+        return await analyze_record(record, payload["company"], payload["cgpa"], payload["hsc"],
+                                    payload["ssc"], payload["branch"])
+    except TokenBudgetExceeded as e:
+        raise JobRetry(str(e), e.retry_after)
 
-        # Return list of company names
-        companies = df["Company Name"].tolist()
-        print("Comanies data: ", companies)
-        return JSONResponse(content={"success": True, "companies": companies})
 
-    except Exception as e:
-        logger.error(f"Get companies error: {e}")
-        return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
+job_queue.register("resume.analyze", "resume", analyze_job, concurrency=RESUME_JOB_CONCURRENCY)
 
 
-@app.get("/company/{company_name}")
-async def get_company_requirements(company_name: str):
-    try:
-        # Load company data
-        df = load_company_data()
+@app.on_event("startup")
+async def start_jobs():
+    # Picks up jobs queued before a restart
+    job_queue.start()
+
 
-        # Check if company exists
-        company_row = df[df["Company Name"] == company_name]
-        if company_row.empty:
+@app.post("/analyze/jobs")
+async def submit_analyze_job(
+    request: Request,
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    company: Optional[str] = Form(None),
+    cgpa: Optional[float] = Form(None),
+    hsc: Optional[float] = Form(None),
+    ssc: Optional[float] = Form(None),
+    branch: Optional[str] = Form(None)
+):
+    payload = {"company": company, "cgpa": cgpa, "hsc": hsc, "ssc": ssc, "branch": branch}
+    try:
+        if resume_id:
+            record = resume_store.get(resume_id)
+            if record is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={"success": False,
+                             "error": "Unknown or expired resume_id, please upload the resume again"}
+                )
+            payload.update(resume_id=record.resume_id, sha256=record.sha256, filename=record.filename,
+                           text=record.text)
+            job = await job_queue.submit("resume.analyze", payload)
+        elif resume is not None:
+            # The upload keeps its memory reservation until the job row holding it is written
+            async with ingest(resume, max_mb=config.get("FILE_SIZE_LIMIT_MB")) as ingested:
+                payload["filename"] = ingested.filename
+                job = await job_queue.submit("resume.analyze", payload, ingested.data)
+        else:
             return JSONResponse(
-                status_code=404,
-                content={"success": False, "error": "Company not found"}
+                status_code=400,
+                content={"success": False, "error": "Upload a resume or pass a resume_id"}
             )
+    except UploadTooLarge as e:
+        return JSONResponse(status_code=413, content={"success": False, "error": str(e)})
+    except InvalidUpload as e:
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+
+    return JSONResponse(status_code=202,
+                        content={"success": True, **job_links(job, request.scope.get("root_path", ""))})
+
+
+def find_job(job_id: str) -> Optional[Job]:
+    job = job_queue.get(job_id)
+    return job if job is not None and job.feature == "resume" else None
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = find_job(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"success": False, "error": "Unknown job_id"})
+    return JSONResponse(content={"success": True, **job.to_dict()})
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    if find_job(job_id) is None:
+        return JSONResponse(status_code=404, content={"success": False, "error": "Unknown job_id"})
+    return StreamingResponse(job_queue.sse(job_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/match")
+async def match_students(request: MatchRequest):
+    """
+    Rank every student against every job description in one sparse TF-IDF similarity
+    matrix: the top-k companies per student and the top-k students per company
+    """
+    students: Dict[str, str] = {}
+    unknown = []
+    for resume_id in request.resume_ids:
+        record = resume_store.get(resume_id)
+        if record is None:
+            unknown.append(resume_id)
+        else:
+            students[resume_id] = record.text
+    students.update(request.texts)
+    if not students:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "No students to match", "unknown_resume_ids": unknown}
+        )
 
-        company_data = company_row.iloc[0].to_dict()
+    companies = dict(request.job_descriptions)
+    if not companies:
+        companies = {c.name: f"{c.profile} {c.skills_required}" for c in company_store.all()}
+    if not companies:
+        return JSONResponse(status_code=400, content={"success": False, "error": "No job descriptions to match"})
+
+    top_k = max(1, min(request.top_k, 50))
+    student_labels, company_labels = list(students), list(companies)
+    result = await run_in_threadpool(
+        match_matrix.match, list(students.values()), list(companies.values()), top_k)
+
+    return JSONResponse(content={
+        "success": True,
+        "students": dict(zip(student_labels, ranked(
+            company_labels, result.student_top, result.student_scores, "company"))),
+        "companies": dict(zip(company_labels, ranked(
+            student_labels, result.company_top, result.company_scores, "student"))),
+        "unknown_resume_ids": unknown,
+        "vocabulary_size": result.vocabulary_size,
+        "elapsed_ms": result.elapsed_ms,
+    })
+
+
+@app.post("/eligible")
+async def eligible_companies(request: EligibleCompaniesRequest):
+    """ Every company the student clears the academic and branch criteria for, best skill match first """
+    index = await eligibility_indexes.get_async(company_store.snapshot())
+    results = index.evaluate(request.cgpa, request.hsc, request.ssc, request.branch, request.skills,
+                             limit=max(1, min(request.limit, 500)))
+    return JSONResponse(content={
+        "success": True,
+        "eligible_companies": [result.to_dict() for result in results],
+        "companies_checked": len(index.companies),
+    })
 
-        # Extract required skills as a list
-        skills_required = []
-        if "Skills Required" in company_data and pd.notna(company_data["Skills Required"]):
-            skills_required = [
-                skill.strip() for skill in company_data["Skills Required"].split(',')]
 
-        # Extract eligible branches as a list
-        eligible_branches = []
-        if "Branch" in company_data and pd.notna(company_data["Branch"]):
-            eligible_branches = [branch.strip() for branch in str(
-                company_data["Branch"]).split(',')]
+@app.get("/companies")
+async def get_companies():
+    # Serialized once per version of the CSV
+    return Response(content=company_store.snapshot().companies_json, media_type="application/json")
+
 
-        # Prepare response
-        requirements = {
-            "company_name": company_name,
-            "skills_required": skills_required,
-            "cgpa": company_data.get("CGPA", 0) if pd.notna(company_data.get("CGPA", 0)) else 0,
-            "hsc": company_data.get("HSC", 0) if pd.notna(company_data.get("HSC", 0)) else 0,
-            "ssc": company_data.get("SSC", 0) if pd.notna(company_data.get("SSC", 0)) else 0,
-            "eligible_branches": eligible_branches
-        }
+@app.get("/companies/search")
+async def search_companies(q: str = "", limit: int = 10):
+    """ Autocomplete on company names and profiles, with fuzzy name matches for typos """
+    if not q.strip():
+        return JSONResponse(status_code=400, content={"success": False, "error": "Query parameter q is required"})
+    if len(q) > CompanySearchIndex.MAX_QUERY_LENGTH:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False,
+                     "error": f"Query parameter q is limited to {CompanySearchIndex.MAX_QUERY_LENGTH} characters"}
+        )
+    index = await company_search.get_async(company_store.snapshot())
+    return JSONResponse(content={
+        "success": True,
+        "query": q,
+        "results": [result.to_dict() for result in index.search(q, limit)],
+    })
 
-        return JSONResponse(content={"success": True, "requirements": requirements})
 
-    except Exception as e:
-        logger.error(f"Get company requirements error: {e}")
+@app.get("/company/{company_name}")
+async def get_company_requirements(company_name: str):
+    company = company_store.get(company_name)
+    if company is None:
         return JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
+            status_code=404,
+            content={"success": False, "error": "Company not found"}
         )
+    return JSONResponse(content={"success": True, "requirements": company.requirements()})
 
 
 @app.get("/")
@@ -0,0 +1,347 @@
+import bisect
+import heapq
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.features.resume_analyzer.company_store import Company
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# (kind, length of the name, name, profile, doc id): full name matches first, then a later
+# word of the name, the full profile and a later word of the profile; shorter names first
+Rank = Tuple[int, int, str, str, int]
+
+
+def search_key(text: Optional[str]) -> str:
+    """ "Cell.do  (India)" -> "cell do india" """
+    return _NON_WORD.sub(" ", str(text or "").casefold()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """ Character trigrams of a padded search key: "ibm" -> {" ib", "ibm", "bm "} """
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SearchResult:
+    company_name: str
+    profile: str
+    match: str
+    score: float
+
+    def to_dict(self) -> dict:
+        return {"company_name": self.company_name, "profile": self.profile, "match": self.match,
+                "score": round(self.score, 3)}
+
+
+class CompanySearchIndex:
+    """
+    Autocomplete and typo-tolerant search over (company name, profile) entries.
+
+    Prefix search runs on a sorted array of search keys (each entry's full name, full
+    profile and their later words), which is the leaf order of a trie: a prefix selects
+    a contiguous range by bisection. Trie nodes covering more than HEAVY_NODE entries
+    keep their TOP_K best entries, so short prefixes such as "s" are answered without
+    scanning their range. Fuzzy search counts shared name trigrams per entry with one
+    bincount over the query trigrams' posting lists.
+
+    update() applies a new CSV version as a diff: new entries are inserted, removed ones
+    are tombstoned, and only the trie nodes on their keys' paths are touched.
+    """
+
+    TOP_K = 20
+    # Ranges at most this long are ranked on the fly instead of keeping a node list
+    HEAVY_NODE = 64
+    # Fuzzy matches need at least this trigram similarity (Jaccard) to the name
+    FUZZY_MIN_SIMILARITY = 0.3
+    # A trigram in at least 1 / DENSE_TRIGRAM_RATIO of the names gets a dense 0/1 row
+    DENSE_TRIGRAM_RATIO = 16
+    # Longer queries are cut to this many characters; it also keeps the int16 trigram counts safe
+    MAX_QUERY_LENGTH = 100
+
+    def __init__(self, companies: Iterable[Company] = (), version: int = 0):
+        self.version = version
+        self.docs: List[Optional[Tuple[str, str]]] = []
+        self._doc_ids: Dict[Tuple[str, str], int] = {}
+        self._doc_keys: List[List[Tuple[str, Rank]]] = []
+        # Sorted (key, rank) pairs and top entries of the heavy trie nodes by prefix
+        self._entries: List[Tuple[str, Rank]] = []
+        self._nodes: Dict[str, List[Rank]] = {}
+        # Name trigrams: ID per trigram, posting lists, and the trigram count per entry
+        self._gram_ids: Dict[str, int] = {}
+        self._postings: List[List[int]] = []
+        self._posting_arrays: Dict[int, np.ndarray] = {}
+        self._gram_counts: List[int] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, Dict[int, int], np.ndarray]] = None
+        self.updates = 0
+
+        for company in companies:
+            doc = self._add_doc(company.name, company.profile)
+            if doc is not None:
+                self._entries.extend(self._doc_keys[doc])
+        self._entries.sort()
+        self._build_nodes(0, len(self._entries), 0, "")
+        self._fuzzy_arrays()
+
+    @staticmethod
+    def _entry_pairs(companies: Iterable[Company]) -> Set[Tuple[str, str]]:
+        return {(company.name.strip(), company.profile.strip()) for company in companies if company.name.strip()}
+
+    def _add_doc(self, name: str, profile: str) -> Optional[int]:
+        name, profile = name.strip(), profile.strip()
+        if not name or (name, profile) in self._doc_ids:
+            return None
+        doc = len(self.docs)
+        self.docs.append((name, profile))
+        self._doc_ids[(name, profile)] = doc
+
+        name_key, profile_key = search_key(name), search_key(profile)
+        keys: Dict[str, Rank] = {}
+        for kind, key in ((0, name_key), *((1, word) for word in name_key.split()[1:]),
+                          (2, profile_key), *((3, word) for word in profile_key.split()[1:])):
+            rank = (kind, len(name), name.casefold(), profile.casefold(), doc)
+            if key and (key not in keys or rank < keys[key]):
+                keys[key] = rank
+        self._doc_keys.append(sorted(keys.items()))
+
+        grams = trigrams(name_key)
+        for gram in grams:
+            gram_id = self._gram_ids.setdefault(gram, len(self._postings))
+            if gram_id == len(self._postings):
+                self._postings.append([])
+            self._postings[gram_id].append(doc)
+        self._gram_counts.append(len(grams))
+        self._arrays = None
+        return doc
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return (bisect.bisect_left(self._entries, (prefix,)),
+                bisect.bisect_left(self._entries, (prefix + "\U0010ffff",)))
+
+    def _best(self, ranks: Iterable[Rank]) -> List[Rank]:
+        """ The TOP_K best ranks, one per entry """
+        best: List[Rank] = []
+        seen: Set[int] = set()
+        for rank in ranks:
+            if rank[-1] not in seen:
+                seen.add(rank[-1])
+                best.append(rank)
+                if len(best) == self.TOP_K:
+                    break
+        return best
+
+    def _build_nodes(self, lo: int, hi: int, depth: int, prefix: str) -> List[Rank]:
+        """ Top entries under prefix; stores them for every heavy node of the subtree """
+        if hi - lo <= self.HEAVY_NODE:
+            return self._best(sorted(rank for _, rank in self._entries[lo:hi]))
+        # Keys ending exactly at this node sort first, then one child range per next character
+        start = bisect.bisect_left(self._entries, (prefix + "\0",), lo, hi)
+        children = [sorted(rank for _, rank in self._entries[lo:start])]
+        while start < hi:
+            child = prefix + self._entries[start][0][depth]
+            stop = bisect.bisect_left(self._entries, (child + "\U0010ffff",), start, hi)
+            children.append(self._build_nodes(start, stop, depth + 1, child))
+            start = stop
+        top = self._best(heapq.merge(*children))
+        if prefix:
+            self._nodes[prefix] = top
+        return top
+
+    def _prefix_top(self, prefix: str) -> List[Rank]:
+        top = self._nodes.get(prefix)
+        if top is not None:
+            return top
+        lo, hi = self._range(prefix)
+        if hi - lo <= self.HEAVY_NODE:
+            return self._best(sorted(rank for _, rank in self._entries[lo:hi]))
+        # A node that grew heavy since the last build, or whose list an update dropped
+        top = self._best(heapq.nsmallest(self.TOP_K * 4, (rank for _, rank in self._entries[lo:hi])))
+        if len(top) < self.TOP_K:
+            top = self._best(sorted(rank for _, rank in self._entries[lo:hi]))
+        self._nodes[prefix] = top
+        return top
+
+    def update(self, companies: Sequence[Company], version: int) -> "CompanySearchIndex":
+        """ Bring the index to a new CSV version by inserting and tombstoning only the changed entries """
+        current = self._entry_pairs(companies)
+        removed = [pair for pair in self._doc_ids if pair not in current]
+        added = [pair for pair in sorted(current) if pair not in self._doc_ids]
+        live = len(self._doc_ids)
+        # Past this point (or with too many tombstones) a fresh build is cheaper
+        if len(removed) + len(added) > max(live, self.HEAVY_NODE) // 2 or len(self.docs) > 2 * (live + len(added)):
+            return CompanySearchIndex(companies, version=version)
+
+        for pair in removed:
+            doc = self._doc_ids.pop(pair)
+            self.docs[doc] = None
+            self._arrays = None
+            for key, rank in self._doc_keys[doc]:
+                del self._entries[bisect.bisect_left(self._entries, (key, rank))]
+                # Nodes that listed the entry are recomputed from their range when next queried
+                for end in range(1, len(key) + 1):
+                    top = self._nodes.get(key[:end])
+                    if top is not None and rank in top:
+                        del self._nodes[key[:end]]
+        for name, profile in added:
+            doc = self._add_doc(name, profile)
+            for key, rank in self._doc_keys[doc]:
+                bisect.insort(self._entries, (key, rank))
+                for end in range(1, len(key) + 1):
+                    top = self._nodes.get(key[:end])
+                    if top is None or (len(top) == self.TOP_K and rank > top[-1]):
+                        continue
+                    listed = [r for r in top if r[-1] == doc]
+                    if not listed or rank < listed[0]:
+                        top = [r for r in top if r[-1] != doc]
+                        bisect.insort(top, rank)
+                        self._nodes[key[:end]] = top[:self.TOP_K]
+        self._fuzzy_arrays()
+        self.version = version
+        self.updates += 1
+        return self
+
+    def prefix(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """ Entries whose name, profile or one of their words starts with query, best first """
+        key = search_key(query)
+        if not key:
+            return []
+        return [SearchResult(*self.docs[rank[-1]], match="prefix", score=1.0)
+                for rank in self._prefix_top(key)[:limit]]
+
+    def _fuzzy_arrays(self) -> Tuple[np.ndarray, np.ndarray, Dict[int, int], np.ndarray]:
+        """ Trigram posting arrays, per-entry trigram counts and liveness, and dense 0/1 rows for common trigrams """
+        if self._arrays is None:
+            count = len(self.docs)
+            common = [gram_id for gram_id, docs in enumerate(self._postings)
+                      if len(docs) * self.DENSE_TRIGRAM_RATIO >= count]
+            dense = np.zeros((len(common), count), dtype=np.int8)
+            for row, gram_id in enumerate(common):
+                dense[row, self._postings[gram_id]] = 1
+            self._posting_arrays = {gram_id: np.asarray(docs, dtype=np.int32)
+                                    for gram_id, docs in enumerate(self._postings)}
+            self._arrays = (np.asarray(self._gram_counts, dtype=np.float32),
+                            np.asarray([doc is not None for doc in self.docs], dtype=bool),
+                            {gram_id: row for row, gram_id in enumerate(common)}, dense)
+        return self._arrays
+
+    def fuzzy(self, query: str, limit: int = 10, exclude: Iterable[int] = ()) -> List[SearchResult]:
+        """ Entries whose company name shares the most trigrams with query """
+        query_grams = trigrams(search_key(query[:self.MAX_QUERY_LENGTH]))
+        grams = [self._gram_ids[gram] for gram in query_grams if gram in self._gram_ids]
+        if not grams or not self._doc_ids:
+            return []
+        gram_counts, alive, dense_rows, dense = self._fuzzy_arrays()
+        postings, rows = [], []
+        for gram_id in grams:
+            if gram_id in dense_rows:
+                rows.append(dense_rows[gram_id])
+                continue
+            postings.append(self._posting_arrays[gram_id])
+
+        if postings:
+            shared = np.bincount(np.concatenate(postings), minlength=len(self.docs)).astype(np.int16)
+        else:
+            shared = np.zeros(len(self.docs), dtype=np.int16)
+        if rows:
+            shared += dense[rows].sum(axis=0, dtype=np.int16)
+        # similarity >= t needs shared >= t * (query + name) / (1 + t), and names have at least 3 trigrams
+        threshold = self.FUZZY_MIN_SIMILARITY
+        candidates = np.flatnonzero(shared >= max(1, int(np.ceil(threshold * (len(query_grams) + 3) / (1 + threshold)))))
+        common = shared[candidates]
+        similarity = common / (len(query_grams) + gram_counts[candidates] - common)
+        keep = (similarity >= threshold) & alive[candidates]
+        excluded = np.fromiter(exclude, dtype=np.int64)
+        if excluded.size:
+            keep &= ~np.isin(candidates, excluded)
+        candidates, similarity = candidates[keep], similarity[keep]
+        if candidates.size > limit:
+            part = np.argpartition(-similarity, limit - 1)[:limit]
+            candidates, similarity = candidates[part], similarity[part]
+        order = np.lexsort((candidates, -similarity))
+        return [SearchResult(*self.docs[doc], match="fuzzy", score=float(score))
+                for doc, score in zip(candidates[order].tolist(), similarity[order].tolist())]
+
+    def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """ Prefix matches first; fuzzy name matches fill the rest when the query is long enough """
+        query = query[:self.MAX_QUERY_LENGTH]
+        limit = max(1, min(limit, self.TOP_K))
+        results = self.prefix(query, limit)
+        if len(results) < limit and len(search_key(query)) >= 3:
+            found = [self._doc_ids[(r.company_name, r.profile)] for r in results]
+            results += self.fuzzy(query, limit - len(results), exclude=found)
+        return results
+
+    def stats(self) -> dict:
+        return {"entries": len(self._doc_ids), "keys": len(self._entries), "heavy_nodes": len(self._nodes),
+                "trigrams": len(self._postings), "tombstones": len(self.docs) - len(self._doc_ids),
+                "updates": self.updates, "version": self.version}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.resume_analyzer.company_search [--companies 50000]
+# ---------------------------------------------------------------------------
+
+def _synthetic_companies(count: int, rng: np.random.Generator) -> List[Company]:
+    syllables = ["ar", "is", "ta", "mer", "ly", "tics", "hon", "ey", "well", "cel", "do", "gold", "man", "sa",
+                 "chs", "in", "fo", "sys", "tech", "no", "va", "zen", "qu", "ant", "pi", "ro", "lex", "on"]
+    suffixes = ["", "", " Technologies", " Labs", " Systems", " Networks", " Solutions", " Analytics"]
+    profiles = ["Software Engineer", "SDE Intern", "Business Analytics", "QA", "Data Scientist",
+                "Product Analyst", "DevOps Engineer", "Frontend Developer", "", "Network Engineer"]
+    companies = []
+    for i in range(count):
+        name = "".join(rng.choice(syllables, size=rng.integers(2, 5))).capitalize() + str(rng.choice(suffixes))
+        companies.append(Company(name=f"{name} {i % 97}" if i % 3 == 0 else name, profile=str(rng.choice(profiles)),
+                                 cgpa=0.0, hsc=0.0, ssc=0.0, branches=(), skills=(), row={}))
+    return companies
+
+
+def _time_queries(index: CompanySearchIndex, queries: List[str]) -> Tuple[float, float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.99)] * 1000
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Company search index benchmark")
+    parser.add_argument("--companies", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    companies = _synthetic_companies(args.companies, rng)
+    start = time.perf_counter()
+    index = CompanySearchIndex(companies)
+    print(f"built over {args.companies} postings in {(time.perf_counter() - start) * 1000:.0f} ms: {index.stats()}")
+
+    names = [c.name for c in companies]
+    queries = []
+    for _ in range(args.queries):
+        name = search_key(names[rng.integers(len(names))])
+        kind = rng.integers(3)
+        if kind == 0:
+            queries.append(name[:rng.integers(1, len(name) + 1)])
+        elif kind == 1:
+            position = int(rng.integers(len(name)))
+            queries.append(name[:position] + name[position + 1:])
+        else:
+            queries.append(str(rng.choice(["soft", "s", "eng", "data sc", "qa", "analy", "tech", "labs"])))
+    p50, p99 = _time_queries(index, queries)
+    print(f"search: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    changed = companies[:-50] + _synthetic_companies(50, np.random.default_rng(1))
+    start = time.perf_counter()
+    index = index.update(changed, version=1)
+    print(f"update with 50 removed and 50 added postings in {(time.perf_counter() - start) * 1000:.1f} ms")
+    p50, p99 = _time_queries(index, queries)
+    print(f"search after update: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COLUMNS = ["Company Name", "Profile", "CGPA", "HSC", "SSC", "Branch", "Skills Required"]
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", str(name or "")).strip().casefold()
+
+
+def split_list(value) -> Tuple[str, ...]:
+    """ "CE, IT, ENTC" -> ("CE", "IT", "ENTC"); NaN or blank -> () """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ()
+    return tuple(item.strip() for item in str(value).split(",") if item.strip())
+
+
+def threshold(value) -> float:
+    """ Numeric cut-off, with blank or non-numeric cells meaning "no requirement" """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+@dataclass(frozen=True)
+class Company:
+    name: str
+    profile: str
+    cgpa: float
+    hsc: float
+    ssc: float
+    branches: Tuple[str, ...]
+    skills: Tuple[str, ...]
+    # The CSV row as check_eligibility and the legacy helpers expect it
+    row: dict = field(compare=False, repr=False)
+
+    @property
+    def skills_required(self) -> str:
+        return ", ".join(self.skills)
+
+    def requirements(self) -> dict:
+        return {
+            "company_name": self.name,
+            "skills_required": list(self.skills),
+            "cgpa": self.cgpa,
+            "hsc": self.hsc,
+            "ssc": self.ssc,
+            "eligible_branches": list(self.branches),
+        }
+
+
+@dataclass(frozen=True)
+class CompanySnapshot:
+    """ One parsed version of the CSV. Derived indexes key their caches on version """
+    version: int
+    companies: Tuple[Company, ...]
+    by_name: Dict[str, Company]
+    frame: pd.DataFrame = field(repr=False)
+    companies_json: bytes = field(repr=False)
+
+
+class CompanyStore:
+    """ company_data.csv parsed once and indexed by normalized name; reloaded when its mtime changes """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.reloads = 0
+        self._mtime: Optional[float] = None
+        self._snapshot = self._build(pd.DataFrame(columns=COLUMNS), version=0)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build(df: pd.DataFrame, version: int) -> CompanySnapshot:
+        companies: List[Company] = []
+        by_name: Dict[str, Company] = {}
+        for row in df.to_dict(orient="records"):
+            company = Company(
+                name=str(row.get("Company Name", "")).strip(),
+                profile=str(row["Profile"]).strip() if pd.notna(row.get("Profile")) else "",
+                cgpa=threshold(row.get("CGPA")),
+                hsc=threshold(row.get("HSC")),
+                ssc=threshold(row.get("SSC")),
+                branches=split_list(row.get("Branch")),
+                skills=split_list(row.get("Skills Required")),
+                row=row,
+            )
+            companies.append(company)
+            # The first row of a company wins, as the old df[...].iloc[0] lookup did
+            by_name.setdefault(normalize_name(company.name), company)
+
+        companies_json = json.dumps({"success": True, "companies": [c.name for c in companies]}).encode("utf-8")
+        return CompanySnapshot(version=version, companies=tuple(companies), by_name=by_name,
+                               frame=df, companies_json=companies_json)
+
+    def snapshot(self) -> CompanySnapshot:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            if self._mtime is not None:
+                logger.error(f"Company data file not found: {self.path}")
+                self._mtime = None
+            return self._snapshot
+        if mtime == self._mtime:
+            return self._snapshot
+
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    df = pd.read_csv(self.path)
+                except Exception as e:
+                    # Keep serving the last good version
+                    logger.error(f"Error loading company data: {e}")
+                    return self._snapshot
+                self._snapshot = self._build(df, version=self._snapshot.version + 1)
+                self._mtime = mtime
+                self.reloads += 1
+                logger.info(f"Loaded {len(df)} companies from {self.path}")
+        return self._snapshot
+
+    def get(self, name: Optional[str]) -> Optional[Company]:
+        return self.snapshot().by_name.get(normalize_name(name))
+
+    def all(self) -> Tuple[Company, ...]:
+        return self.snapshot().companies
+
+    def frame(self) -> pd.DataFrame:
+        return self.snapshot().frame
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot()
+        return {"companies": len(snapshot.companies), "version": snapshot.version, "reloads": self.reloads}
+
+
+class SnapshotCache(Generic[T]):
+    """
+    A structure derived from the company data, rebuilt only when the store hands out a
+    new snapshot version. With update, the previous structure is brought up to date
+    instead of being rebuilt from scratch.
+    """
+
+    def __init__(self, build: Callable[[CompanySnapshot], T],
+                 update: Optional[Callable[[T, CompanySnapshot], T]] = None):
+        self.build = build
+        self.update = update
+        self._version: Optional[int] = None
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        self._refresh: Optional[asyncio.Future] = None
+
+    def get(self, snapshot: CompanySnapshot) -> T:
+        if self._version == snapshot.version:
+            return self._value
+        with self._lock:
+            if self._version != snapshot.version:
+                if self._value is not None and self.update is not None:
+                    self._value = self.update(self._value, snapshot)
+                else:
+                    self._value = self.build(snapshot)
+                self._version = snapshot.version
+            return self._value
+
+    async def get_async(self, snapshot: CompanySnapshot) -> T:
+        """
+        get() for async handlers: builds and updates run in a worker thread, so a large CSV
+        never blocks the event loop. A fresh build leaves the previous structure untouched,
+        so it keeps being served until the new one is ready; an update changes the structure
+        in place, so callers wait for it (in the thread) instead.
+        """
+        while self._version != snapshot.version:
+            if self._refresh is None:
+                self._refresh = asyncio.ensure_future(self._rebuild(snapshot))
+                # _rebuild() logs failures, including those no caller waits for
+                self._refresh.add_done_callback(lambda task: task.cancelled() or task.exception())
+            if self._value is not None and self.update is None:
+                return self._value
+            await asyncio.shield(self._refresh)
+        return self._value
+
+    async def _rebuild(self, snapshot: CompanySnapshot) -> None:
+        try:
+            await asyncio.to_thread(self.get, snapshot)
+        except Exception:
+            # Waiting callers get the error; the next request tries again
+            logger.exception(f"Rebuilding from company data version {snapshot.version} failed")
+            raise
+        finally:
+            self._refresh = None
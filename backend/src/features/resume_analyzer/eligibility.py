@@ -0,0 +1,210 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.features.shared.skill_ontology import SkillOntology, Vocabulary
+from src.features.resume_analyzer.company_store import Company
+
+
+@dataclass
+class EligibilityResult:
+    company: Company
+    skill_coverage: float
+    missing_skills: List[str]
+
+    def to_dict(self) -> dict:
+        return {
+            "company_name": self.company.name,
+            "profile": self.company.profile,
+            "skill_coverage": round(self.skill_coverage, 3),
+            "missing_skills": self.missing_skills,
+        }
+
+
+def _pairs(groups: Sequence[Sequence[Optional[int]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """ [[3, 5], [], [5]] -> rows [0, 0, 2], ids [3, 5, 5] """
+    rows = [row for row, ids in enumerate(groups) for i in ids if i is not None]
+    ids = [i for ids in groups for i in ids if i is not None]
+    return np.asarray(rows, dtype=np.int64), np.asarray(ids, dtype=np.int64)
+
+
+class EligibilityIndex:
+    """
+    Column-oriented view of every company posting. Academic cut-offs are float arrays
+    compared in one pass, branches and skills are uint64 bitsets, and the number of
+    matched skills per company comes from an inverted skill -> companies index, so a
+    student is checked against all postings without a Python loop over companies.
+    """
+
+    # Ranking key = 1 + skill coverage - MISSING_PENALTY * missing skills, 0 when ineligible
+    MISSING_PENALTY = 1e-4
+    # A skill required by at least 1 / DENSE_SKILL_RATIO of the postings gets a dense column
+    DENSE_SKILL_RATIO = 8
+
+    def __init__(self, companies: Sequence[Company], version: int = 0):
+        self.version = version
+        self.companies = tuple(companies)
+        n = len(self.companies)
+        self.branches = Vocabulary(normalize=lambda b: str(b or "").strip().upper())
+        # A private ontology per index, so bit widths stay fixed while the index is in use
+        self.skills = SkillOntology()
+
+        self.cgpa = np.fromiter((c.cgpa for c in self.companies), dtype=np.float32, count=n)
+        self.hsc = np.fromiter((c.hsc for c in self.companies), dtype=np.float32, count=n)
+        self.ssc = np.fromiter((c.ssc for c in self.companies), dtype=np.float32, count=n)
+
+        branch_rows, branch_ids = _pairs([[self.branches.add(b) for b in c.branches] for c in self.companies])
+        skill_rows, skill_ids = _pairs([{self.skills.add(s) for s in c.skills} for c in self.companies])
+        self.branch_bits = self.branches.bitsets(branch_rows, branch_ids, n)
+        self.skill_bits = self.skills.bitsets(skill_rows, skill_ids, n)
+        self.open_to_all_branches = ~self.branch_bits.any(axis=1)
+        self._branch_masks: Dict[int, np.ndarray] = {}
+
+        # Inverted index in CSR form: companies requiring skill s are
+        # skill_companies[skill_offsets[s]:skill_offsets[s + 1]]
+        order = np.argsort(skill_ids, kind="stable")
+        self.skill_companies = skill_rows[order]
+        self.skill_offsets = np.zeros(len(self.skills.names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(skill_ids, minlength=len(self.skills.names)), out=self.skill_offsets[1:])
+        # Skills most postings ask for (Python, communication) are cheaper to add up as dense
+        # 0/1 columns than to scatter through bincount
+        self._dense_skills: Dict[int, np.ndarray] = {}
+        for skill_id in np.flatnonzero(np.diff(self.skill_offsets) * self.DENSE_SKILL_RATIO >= n).tolist():
+            column = np.zeros(n, dtype=np.int16)
+            column[self.skill_companies[self.skill_offsets[skill_id]:self.skill_offsets[skill_id + 1]]] = 1
+            self._dense_skills[skill_id] = column
+
+        # Precomputed so the per-student key is matched * _key_slope + _key_base
+        self.required_skills = np.bincount(skill_rows, minlength=n).astype(np.int32)
+        required = self.required_skills.astype(np.float32)
+        with np.errstate(divide="ignore"):
+            coverage_per_skill = np.where(required > 0, 1 / required, 0).astype(np.float32)
+        self._key_slope = coverage_per_skill + np.float32(self.MISSING_PENALTY)
+        self._key_base = (1 + (required == 0) - self.MISSING_PENALTY * required).astype(np.float32)
+
+    def branch_mask(self, branch: str) -> np.ndarray:
+        """ Companies a branch may apply to, derived from the bitsets once per branch """
+        branch_id = self.branches.lookup(branch)
+        if branch_id is None:
+            return self.open_to_all_branches
+        mask = self._branch_masks.get(branch_id)
+        if mask is None:
+            bit = np.uint64(1) << np.uint64(branch_id & 63)
+            mask = self.open_to_all_branches | ((self.branch_bits[:, branch_id >> 6] & bit) != 0)
+            self._branch_masks[branch_id] = mask
+        return mask
+
+    def eligible_mask(self, cgpa: float, hsc: float, ssc: float, branch: str) -> np.ndarray:
+        # Cut-offs are float32, so the student's marks are rounded the same way before comparing
+        mask = self.cgpa <= np.float32(cgpa)
+        mask &= self.hsc <= np.float32(hsc)
+        mask &= self.ssc <= np.float32(ssc)
+        mask &= self.branch_mask(branch)
+        return mask
+
+    def matched_skills(self, skill_ids: Sequence[int]) -> np.ndarray:
+        """ Per company, how many of its required skills are among skill_ids """
+        sparse = [i for i in skill_ids if i not in self._dense_skills]
+        if sparse:
+            postings = np.concatenate([self.skill_companies[self.skill_offsets[i]:self.skill_offsets[i + 1]]
+                                       for i in sparse])
+            matched = np.bincount(postings, minlength=len(self.companies)).astype(np.int16)
+        else:
+            matched = np.zeros(len(self.companies), dtype=np.int16)
+        for skill_id in skill_ids:
+            column = self._dense_skills.get(skill_id)
+            if column is not None:
+                matched += column
+        return matched
+
+    def evaluate(self, cgpa: float, hsc: float, ssc: float, branch: str, skills: Iterable[str],
+                 limit: int = 20) -> List[EligibilityResult]:
+        """ Eligible companies ranked by the share of their required skills the student has """
+        if not self.companies or limit <= 0:
+            return []
+        skill_ids = self.skills.lookup_all(skills)
+        matched = self.matched_skills(skill_ids)
+
+        # Best coverage first, then fewest missing skills. Multiplying by the mask
+        # (rather than indexing with it) keeps every step branch-free
+        key = np.multiply(matched, self._key_slope, dtype=np.float32)
+        key += self._key_base
+        key *= self.eligible_mask(cgpa, hsc, ssc, branch)
+
+        top = self._top(key, limit)
+        top = top[key[top] > 0]
+
+        # Missing skills for the shortlisted rows only, decoded in one unpackbits pass
+        missing = self.skill_bits[top] & ~self.skills.bitset(skill_ids)
+        rows, positions = np.nonzero(np.unpackbits(missing.view(np.uint8), axis=1, bitorder="little"))
+        missing_skills: List[List[str]] = [[] for _ in top]
+        for row, position in zip(rows.tolist(), positions.tolist()):
+            missing_skills[row].append(self.skills.names[position])
+
+        required = self.required_skills[top]
+        coverage = np.where(required > 0, matched[top] / np.maximum(required, 1), 1.0)
+        return [EligibilityResult(company=self.companies[row], skill_coverage=float(share), missing_skills=names)
+                for row, share, names in zip(top.tolist(), coverage.tolist(), missing_skills)]
+
+    def _top(self, key: np.ndarray, limit: int) -> np.ndarray:
+        """ Indices of the limit largest keys, best first """
+        # Keys cluster on a few coverage levels, which makes a full introselect slow;
+        # when enough rows sit near the best key, select among those alone
+        candidates = np.flatnonzero(key >= key.max() - np.float32(0.25))
+        if candidates.size < limit:
+            candidates = np.arange(key.size)
+        if candidates.size > limit:
+            part = np.argpartition(key[candidates], candidates.size - limit)[candidates.size - limit:]
+            candidates = candidates[part]
+        return candidates[np.argsort(-key[candidates], kind="stable")]
+
+    def stats(self) -> dict:
+        return {"companies": len(self.companies), "branches": len(self.branches.names),
+                "skills": len(self.skills.names), "version": self.version}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.resume_analyzer.eligibility [--companies 100000]
+# ---------------------------------------------------------------------------
+
+def _synthetic_companies(count: int, rng: np.random.Generator) -> List[Company]:
+    branch_pool = ["CE", "IT", "ENTC", "MECH", "CIVIL", "ELEC", "AIDS", "CSBS"]
+    skill_pool = [f"Skill {i}" for i in range(800)]
+    companies = []
+    for i in range(count):
+        branches = tuple(rng.choice(branch_pool, size=rng.integers(0, 4), replace=False))
+        skills = tuple(skill_pool[j] for j in rng.zipf(1.4, size=rng.integers(3, 10)) % len(skill_pool))
+        companies.append(Company(name=f"Company {i}", profile="Engineer",
+                                 cgpa=float(rng.choice([0, 6, 6.5, 7, 7.5, 8])),
+                                 hsc=float(rng.choice([0, 55, 60, 65, 70])), ssc=float(rng.choice([0, 60, 65, 70])),
+                                 branches=branches, skills=skills, row={}))
+    return companies
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Eligibility index benchmark")
+    parser.add_argument("--companies", type=int, default=100000)
+    parser.add_argument("--students", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    companies = _synthetic_companies(args.companies, rng)
+    start = time.perf_counter()
+    index = EligibilityIndex(companies)
+    print(f"built index over {args.companies} postings in {(time.perf_counter() - start) * 1000:.0f} ms: {index.stats()}")
+
+    students = [(float(rng.uniform(6, 9.5)), float(rng.uniform(55, 90)), float(rng.uniform(55, 90)),
+                 str(rng.choice(["CE", "IT", "ENTC", "MECH"])),
+                 [f"skill {j}" for j in rng.zipf(1.4, size=8) % 800]) for _ in range(args.students)]
+    timings = []
+    for student in students:
+        start = time.perf_counter()
+        index.evaluate(*student)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"per student: p50 {timings[len(timings) // 2] * 1000:.3f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms")
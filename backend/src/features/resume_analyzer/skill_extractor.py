@@ -0,0 +1,319 @@
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from nltk.tokenize import LineTokenizer
+
+from src.features.shared.skill_ontology import SkillOntology, normalize_skill
+from src.features.resume_analyzer.company_store import Company
+
+T = TypeVar("T")
+
+# Skills worth recognising that no company in company_data.csv asks for (yet)
+CURATED_SKILLS = (
+    "Android", "Kotlin", "Swift", "Flutter", "Dart", "React Native", "PHP", "Ruby", "Rust", "Scala", "MATLAB",
+    "TensorFlow", "PyTorch", "Keras", "scikit-learn", "Pandas", "NumPy", "OpenCV", "Tableau", "Power BI",
+    "Hadoop", "Spark", "Kafka", "Redis", "GraphQL", "Firebase", "Figma", "Bootstrap", "Tailwind CSS", "jQuery",
+    "Redux", "Next.js", "Terraform", "Ansible", "Bash", "Shell Scripting", "Agile", "Scrum", "Leadership",
+    "Microservices", "Data Visualization", "Statistics", "Blockchain", "IoT", "Embedded Systems", "Arduino",
+    "Raspberry Pi", "VLSI", "Verilog", "AutoCAD", "SolidWorks", "ANSYS", "CATIA", "Power Electronics",
+)
+
+# Ordinary words that are also skill names; they only count inside a skills list
+AMBIGUOUS_SKILLS = frozenset({
+    "go", "rest", "node", "spring", "excel", "oracle", "testing", "cloud", "security", "automation",
+    "programming", "aptitude", "quantitative", "agile", "leadership", "statistics", "swift", "spark", "rust",
+})
+
+# Experience domain -> skills that indicate it
+DOMAINS: Dict[str, Tuple[str, ...]] = {
+    "Web Development": ("JavaScript", "TypeScript", "React", "Angular", "Vue.js", "Node.js", "Express.js", "HTML",
+                        "CSS", "Django", "Flask", "Next.js", "Bootstrap", "Tailwind CSS", "jQuery", "Redux", "PHP"),
+    "Mobile Development": ("Android", "Kotlin", "Swift", "Flutter", "Dart", "React Native"),
+    "Machine Learning & AI": ("Machine Learning", "Deep Learning", "Artificial Intelligence",
+                              "Natural Language Processing", "Computer Vision", "TensorFlow", "PyTorch", "Keras",
+                              "scikit-learn"),
+    "Data Analysis": ("Data Analysis", "Pandas", "NumPy", "Tableau", "Power BI", "Statistics", "Data Visualization",
+                      "Excel Modeling"),
+    "Big Data": ("Hadoop", "Spark", "Kafka"),
+    "Cloud & DevOps": ("Cloud", "AWS", "Azure", "GCP", "Docker", "Kubernetes", "DevOps", "CI/CD", "Jenkins",
+                       "Terraform", "Ansible", "Microservices"),
+    "Databases": ("SQL", "MySQL", "PostgreSQL", "MongoDB", "NoSQL", "Databases", "Oracle", "Redis"),
+    "Software Testing": ("Software Testing", "Manual Testing", "Selenium", "JMeter", "API Testing", "Test Cases",
+                         "Test Strategy", "Automation"),
+    "Embedded & Electronics": ("Embedded Systems", "Arduino", "Raspberry Pi", "IoT", "VLSI", "Verilog",
+                               "Power Electronics"),
+    "Mechanical Design": ("AutoCAD", "SolidWorks", "ANSYS", "CATIA"),
+}
+
+SECTION_HEADINGS = {
+    "skills": re.compile(r"^(?:technical |key |core )?(?:skills?|technologies|tech stack|tools(?: & technologies)?)"
+                         r"(?: (?:&|and) (?:tools|interests|technologies))?:?$"),
+    "education": re.compile(r"^(?:education(?:al)?(?: details| qualifications?)?|academics?|academic details):?$"),
+    "other": re.compile(r"^(?:experience|work experience|internships?|projects?|certifications?|achievements?|"
+                        r"summary|objective|profile|about me|hobbies|interests|languages|extra ?curricular"
+                        r"(?: activities)?|positions? of responsibility|publications?):?$"),
+}
+
+CGPA_PATTERNS = [
+    re.compile(r"\b(?:c\.?\s?g\.?\s?p\.?\s?a|s\.?\s?g\.?\s?p\.?\s?a|gpa|cpi|pointer)\b[^0-9\n]{0,15}"
+               r"(\d{1,2}(?:\.\d{1,2})?)", re.IGNORECASE),
+    re.compile(r"\b(\d(?:\.\d{1,2})?)\s*/\s*10(?:\.0+)?\b"),
+]
+PERCENT = re.compile(r"(\d{2}(?:\.\d{1,2})?)\s*(?:%|percent)", re.IGNORECASE)
+HSC_LINE = re.compile(r"\b(?:hsc|12th|xii|higher secondary|class 12|intermediate|senior secondary)\b", re.IGNORECASE)
+SSC_LINE = re.compile(r"\b(?:ssc|10th|class 10|matriculation|secondary school certificate|icse|cbse x)\b",
+                      re.IGNORECASE)
+# Short forms are matched case-sensitively so "be" and "me" in prose are not degrees
+DEGREE = re.compile(r"\b(?:B\.\s?E\b\.?|BE\b|B\.?\s?Tech\b|M\.?\s?Tech\b|M\.\s?E\b\.?|B\.?\s?Sc\b|M\.?\s?Sc\b|BCA\b|"
+                    r"MCA\b|MBA\b|B\.?\s?Com\b|Ph\.?\s?D\b|(?i:bachelor(?:'s)? of|master(?:'s)? of|diploma in))")
+INSTITUTION = re.compile(r"\b(?:university|institute|college|iit|nit|iiit|vidyalaya|school of)\b", re.IGNORECASE)
+YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+
+
+class AhoCorasick(Generic[T]):
+    """ Multi-pattern matcher: every occurrence of every pattern in one pass over the text """
+
+    def __init__(self, patterns: Dict[str, T]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Per state: (pattern length, payload) of each pattern ending there
+        self.out: List[List[Tuple[int, T]]] = [[]]
+        for pattern, payload in patterns.items():
+            self._insert(pattern, payload)
+        self._link()
+
+    def _insert(self, pattern: str, payload: T) -> None:
+        state = 0
+        for char in pattern:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((len(pattern), payload))
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, T]]:
+        """ (start, end, payload) for each match, overlapping ones included """
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, payload in out[state]:
+                yield end - length, end, payload
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    if after == "." and end + 1 < len(text) and text[end + 1].isalnum():
+        # github.com, python.org: part of a URL, not a skill
+        return False
+    return not before.isalnum() and not after.isalnum() and after not in "+#"
+
+
+@dataclass
+class ResumeProfile:
+    skills: List[str] = field(default_factory=list)
+    experience_domains: List[str] = field(default_factory=list)
+    academic_details: Dict[str, object] = field(default_factory=dict)
+    confidence: float = 0.0
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        """ Same shape as the LLM parse """
+        return {"skills": self.skills, "experience_domains": self.experience_domains,
+                "academic_details": self.academic_details}
+
+
+class SkillExtractor:
+    """
+    Dictionary-driven resume parser. Skills come from an Aho-Corasick automaton over
+    every skill name and alias (ontology synonyms, the company CSV, CURATED_SKILLS);
+    CGPA, board percentages, degree, institution and year come from line-level regexes.
+    confidence says how much of a usual resume was recognised, so callers can decide
+    when the text is unusual enough to be worth an LLM call.
+    """
+
+    def __init__(self, companies: Sequence[Company] = (), extra_skills: Sequence[str] = CURATED_SKILLS,
+                 version: int = 0):
+        self.version = version
+        self.ontology = SkillOntology()
+        for skill in list(extra_skills) + [skill for company in companies for skill in company.skills]:
+            self.ontology.add(skill)
+        # Payload: (skill ID, whether this spelling is also an ordinary word or a bare letter)
+        self.automaton = AhoCorasick({key: (skill_id, len(key) <= 2 or key in AMBIGUOUS_SKILLS)
+                                      for key, skill_id in self.ontology.ids.items()})
+        self.domains = {domain: {self.ontology.lookup(skill) for skill in skills} - {None}
+                        for domain, skills in DOMAINS.items()}
+        self.lines = LineTokenizer(blanklines="discard")
+
+    @staticmethod
+    def _section(line: str) -> Optional[str]:
+        heading = line.strip().strip(":").strip().casefold()
+        if len(heading) > 40:
+            return None
+        for name, pattern in SECTION_HEADINGS.items():
+            if pattern.match(heading):
+                return name
+        return None
+
+    def _line_skills(self, line: str) -> Tuple[List[int], List[int]]:
+        """ Leftmost-longest skill matches on one line, split into (unambiguous, ambiguous) IDs """
+        text = normalize_skill(line)
+        matches = sorted(((start, -end, payload) for start, end, payload in self.automaton.finditer(text)
+                          if _is_boundary(text, start, end)))
+        clear, ambiguous = [], []
+        covered = 0
+        for start, neg_end, (skill_id, is_ambiguous) in matches:
+            if start < covered:
+                continue
+            covered = -neg_end
+            (ambiguous if is_ambiguous else clear).append(skill_id)
+        return clear, ambiguous
+
+    def extract(self, text: str) -> ResumeProfile:
+        start = time.perf_counter()
+        lines = self.lines.tokenize(text or "")
+        section = None
+        found: Dict[int, None] = {}
+        has_skills_section = False
+        for line in lines:
+            heading = self._section(line)
+            if heading is not None:
+                section = heading
+                has_skills_section = has_skills_section or heading == "skills"
+                continue
+            clear, ambiguous = self._line_skills(line)
+            found.update(dict.fromkeys(clear))
+            # "Go", "Spring", "C" count when listed next to other skills or under a skills heading
+            if ambiguous and (clear or section == "skills"):
+                found.update(dict.fromkeys(ambiguous))
+
+        skills = [self.ontology.names[skill_id] for skill_id in found]
+        skill_ids = set(found)
+        domains = [domain for domain, ids in self.domains.items() if len(ids & skill_ids) >= 2]
+        academics = self.academics(lines)
+
+        confidence = 0.6 * min(len(skills) / 8, 1.0) + 0.2 * has_skills_section + 0.2 * ("degree" in academics)
+        return ResumeProfile(skills=skills, experience_domains=domains, academic_details=academics,
+                             confidence=round(confidence, 2),
+                             elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+
+    @staticmethod
+    def academics(lines: List[str]) -> Dict[str, object]:
+        details: Dict[str, object] = {}
+        degree_at = None
+        for i, line in enumerate(lines):
+            if "degree" not in details and DEGREE.search(line):
+                details["degree"] = re.sub(r"\s+", " ", line).strip()[:120]
+                degree_at = i
+            if "cgpa" not in details:
+                for pattern in CGPA_PATTERNS:
+                    match = pattern.search(line)
+                    if match and 0 < float(match.group(1)) <= 10:
+                        details["cgpa"] = float(match.group(1))
+                        break
+            for key, marker in (("hsc", HSC_LINE), ("ssc", SSC_LINE)):
+                if key not in details and marker.search(line):
+                    # The percentage may sit on the same line or the next one
+                    match = PERCENT.search(line) or (PERCENT.search(lines[i + 1]) if i + 1 < len(lines) else None)
+                    if match and float(match.group(1)) <= 100:
+                        details[key] = float(match.group(1))
+
+        if degree_at is not None:
+            window = lines[max(0, degree_at - 2):degree_at + 3]
+            institution = next((line for line in window if INSTITUTION.search(line)), None)
+            if institution:
+                # Drop the date column of two-column layouts
+                institution = re.split(r"\s{3,}|\t", institution.strip())[0]
+                details["institution"] = re.sub(r"\s+", " ", institution).strip()[:120]
+            # The latest plausible year near the degree: "2021 - 2025" -> 2025
+            years = [int(year) for line in window for year in YEAR.findall(line)
+                     if int(year) <= date.today().year + 6]
+            if years:
+                details["graduation_year"] = max(years)
+        return details
+
+    def stats(self) -> dict:
+        return {"skills": len(self.ontology.names), "patterns": len(self.ontology.ids),
+                "states": len(self.automaton.goto), "version": self.version}
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.resume_analyzer.skill_extractor [resume.pdf ...]
+# ---------------------------------------------------------------------------
+
+SAMPLE_RESUME = """
+Priya Sharma
+priya.sharma@example.com | +91 98765 43210 | github.com/priya
+
+EDUCATION
+Bachelor of Engineering in Computer Engineering
+Pune Institute of Computer Technology, Pune                     2021 - 2025
+CGPA: 8.72 / 10
+HSC (Maharashtra Board) - 89.4%                                   2021
+SSC - 93.2%                                                       2019
+
+TECHNICAL SKILLS
+Languages: C, C++, Java, Python, JS, SQL
+Web: ReactJS, Node.js, Express, HTML5, CSS3, REST APIs
+Tools: Git, Docker, k8s, Jenkins, Postman, JIRA
+Concepts: DSA, OOPs, DBMS, Operating Systems, Computer Networks
+
+PROJECTS
+Campus Placement Portal - built with React and Spring Boot on AWS; Go microservice for notifications
+Resume Screening - NLP pipeline with scikit-learn and Pandas, deployed with CI/CD
+
+EXPERIENCE
+Software Engineering Intern, XYZ Technologies (May 2024 - July 2024)
+Wrote Selenium test suites and automated regression testing; improved query latency on PostgreSQL by 40%
+I had to go through legacy code and rest of the team reviewed it.
+"""
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from src.features.resume_analyzer.company_store import CompanyStore
+    from src.features.shared.pdf_extract import pdf_extractor
+
+    companies = CompanyStore("src/features/resume_analyzer/company_data.csv").all()
+    start = time.perf_counter()
+    extractor = SkillExtractor(companies)
+    print(f"built automaton in {(time.perf_counter() - start) * 1000:.1f} ms: {extractor.stats()}")
+
+    texts = {"sample": SAMPLE_RESUME}
+    for path in sys.argv[1:]:
+        with open(path, "rb") as file:
+            texts[path] = pdf_extractor.extract_text(file.read())
+    for name, text in texts.items():
+        profile = extractor.extract(text)
+        runs = 200
+        start = time.perf_counter()
+        for _ in range(runs):
+            extractor.extract(text)
+        per_call = (time.perf_counter() - start) / runs * 1000
+        print(f"\n{name}: {len(text)} chars, {per_call:.2f} ms per extraction, confidence {profile.confidence}")
+        print(json.dumps(profile.to_dict(), indent=2))
+    pdf_extractor.shutdown()
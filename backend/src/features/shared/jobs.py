@@ -0,0 +1,419 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job state lives in SQLite so queued and in-flight work survives a restart
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("src", "features", "shared", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 8))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# A running job whose lease is not renewed in time (the process died) is picked up again
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 24 * 3600))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1.0))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+TERMINAL = (SUCCEEDED, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    feature TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    data BLOB,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_until REAL,
+    run_after REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, run_after, created_at);
+"""
+
+
+class JobRetry(Exception):
+    """ Raised by a handler to run the job again later (e.g. the LLM budget is exhausted) """
+
+    def __init__(self, message: str, after_seconds: float):
+        super().__init__(message)
+        self.after_seconds = after_seconds
+
+
+@dataclass
+class Job:
+    id: str
+    feature: str
+    kind: str
+    status: str
+    payload: dict
+    result: Optional[dict]
+    error: Optional[str]
+    attempts: int
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    run_after: float
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "feature": self.feature,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def job_links(job: Job, prefix: str = "") -> dict:
+    """ Submit response: the job id and where to poll or subscribe, under the feature's mount prefix """
+    return {"job_id": job.id, "status": job.status,
+            "status_url": f"{prefix}/jobs/{job.id}", "events_url": f"{prefix}/jobs/{job.id}/events"}
+
+
+_COLUMNS = "id, feature, kind, status, payload, result, error, attempts, created_at, started_at, finished_at, run_after"
+
+
+def _job(row) -> Job:
+    (job_id, feature, kind, status, payload, result, error, attempts,
+     created_at, started_at, finished_at, run_after) = row
+    return Job(id=job_id, feature=feature, kind=kind, status=status, payload=json.loads(payload),
+               result=json.loads(result) if result is not None else None, error=error, attempts=attempts,
+               created_at=created_at, started_at=started_at, finished_at=finished_at, run_after=run_after)
+
+
+class JobStore:
+    """ SQLite job table. Every statement is short, so callers run them inline under one lock """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def insert(self, job: Job, data: Optional[bytes]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, feature, kind, status, payload, data, attempts, run_after, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (job.id, job.feature, job.kind, job.status, json.dumps(job.payload), data,
+                 job.run_after, job.created_at))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def claim(self, kinds: List[str], owner: str, lease_seconds: float,
+              max_attempts: int) -> Optional[Tuple[Job, Optional[bytes]]]:
+        """
+        Move the oldest runnable job of one of kinds to running under owner: a queued job
+        that is due, or a running one whose lease expired. Jobs that already used up their
+        attempts are failed on the way.
+        """
+        placeholders = ", ".join("?" for _ in kinds)
+        with self._lock:
+            while True:
+                now = time.time()
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute(
+                        f"SELECT {_COLUMNS}, data FROM jobs WHERE kind IN ({placeholders}) AND "
+                        "((status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?)) "
+                        "ORDER BY created_at LIMIT 1",
+                        (*kinds, QUEUED, now, RUNNING, now)).fetchone()
+                    if row is None:
+                        self._db.execute("COMMIT")
+                        return None
+                    job, data = _job(row[:-1]), row[-1]
+                    if job.attempts >= max_attempts:
+                        self._db.execute(
+                            "UPDATE jobs SET status = ?, error = ?, data = NULL, owner = NULL, finished_at = ? "
+                            "WHERE id = ?",
+                            (FAILED, job.error or f"Gave up after {job.attempts} attempts", now, job.id))
+                        self._db.execute("COMMIT")
+                        continue
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, "
+                        "started_at = ? WHERE id = ?",
+                        (RUNNING, owner, now + lease_seconds, now, job.id))
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                job.status, job.attempts, job.started_at = RUNNING, job.attempts + 1, now
+                return job, data
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> None:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = ?",
+                             (time.time() + lease_seconds, job_id, owner, RUNNING))
+
+    def finish(self, job_id: str, owner: str, status: str, result: Optional[dict] = None,
+               error: Optional[str] = None) -> None:
+        # The input is not needed once the job is done
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, data = NULL, owner = NULL, finished_at = ? "
+                "WHERE id = ? AND owner = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, owner))
+
+    def requeue(self, job_id: str, owner: str, run_after: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, owner = NULL, lease_until = NULL, run_after = ? "
+                "WHERE id = ? AND owner = ?",
+                (QUEUED, error, run_after, job_id, owner))
+
+    def release(self, owner: str) -> int:
+        """ Hand every job running under owner back to the queue (clean shutdown) """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE owner = ? AND status = ?", (QUEUED, owner, RUNNING))
+            return cursor.rowcount
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                      (*TERMINAL, finished_before))
+            return cursor.rowcount
+
+    def pending_features(self) -> List[str]:
+        """ Features with queued or running jobs """
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT feature FROM jobs WHERE status IN (?, ?)",
+                                    (QUEUED, RUNNING)).fetchall()
+        return sorted(feature for feature, in rows)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+Handler = Callable[[dict, Optional[bytes]], Awaitable[dict]]
+
+
+@dataclass
+class _Kind:
+    feature: str
+    handler: Handler
+
+
+class JobQueue:
+    """
+    In-process job runner shared by the features. submit() stores a job and returns at
+    once; a single dispatcher claims jobs from SQLite while the worker pool and the
+    job's feature have spare capacity, and runs each handler as an asyncio task.
+    Clients poll get() or follow events() until the job reaches a terminal state.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._store: Optional[JobStore] = None
+        self._kinds: Dict[str, _Kind] = {}
+        self._limits: Dict[str, int] = {}
+        self._running: Counter = Counter()
+        self._tasks: set = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._last_purge = 0.0
+        self.completed: Counter = Counter()
+
+    @property
+    def store(self) -> JobStore:
+        # Opened on first use so importing a feature never touches the disk
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    def register(self, kind: str, feature: str, handler: Handler, concurrency: int) -> None:
+        """ Route jobs of kind to handler; at most concurrency jobs of feature run at once """
+        self._kinds[kind] = _Kind(feature=feature, handler=handler)
+        self._limits[feature] = concurrency
+
+    def start(self) -> None:
+        """ Start the dispatcher on the running loop; jobs left over from a previous run resume """
+        if self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._stopping = False
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def submit(self, kind: str, payload: dict, data: Optional[bytes] = None) -> Job:
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, feature=self._kinds[kind].feature, kind=kind, status=QUEUED,
+                  payload=payload, result=None, error=None, attempts=0, created_at=now, started_at=None,
+                  finished_at=None, run_after=now)
+        # The upload can be megabytes; writing it must not hold up the event loop
+        await asyncio.to_thread(self.store.insert, job, data)
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    async def events(self, job_id: str, poll_seconds: float = JOB_POLL_SECONDS) -> AsyncIterator[Job]:
+        """ The job each time its status changes, ending with its terminal state """
+        last = None
+        while True:
+            changed = self._changed
+            job = self.get(job_id)
+            if job is None:
+                return
+            state = (job.status, job.attempts)
+            if state != last:
+                last = state
+                yield job
+            if job.status in TERMINAL:
+                return
+            # Woken by local changes; the timeout catches jobs run by another process
+            try:
+                if changed is None:
+                    await asyncio.sleep(poll_seconds)
+                else:
+                    await asyncio.wait_for(changed.wait(), poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sse(self, job_id: str) -> AsyncIterator[str]:
+        """ events() as Server-Sent Events: one "status" event per change, then "done" """
+        job = None
+        async for job in self.events(job_id):
+            yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+        if job is None:
+            yield f"event: error\ndata: {json.dumps({'error': 'Unknown job_id'})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    async def _dispatch(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                self._fill()
+            except Exception:
+                logger.exception("Job dispatch failed")
+            if time.time() - self._last_purge > 600:
+                self._last_purge = time.time()
+                purged = self.store.purge(time.time() - JOB_RETENTION_SECONDS)
+                if purged:
+                    logger.info(f"Purged {purged} finished jobs")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fill(self) -> None:
+        """ Claim jobs until the pool is full or nothing runnable is left """
+        while len(self._tasks) < self.workers:
+            kinds = [kind for kind, spec in self._kinds.items()
+                     if self._running[spec.feature] < self._limits[spec.feature]]
+            if not kinds:
+                return
+            claimed = self.store.claim(kinds, self.owner, self.lease_seconds, self.max_attempts)
+            if claimed is None:
+                return
+            job, data = claimed
+            self._running[job.feature] += 1
+            task = asyncio.ensure_future(self._run(job, data))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self._notify()
+
+    async def _renew(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self.store.renew(job_id, self.owner, self.lease_seconds)
+
+    async def _run(self, job: Job, data: Optional[bytes]) -> None:
+        renewer = asyncio.ensure_future(self._renew(job.id))
+        try:
+            result = await self._kinds[job.kind].handler(job.payload, data)
+            self.store.finish(job.id, self.owner, SUCCEEDED, result=result)
+            self.completed[SUCCEEDED] += 1
+        except JobRetry as e:
+            if job.attempts >= self.max_attempts:
+                self.store.finish(job.id, self.owner, FAILED, error=str(e))
+                self.completed[FAILED] += 1
+            else:
+                self.store.requeue(job.id, self.owner, time.time() + e.after_seconds, error=str(e))
+        except asyncio.CancelledError:
+            # Shutting down: release() hands the job back to the queue
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+            self.store.finish(job.id, self.owner, FAILED, error=str(e) or type(e).__name__)
+            self.completed[FAILED] += 1
+        finally:
+            renewer.cancel()
+            self._running[job.feature] -= 1
+            self._notify()
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def shutdown(self) -> None:
+        if self._dispatcher is None:
+            return
+        # The flag covers a cancel that lands just as the dispatcher's wait completes
+        self._stopping = True
+        self._wakeup.set()
+        self._dispatcher.cancel()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(self._dispatcher, *tasks, return_exceptions=True)
+        self._dispatcher = None
+        released = self.store.release(self.owner)
+        if released:
+            logger.info(f"Returned {released} unfinished jobs to the queue")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": dict(self._running),
+            "limits": dict(self._limits),
+            "completed": dict(self.completed),
+            "jobs": self.store.counts(),
+        }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,188 @@
+import csv
+import functools
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from nltk.stem import PorterStemmer
+from nltk.tokenize import RegexpTokenizer
+
+from src.features.shared.skill_ontology import skill_ontology
+
+logger = logging.getLogger(__name__)
+
+# Keeps technical tokens such as c++, c#, node.js and ci/cd intact
+TOKENIZER = RegexpTokenizer(r"[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*")
+
+# Used when the NLTK stopwords corpus has not been downloaded
+FALLBACK_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each etc few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most must my no nor not of off on once only
+or other our ours out over own same she should so some such than that the their theirs them then there these
+they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours
+""".split())
+
+# Words that show up in every job description without saying anything about the role
+JOB_AD_NOISE = frozenset("""
+ability able candidate candidates company experience good great including job knowledge looking plus preferred
+required requirement requirements responsibilities role skill skills strong team understanding using work working
+year years well within new across etc e.g i.e
+""".split())
+
+
+def load_stopwords() -> frozenset:
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words("english")) | JOB_AD_NOISE
+    except LookupError:
+        logger.info("NLTK stopwords corpus not found, using the built-in list")
+        return FALLBACK_STOPWORDS | JOB_AD_NOISE
+
+
+@dataclass
+class KeywordResult:
+    score: Optional[float]
+    matched: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    keyword_count: int = 0
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "score": self.score,
+            "matched_keywords": self.matched,
+            "missing_keywords": self.missing,
+            "keyword_count": self.keyword_count,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+    def report(self) -> str:
+        """ Plain-text summary in the same spirit as the LLM responses """
+        if self.score is None:
+            return "Keyword Match needs a job description to compare the resume against."
+        lines = [f"Keyword coverage score: {self.score:.0f}/100"]
+        if self.matched:
+            lines.append("Matched keywords: " + ", ".join(self.matched))
+        if self.missing:
+            lines.append("Missing keywords: " + ", ".join(self.missing))
+        return "\n".join(lines)
+
+
+class KeywordScorer:
+    """
+    Deterministic keyword coverage of a resume against a job description. Job description
+    terms (unigrams and bigrams, stemmed) are weighted by TF-IDF, with document frequencies
+    from the background corpus given to fit_background(); resume term frequencies are
+    saturated with BM25 so repeating a keyword only helps up to a point. score() does not
+    change the scorer, so the same resume and job description always get the same score.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_resume_terms: float = 450.0,
+                 max_missing: int = 15, max_documents: int = 5000, stem_cache_size: int = 50000):
+        self.k1 = k1
+        self.b = b
+        self.avg_resume_terms = avg_resume_terms
+        self.max_missing = max_missing
+        self.max_documents = max_documents
+        self.stopwords = load_stopwords()
+        self.stemmer = PorterStemmer()
+        # "js" and "javascript", "k8s" and "kubernetes" count as the same keyword
+        self.aliases = skill_ontology.token_aliases(TOKENIZER.tokenize)
+        self._stem = functools.lru_cache(maxsize=stem_cache_size)(self._stem_token)
+        self._df: Counter = Counter()
+        self._documents = 0
+        self._lock = threading.Lock()
+
+    def _stem_token(self, token: str) -> str:
+        # Tokens with symbols (c++, node.js) are names, not words
+        return token if not token.isalpha() else self.stemmer.stem(token)
+
+    def terms(self, text: str) -> Tuple[Counter, Dict[str, str]]:
+        """ Term counts (stemmed unigrams and bigrams) and a readable surface form per term """
+        tokens = [self.aliases.get(token, token) for token in TOKENIZER.tokenize((text or "").lower())]
+        tokens = [token for token in tokens
+                  if token not in self.stopwords and len(token) > 1 and not token.isdigit()]
+        stems = [self._stem(token) for token in tokens]
+        counts: Counter = Counter(stems)
+        surface: Dict[str, str] = {}
+        for token, stem in zip(tokens, stems):
+            surface.setdefault(stem, token)
+        for (t1, s1), (t2, s2) in zip(zip(tokens, stems), zip(tokens[1:], stems[1:])):
+            bigram = f"{s1} {s2}"
+            counts[bigram] += 1
+            surface.setdefault(bigram, f"{t1} {t2}")
+        return counts, surface
+
+    def observe(self, text: str) -> None:
+        """ Add a document to the background corpus used for IDF """
+        counts, _ = self.terms(text)
+        with self._lock:
+            if self._documents >= self.max_documents:
+                return
+            self._df.update(counts.keys())
+            self._documents += 1
+
+    def fit_background(self, documents: Iterable[str]) -> "KeywordScorer":
+        for document in documents:
+            self.observe(document)
+        return self
+
+    def idf(self, term: str) -> float:
+        return math.log(1 + (self._documents + 1) / (self._df.get(term, 0) + 1))
+
+    def score(self, resume_text: str, job_description: Optional[str]) -> KeywordResult:
+        """ Coverage of the job description's keywords; the background corpus only changes through observe() """
+        start = time.perf_counter()
+        jd_counts, jd_surface = self.terms(job_description or "")
+        if not jd_counts:
+            return KeywordResult(score=None, elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+
+        resume_counts, _ = self.terms(resume_text)
+        resume_length = sum(resume_counts.values()) or 1
+        norm = self.k1 * (1 - self.b + self.b * resume_length / self.avg_resume_terms)
+        # One mention in an average-length resume earns the keyword's full weight
+        full_credit = (self.k1 + 1) / (1 + self.k1)
+
+        weights = {term: (1 + math.log(tf)) * self.idf(term) for term, tf in jd_counts.items()}
+        # A bigram counts as a keyword only when it is a known phrase (seen in the background
+        # corpus) or repeated in the job description; otherwise it is just two adjacent words
+        weights = {term: weight for term, weight in weights.items()
+                   if " " not in term or jd_counts[term] > 1 or self._df.get(term)}
+        total = sum(weights.values())
+        covered = 0.0
+        matched, missing = [], []
+        for term, weight in sorted(weights.items(), key=lambda item: -item[1]):
+            tf = resume_counts.get(term, 0)
+            if tf:
+                covered += weight * min(tf * (self.k1 + 1) / (tf + norm) / full_credit, 1.0)
+                matched.append(jd_surface[term])
+            else:
+                missing.append(jd_surface[term])
+
+        return KeywordResult(
+            score=round(100 * covered / total, 1) if total else 0.0,
+            matched=matched[:self.max_missing],
+            missing=missing[:self.max_missing],
+            keyword_count=len(weights),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+
+    def stats(self) -> dict:
+        return {"background_documents": self._documents, "vocabulary": len(self._df)}
+
+
+def company_skill_documents(csv_path: str) -> List[str]:
+    """ One background document per company profile in company_data.csv """
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as file:
+            return [" ".join(filter(None, [row.get("Profile"), row.get("Skills Required")]))
+                    for row in csv.DictReader(file)]
+    except FileNotFoundError:
+        logger.warning(f"Company data file not found: {csv_path}")
+        return []
@@ -0,0 +1,228 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudgetExceeded(Exception):
+    """ A feature has used up its token budget for the current window """
+
+    def __init__(self, feature: str, used: int, budget: int, retry_after: float):
+        super().__init__(
+            f"Token budget for '{feature}' exhausted ({used}/{budget} tokens), retry in {retry_after:.0f}s")
+        self.feature = feature
+        self.used = used
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """ Rough token count (about 4 characters per token) used before the provider reports usage """
+    return max(len(text or "") // 4, 1)
+
+
+def token_counter() -> Callable[[str], int]:
+    """ Use tiktoken's GPT-4o encoding when it is installed, otherwise estimate """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        return estimate_tokens
+
+
+def percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def parse_budgets(setting: Optional[str]) -> Dict[str, int]:
+    """ Parse "mcq=200000,ats=100000" into {"mcq": 200000, "ats": 100000} """
+    budgets = {}
+    for item in (setting or "").split(","):
+        if "=" not in item:
+            continue
+        feature, value = item.split("=", 1)
+        try:
+            budgets[feature.strip()] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid token budget: {item}")
+    return budgets
+
+
+class CallSeries:
+    """ Counters and rolling samples for one (feature, endpoint, model) combination """
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.total_tokens: Deque[int] = deque(maxlen=window)
+
+    def report(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_p50": percentile(self.latencies, 0.5),
+            "latency_p95": percentile(self.latencies, 0.95),
+            "tokens_p50": percentile(self.total_tokens, 0.5),
+            "tokens_p95": percentile(self.total_tokens, 0.95),
+        }
+
+
+class LLMMetrics:
+    """ Process-wide token, latency and budget accounting for every LLM call """
+
+    def __init__(self, window: int = 500, budgets: Optional[Dict[str, int]] = None,
+                 budget_window_seconds: float = 60.0):
+        self.window = window
+        self.budgets = budgets or {}
+        self.budget_window_seconds = budget_window_seconds
+        self.shed = {}
+        self._series: Dict[Tuple[str, str, str], CallSeries] = {}
+        self._usage: Dict[str, Deque[Tuple[float, int]]] = {}
+        # Estimated tokens of admitted calls that have not finished yet
+        self._reserved: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _window_usage(self, feature: str, now: float) -> Tuple[int, float]:
+        usage = self._usage.setdefault(feature, deque())
+        while usage and now - usage[0][0] > self.budget_window_seconds:
+            usage.popleft()
+        used = sum(tokens for _, tokens in usage)
+        retry_after = self.budget_window_seconds - (now - usage[0][0]) if usage else 0.0
+        return used, retry_after
+
+    def check_budget(self, feature: str, estimated_tokens: int = 0, reserve: bool = False) -> int:
+        """
+        Raise TokenBudgetExceeded if this call would push the feature past its budget.
+        Calls in flight count at their reserved estimate; with reserve=True this call's
+        estimate is held too, until record() replaces it with the actual usage. Returns
+        the tokens reserved.
+        """
+        budget = self.budgets.get(feature)
+        if not budget:
+            return 0
+        with self._lock:
+            used, retry_after = self._window_usage(feature, time.time())
+            reserved = self._reserved.get(feature, 0)
+            if used + reserved + estimated_tokens > budget:
+                self.shed[feature] = self.shed.get(feature, 0) + 1
+                # When only calls in flight fill the budget, their usage lands within seconds
+                raise TokenBudgetExceeded(feature, used + reserved, budget, retry_after or 1.0)
+            if not reserve:
+                return 0
+            self._reserved[feature] = reserved + estimated_tokens
+            return estimated_tokens
+
+    def record(self, feature: str, endpoint: str, model: str, prompt_tokens: int = 0,
+               completion_tokens: int = 0, latency: float = 0.0, success: bool = True,
+               reserved: int = 0) -> None:
+        now = time.time()
+        with self._lock:
+            if reserved:
+                self._reserved[feature] = max(self._reserved.get(feature, 0) - reserved, 0)
+            series = self._series.get((feature, endpoint, model))
+            if series is None:
+                series = self._series[(feature, endpoint, model)] = CallSeries(self.window)
+            series.calls += 1
+            if not success:
+                series.errors += 1
+            series.prompt_tokens += prompt_tokens
+            series.completion_tokens += completion_tokens
+            series.latencies.append(latency)
+            series.total_tokens.append(prompt_tokens + completion_tokens)
+            self._usage.setdefault(feature, deque()).append((now, prompt_tokens + completion_tokens))
+        logger.info(f"LLM call {feature} {endpoint} {model}: prompt={prompt_tokens} "
+                    f"completion={completion_tokens} latency={latency:.2f}s")
+
+    def track(self, feature: str, endpoint: str, model: str, prompt: str = ""):
+        """ Context manager (sync or async) that reserves the call's budget and records its actual usage """
+        reserved = self.check_budget(feature, estimate_tokens(prompt) if prompt else 0, reserve=True)
+        return TrackedCall(self, feature, endpoint, model, prompt, reserved)
+
+    def report(self) -> dict:
+        now = time.time()
+        with self._lock:
+            series = [
+                {"feature": feature, "endpoint": endpoint, "model": model, **s.report()}
+                for (feature, endpoint, model), s in self._series.items()
+            ]
+            budgets = {}
+            for feature, budget in self.budgets.items():
+                used, _ = self._window_usage(feature, now)
+                budgets[feature] = {"budget": budget, "used": used, "reserved": self._reserved.get(feature, 0),
+                                    "window_seconds": self.budget_window_seconds,
+                                    "shed": self.shed.get(feature, 0)}
+        return {"calls": series, "budgets": budgets}
+
+
+class TrackedCall:
+    def __init__(self, metrics: LLMMetrics, feature: str, endpoint: str, model: str, prompt: str,
+                 reserved: int = 0):
+        self.metrics = metrics
+        self.feature = feature
+        self.endpoint = endpoint
+        self.model = model
+        self.prompt = prompt
+        self.reserved = reserved
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self._start = 0.0
+
+    def set_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def set_gemini_usage(self, response) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.set_usage(getattr(usage, "prompt_token_count", None),
+                           getattr(usage, "candidates_token_count", None))
+
+    def set_openai_usage(self, response) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.set_usage(usage.prompt_tokens, usage.completion_tokens)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(self.prompt) if self.prompt else 0
+        self.metrics.record(self.feature, self.endpoint, self.model,
+                            prompt_tokens=prompt_tokens,
+                            completion_tokens=self.completion_tokens or 0,
+                            latency=time.perf_counter() - self._start,
+                            success=exc_type is None,
+                            reserved=self.reserved)
+        self.reserved = 0
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+# Shared by every feature mounted in the same process
+llm_metrics = LLMMetrics(
+    window=int(os.getenv("LLM_METRICS_WINDOW", 500)),
+    budgets=parse_budgets(os.getenv("LLM_TOKEN_BUDGETS")),
+    budget_window_seconds=float(os.getenv("LLM_BUDGET_WINDOW_SECONDS", 60))
+)
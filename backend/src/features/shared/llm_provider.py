@@ -0,0 +1,411 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Dict, List, Optional
+
+from src.features.shared.llm_metrics import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REPLAY_DIR = os.path.join(BASE_DIR, "llm_recordings")
+
+
+class ReplayMissError(Exception):
+    """ Replay mode found no recorded response for a request """
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+def user_message(content: str) -> List[dict]:
+    return [{"role": "user", "content": content}]
+
+
+def messages_text(messages: List[dict], system: Optional[str] = None) -> str:
+    parts = [system] if system else []
+    parts.extend(str(message.get("content", "")) for message in messages)
+    return "\n".join(parts)
+
+
+class LLMProvider:
+    """
+    Common interface for every LLM backend. Callers pass chat style messages
+    ({"role": "user" | "assistant", "content": str}); the public methods check the
+    feature's token budget and record usage in shared.llm_metrics.
+    """
+
+    backend = "base"
+
+    def __init__(self, feature: str):
+        self.feature = feature
+
+    async def complete(self, messages: List[dict], *, model: str, endpoint: str,
+                       temperature: Optional[float] = None, system: Optional[str] = None) -> LLMResponse:
+        async with llm_metrics.track(self.feature, endpoint, model, messages_text(messages, system)) as call:
+            response = await self._complete(messages, model, temperature, system, endpoint)
+            call.set_usage(response.prompt_tokens, response.completion_tokens)
+        return response
+
+    def complete_sync(self, messages: List[dict], *, model: str, endpoint: str,
+                      temperature: Optional[float] = None, system: Optional[str] = None) -> LLMResponse:
+        with llm_metrics.track(self.feature, endpoint, model, messages_text(messages, system)) as call:
+            response = self._complete_sync(messages, model, temperature, system, endpoint)
+            call.set_usage(response.prompt_tokens, response.completion_tokens)
+        return response
+
+    async def stream(self, messages: List[dict], *, model: str, endpoint: str,
+                     temperature: Optional[float] = None, system: Optional[str] = None) -> AsyncIterator[str]:
+        with llm_metrics.track(self.feature, endpoint, model, messages_text(messages, system)) as call:
+            chunks = []
+            async for chunk in self._stream(messages, model, temperature, system, endpoint, call):
+                chunks.append(chunk)
+                yield chunk
+            if call.completion_tokens is None:
+                call.set_usage(call.prompt_tokens, max(len("".join(chunks)) // 4, 1))
+
+    async def _complete(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        raise NotImplementedError
+
+    def _complete_sync(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        raise NotImplementedError
+
+    async def _stream(self, messages, model, temperature, system, endpoint, call) -> AsyncIterator[str]:
+        # Backends without native streaming deliver the whole answer as one chunk
+        response = await self._complete(messages, model, temperature, system, endpoint)
+        call.set_usage(response.prompt_tokens, response.completion_tokens)
+        yield response.text
+
+    async def aclose(self) -> None:
+        pass
+
+
+class AzureOpenAIProvider(LLMProvider):
+    backend = "azure_openai"
+
+    def __init__(self, feature: str, api_key: Optional[str], azure_endpoint: str, api_version: str,
+                 max_connections: int = 8, timeout: float = 60.0, max_retries: int = 1):
+        super().__init__(feature)
+        import httpx
+        from openai import AsyncAzureOpenAI
+
+        self._settings = dict(api_key=api_key, azure_endpoint=azure_endpoint,
+                              api_version=api_version, max_retries=max_retries)
+        self._timeout = timeout
+        self._sync_client = None
+        self._client = AsyncAzureOpenAI(
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(timeout, connect=10.0)
+            ),
+            **self._settings
+        )
+
+    @staticmethod
+    def _request(messages: List[dict], model: str, temperature: Optional[float],
+                 system: Optional[str]) -> dict:
+        request = {"model": model,
+                   "messages": ([{"role": "system", "content": system}] if system else []) + list(messages)}
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+
+    @staticmethod
+    def _response(response, model: str) -> LLMResponse:
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            text=response.choices[0].message.content or "",
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+        )
+
+    async def _complete(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        response = await self._client.chat.completions.create(
+            **self._request(messages, model, temperature, system))
+        return self._response(response, model)
+
+    def _complete_sync(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        if self._sync_client is None:
+            from openai import AzureOpenAI
+            self._sync_client = AzureOpenAI(timeout=self._timeout, **self._settings)
+        response = self._sync_client.chat.completions.create(
+            **self._request(messages, model, temperature, system))
+        return self._response(response, model)
+
+    async def _stream(self, messages, model, temperature, system, endpoint, call) -> AsyncIterator[str]:
+        stream = await self._client.chat.completions.create(
+            **self._request(messages, model, temperature, system),
+            stream=True, stream_options={"include_usage": True})
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    call.set_openai_usage(chunk)
+                # Azure sends content filter results as chunks without choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def aclose(self) -> None:
+        await self._client.close()
+
+
+class GeminiProvider(LLMProvider):
+    backend = "gemini"
+
+    def __init__(self, feature: str, api_key: Optional[str]):
+        super().__init__(feature)
+        import google.generativeai as genai
+
+        self._genai = genai
+        genai.configure(api_key=api_key)
+        self._models: Dict[tuple, object] = {}
+
+    def _model(self, model: str, system: Optional[str]):
+        key = (model, system)
+        if key not in self._models:
+            self._models[key] = self._genai.GenerativeModel(model_name=model, system_instruction=system)
+        return self._models[key]
+
+    @staticmethod
+    def _contents(messages: List[dict]) -> List[dict]:
+        return [{"role": "model" if message["role"] == "assistant" else "user",
+                 "parts": [message["content"]]} for message in messages]
+
+    @staticmethod
+    def _response(response, model: str) -> LLMResponse:
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text=response.text,
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            completion_tokens=getattr(usage, "candidates_token_count", None),
+        )
+
+    @staticmethod
+    def _config(temperature: Optional[float]) -> Optional[dict]:
+        return {"temperature": temperature} if temperature is not None else None
+
+    async def _complete(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        response = await self._model(model, system).generate_content_async(
+            self._contents(messages), generation_config=self._config(temperature))
+        return self._response(response, model)
+
+    def _complete_sync(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        response = self._model(model, system).generate_content(
+            self._contents(messages), generation_config=self._config(temperature))
+        return self._response(response, model)
+
+    async def _stream(self, messages, model, temperature, system, endpoint, call) -> AsyncIterator[str]:
+        response = await self._model(model, system).generate_content_async(
+            self._contents(messages), generation_config=self._config(temperature), stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        call.set_gemini_usage(response)
+
+
+class LatencyModel:
+    """
+    Latency injected by the replay backend. Specs:
+      "none", "fixed:seconds=1.5", "recorded:scale=1.0" (captured latency * scale),
+      "lognormal:median=2.5,sigma=0.4", "normal:mean=2.0,std=0.5"
+    """
+
+    def __init__(self, spec: str = "recorded"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip() or "recorded"
+        self.params = {}
+        for item in params.split(","):
+            if "=" in item:
+                name, value = item.split("=", 1)
+                self.params[name.strip()] = float(value)
+        self._random = random.Random(self.params.get("seed"))
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.params.get("seconds", 1.0)
+        if self.kind == "lognormal":
+            median = self.params.get("median", 1.0)
+            return self._random.lognormvariate(math.log(median), self.params.get("sigma", 0.5))
+        if self.kind == "normal":
+            return max(self._random.gauss(self.params.get("mean", 1.0), self.params.get("std", 0.2)), 0.0)
+        return (recorded or 0.0) * self.params.get("scale", 1.0)
+
+
+class RecordingStore:
+    """ JSONL file of captured LLM exchanges, one file per feature """
+
+    def __init__(self, directory: str, feature: str):
+        self.path = os.path.join(directory, f"{feature}.jsonl")
+        self._by_key: Dict[str, dict] = {}
+        self._by_endpoint: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    @staticmethod
+    def request_key(messages: List[dict], model: str, temperature: float, system: Optional[str]) -> str:
+        payload = json.dumps([model, temperature, system, messages], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _index(self, record: dict) -> None:
+        self._by_key[record["key"]] = record
+        self._by_endpoint.setdefault(record["endpoint"], []).append(record)
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+            self._index(record)
+
+    def find(self, key: str, endpoint: str, allow_any: bool) -> Optional[dict]:
+        record = self._by_key.get(key)
+        if record is None and allow_any and self._by_endpoint.get(endpoint):
+            # Load tests send inputs that were never recorded; any answer from the same endpoint will do
+            record = random.choice(self._by_endpoint[endpoint])
+        return record
+
+
+class RecordingProvider(LLMProvider):
+    """ Passes calls through to a live provider and captures each exchange for replay """
+
+    def __init__(self, inner: LLMProvider, store: RecordingStore):
+        super().__init__(inner.feature)
+        self.backend = f"record:{inner.backend}"
+        self.inner = inner
+        self.store = store
+
+    def _save(self, messages, model, temperature, system, endpoint, response: LLMResponse, latency: float):
+        self.store.add({
+            "key": RecordingStore.request_key(messages, model, temperature, system),
+            "endpoint": endpoint,
+            "latency": latency,
+            "response": asdict(response),
+        })
+
+    async def _complete(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        start = time.perf_counter()
+        response = await self.inner._complete(messages, model, temperature, system, endpoint)
+        self._save(messages, model, temperature, system, endpoint, response, time.perf_counter() - start)
+        return response
+
+    def _complete_sync(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        start = time.perf_counter()
+        response = self.inner._complete_sync(messages, model, temperature, system, endpoint)
+        self._save(messages, model, temperature, system, endpoint, response, time.perf_counter() - start)
+        return response
+
+    async def _stream(self, messages, model, temperature, system, endpoint, call) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in self.inner._stream(messages, model, temperature, system, endpoint, call):
+            chunks.append(chunk)
+            yield chunk
+        response = LLMResponse("".join(chunks), model, call.prompt_tokens, call.completion_tokens)
+        self._save(messages, model, temperature, system, endpoint, response, time.perf_counter() - start)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayProvider(LLMProvider):
+    """ Serves recorded responses offline, sleeping for a sampled latency to mimic the provider """
+
+    backend = "replay"
+
+    def __init__(self, feature: str, store: RecordingStore, latency: LatencyModel,
+                 allow_any: bool = True, stream_chunk_chars: int = 40):
+        super().__init__(feature)
+        self.store = store
+        self.latency = latency
+        self.allow_any = allow_any
+        self.stream_chunk_chars = stream_chunk_chars
+
+    def _lookup(self, messages, model, temperature, system, endpoint):
+        key = RecordingStore.request_key(messages, model, temperature, system)
+        record = self.store.find(key, endpoint, self.allow_any)
+        if record is None:
+            raise ReplayMissError(f"No recorded {self.feature} response for {endpoint}")
+        return LLMResponse(**record["response"]), self.latency.sample(record.get("latency"))
+
+    async def _complete(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        response, delay = self._lookup(messages, model, temperature, system, endpoint)
+        await asyncio.sleep(delay)
+        return response
+
+    def _complete_sync(self, messages, model, temperature, system, endpoint) -> LLMResponse:
+        response, delay = self._lookup(messages, model, temperature, system, endpoint)
+        time.sleep(delay)
+        return response
+
+    async def _stream(self, messages, model, temperature, system, endpoint, call) -> AsyncIterator[str]:
+        response, delay = self._lookup(messages, model, temperature, system, endpoint)
+        size = self.stream_chunk_chars
+        chunks = [response.text[i:i + size] for i in range(0, len(response.text), size)] or [""]
+        # Spread the sampled latency over the chunks so time-to-first-question stays realistic
+        for chunk in chunks:
+            await asyncio.sleep(delay / len(chunks))
+            yield chunk
+        call.set_usage(response.prompt_tokens, response.completion_tokens)
+
+
+_providers: Dict[str, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(feature: str, kind: str, **settings) -> LLMProvider:
+    """
+    Provider for a feature. kind is "azure_openai" or "gemini"; settings go to its
+    constructor. LLM_BACKEND (or LLM_BACKEND_<FEATURE>) picks "live", "record" or
+    "replay"; recordings live in LLM_REPLAY_DIR and replay latency follows
+    LLM_REPLAY_LATENCY (see LatencyModel).
+    """
+    with _providers_lock:
+        if feature in _providers:
+            return _providers[feature]
+
+        mode = os.getenv(f"LLM_BACKEND_{feature.upper()}", os.getenv("LLM_BACKEND", "live")).lower()
+        replay_dir = os.getenv("LLM_REPLAY_DIR", DEFAULT_REPLAY_DIR)
+
+        if mode == "replay":
+            provider = ReplayProvider(
+                feature,
+                RecordingStore(replay_dir, feature),
+                LatencyModel(os.getenv("LLM_REPLAY_LATENCY", "recorded")),
+                allow_any=os.getenv("LLM_REPLAY_STRICT", "0") != "1"
+            )
+        else:
+            if kind == "azure_openai":
+                provider = AzureOpenAIProvider(feature, **settings)
+            elif kind == "gemini":
+                provider = GeminiProvider(feature, **settings)
+            else:
+                raise ValueError(f"Unknown LLM provider kind: {kind}")
+            if mode == "record":
+                provider = RecordingProvider(provider, RecordingStore(replay_dir, feature))
+
+        logger.info(f"LLM provider for {feature}: {provider.backend}")
+        _providers[feature] = provider
+        return provider
@@ -0,0 +1,166 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+@dataclass
+class MatchResult:
+    # (rows x k) column indices / scores, best first
+    student_top: np.ndarray
+    student_scores: np.ndarray
+    # (columns x k) row indices / scores, best first
+    company_top: np.ndarray
+    company_scores: np.ndarray
+    vocabulary_size: int
+    elapsed_ms: float
+
+
+def _sorted_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Indices and values of the k largest entries per row, best first """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class MatchMatrix:
+    """
+    Many-to-many resume x job description similarity. Documents are turned into sublinear
+    TF-IDF vectors once, L2-normalised, and the cosine similarity matrix is a single sparse
+    product, evaluated in row blocks so memory stays bounded for 10k x 1k and beyond.
+    """
+
+    def __init__(self, terms: Callable[[str], Counter], block_rows: int = 2048):
+        self.terms = terms
+        self.block_rows = block_rows
+
+    def vocabulary(self, companies: Sequence[Counter]) -> Dict[str, int]:
+        # Terms that appear in no job description cannot contribute to any similarity
+        vocabulary: Dict[str, int] = {}
+        for counts in companies:
+            for term in counts:
+                vocabulary.setdefault(term, len(vocabulary))
+        return vocabulary
+
+    @staticmethod
+    def counts_matrix(documents: Sequence[Counter], vocabulary: Dict[str, int]) -> sp.csr_matrix:
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for counts in documents:
+            for term, tf in counts.items():
+                column = vocabulary.get(term)
+                if column is not None:
+                    indices.append(column)
+                    data.append(tf)
+            indptr.append(len(indices))
+        return sp.csr_matrix((np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32),
+                              np.asarray(indptr, dtype=np.int64)), shape=(len(documents), len(vocabulary)))
+
+    @staticmethod
+    def tfidf(students: sp.csr_matrix, companies: sp.csr_matrix) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """ Sublinear TF, smoothed IDF over both collections, L2-normalised rows """
+        n_documents = students.shape[0] + companies.shape[0]
+        df = (np.bincount(students.indices, minlength=students.shape[1])
+              + np.bincount(companies.indices, minlength=companies.shape[1]))
+        idf = (np.log((1 + n_documents) / (1 + df)) + 1).astype(np.float32)
+
+        weighted = []
+        for matrix in (students, companies):
+            matrix = matrix.copy()
+            matrix.data = (1 + np.log(matrix.data)) * idf[matrix.indices]
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            norms[norms == 0] = 1.0
+            weighted.append(sp.csr_matrix(sp.diags(1 / norms) @ matrix))
+        return weighted[0], weighted[1]
+
+    def match_counts(self, students: Sequence[Counter], companies: Sequence[Counter], top_k: int = 5) -> MatchResult:
+        start = time.perf_counter()
+        vocabulary = self.vocabulary(companies)
+        student_matrix, company_matrix = self.tfidf(self.counts_matrix(students, vocabulary),
+                                                    self.counts_matrix(companies, vocabulary))
+        company_t = company_matrix.T.tocsc()
+
+        n_students, n_companies = student_matrix.shape[0], company_matrix.shape[0]
+        k_students = min(top_k, n_companies)
+        k_companies = min(top_k, n_students)
+        student_top = np.empty((n_students, k_students), dtype=np.int64)
+        student_scores = np.empty((n_students, k_students), dtype=np.float32)
+        # Running best k students per company, merged block by block
+        best_rows = np.empty((0, n_companies), dtype=np.int64)
+        best_scores = np.empty((0, n_companies), dtype=np.float32)
+
+        for block_start in range(0, n_students, self.block_rows):
+            block_stop = min(block_start + self.block_rows, n_students)
+            scores = (student_matrix[block_start:block_stop] @ company_t).toarray()
+
+            top, top_scores = _sorted_top_k(scores, k_students)
+            student_top[block_start:block_stop] = top
+            student_scores[block_start:block_stop] = top_scores
+
+            rows = np.broadcast_to(np.arange(block_start, block_stop)[:, None], scores.shape)
+            merged_scores = np.vstack([best_scores, scores])
+            merged_rows = np.vstack([best_rows, rows])
+            keep = min(k_companies, merged_scores.shape[0])
+            part = np.argpartition(-merged_scores, keep - 1, axis=0)[:keep]
+            best_scores = np.take_along_axis(merged_scores, part, axis=0)
+            best_rows = np.take_along_axis(merged_rows, part, axis=0)
+
+        order = np.argsort(-best_scores, axis=0, kind="stable")
+        company_top = np.take_along_axis(best_rows, order, axis=0).T
+        company_scores = np.take_along_axis(best_scores, order, axis=0).T
+
+        return MatchResult(student_top=student_top, student_scores=student_scores,
+                           company_top=company_top, company_scores=company_scores,
+                           vocabulary_size=len(vocabulary),
+                           elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def match(self, students: Sequence[str], companies: Sequence[str], top_k: int = 5) -> MatchResult:
+        return self.match_counts([self.terms(text) for text in students],
+                                 [self.terms(text) for text in companies], top_k=top_k)
+
+
+def ranked(labels: Sequence[str], indices: np.ndarray, scores: np.ndarray, label_key: str,
+           min_score: float = 0.0) -> List[List[dict]]:
+    """ Top-k index/score arrays as JSON-ready lists of {label_key, score} """
+    return [[{label_key: labels[i], "score": round(float(score), 4)}
+             for i, score in zip(row_indices, row_scores) if score > min_score]
+            for row_indices, row_scores in zip(indices, scores)]
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.shared.match_matrix [--students 10000 --companies 1000]
+# Synthetic documents drawn from a Zipf-distributed vocabulary, timed end to end
+# (matrix construction, TF-IDF, blocked product and both top-k selections).
+# ---------------------------------------------------------------------------
+
+def _synthetic(count: int, length: int, vocabulary: int, rng: np.random.Generator) -> List[Counter]:
+    words = rng.zipf(1.3, size=(count, length)) % vocabulary
+    return [Counter(f"t{w}" for w in row) for row in words]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resume x job description match matrix benchmark")
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    students = _synthetic(args.students, 400, args.vocabulary, rng)
+    companies = _synthetic(args.companies, 60, args.vocabulary, rng)
+    result = MatchMatrix(terms=Counter).match_counts(students, companies, top_k=args.top_k)
+    print(f"{args.students} x {args.companies}: {result.elapsed_ms} ms, vocabulary {result.vocabulary_size}")
+    print("student 0 top:", result.student_top[0].tolist(), np.round(result.student_scores[0], 3).tolist())
+    print("company 0 top:", result.company_top[0].tolist(), np.round(result.company_scores[0], 3).tolist())
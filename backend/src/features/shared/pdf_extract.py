@@ -0,0 +1,371 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pymupdf", "pypdf2")
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pymupdf")
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 50))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", 20))
+# Documents longer than this are split into page ranges extracted in parallel
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 8))
+
+
+class PDFExtractionError(Exception):
+    """ The PDF could not be opened or parsed by any backend """
+
+
+class PDFExtractionTimeout(PDFExtractionError):
+    """ Extraction did not finish within the time limit """
+
+
+# ---------------------------------------------------------------------------
+# Worker-side functions. They run inside the process pool, so they import the
+# parser lazily and only take and return picklable values.
+# ---------------------------------------------------------------------------
+
+def _extract_pymupdf(data: bytes, start: int, stop: int) -> Tuple[List[str], int]:
+    import fitz  # PyMuPDF
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = doc.page_count
+        return [doc.load_page(i).get_text() for i in range(start, min(stop, page_count))], page_count
+
+
+def _extract_pypdf2(data: bytes, start: int, stop: int) -> Tuple[List[str], int]:
+    import io
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    return [reader.pages[i].extract_text() or "" for i in range(start, min(stop, page_count))], page_count
+
+
+_EXTRACTORS = {"pymupdf": _extract_pymupdf, "pypdf2": _extract_pypdf2}
+
+
+def register_worker(pids) -> None:
+    """ Pool initializer: report this worker's pid so a pool restart can terminate it """
+    pids.put(os.getpid())
+
+
+def extract_page_range(data: bytes, backend: str, start: int, stop: int) -> Tuple[List[str], int]:
+    """ Text of pages [start, stop) and the document's total page count """
+    return _EXTRACTORS[backend](data, start, stop)
+
+
+def backend_available(backend: str) -> bool:
+    try:
+        if backend == "pymupdf":
+            import fitz  # noqa: F401
+        else:
+            import PyPDF2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class ExtractionResult:
+    pages: List[str]
+    backend: str
+    page_count: int
+    elapsed: float
+    truncated: bool = False
+    fallback_from: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.strip() for page in self.pages if page and page.strip())
+
+    def summary(self) -> dict:
+        return {
+            "backend": self.backend,
+            "page_count": self.page_count,
+            "pages_extracted": len(self.pages),
+            "truncated": self.truncated,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "fallback_from": self.fallback_from,
+        }
+
+
+@dataclass
+class ExtractorStats:
+    documents: int = 0
+    pages: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    fallbacks: int = 0
+    restarts: int = 0
+    seconds: float = 0.0
+    by_backend: dict = field(default_factory=dict)
+
+
+class PDFExtractor:
+    """
+    PDF text extraction shared by the ATS and resume features. Parsing runs in a process
+    pool so large or scanned PDFs never block the event loop; long documents are split
+    into page ranges that are extracted in parallel.
+    """
+
+    def __init__(self, backend: str = PDF_BACKEND, workers: int = PDF_WORKERS, max_pages: int = PDF_MAX_PAGES,
+                 timeout: float = PDF_TIMEOUT_SECONDS, pages_per_task: int = PDF_PAGES_PER_TASK):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = workers
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.pages_per_task = pages_per_task
+        self._stats = ExtractorStats()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Worker pids reported by the current pool's initializer
+        self._pids = None
+        # Bumped each time the pool is torn down, so tasks it took down with it can tell
+        self._generation = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: the server process runs threads, which fork does not copy safely
+            context = multiprocessing.get_context("spawn")
+            self._pids = context.SimpleQueue()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                             initializer=register_worker, initargs=(self._pids,))
+        return self._pool
+
+    def _restart_pool(self, generation: int) -> None:
+        """
+        Tear down the pool of the given generation and let the next task start a fresh one.
+        A task cannot be cancelled once a worker runs it, so the workers are terminated:
+        that is the only way to free one stuck on a hung PDF.
+        """
+        if generation != self._generation:
+            return
+        pool, self._pool = self._pool, None
+        pids, self._pids = self._pids, None
+        self._generation += 1
+        self._stats.restarts += 1
+        if pool is None:
+            return
+        # Queued tasks are not cancelled: they fail with BrokenProcessPool and _run() retries them
+        pool.shutdown(wait=False)
+        # A worker still starting up has not reported yet; it runs nothing and exits with the pool
+        while not pids.empty():
+            try:
+                os.kill(pids.get(), signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                # Already gone (a crashed worker, for one)
+                pass
+        pids.close()
+
+    async def _run(self, data: bytes, backend: str, start: int, stop: int) -> Tuple[List[str], int]:
+        loop = asyncio.get_running_loop()
+        # Once more if the pool is restarted under this task because of another document
+        for _ in range(2):
+            generation = self._generation
+            try:
+                return await loop.run_in_executor(self._executor(), extract_page_range, data, backend, start, stop)
+            except BrokenProcessPool:
+                if generation == self._generation:
+                    # A worker died (e.g. a malformed PDF crashed the parser); start a fresh pool
+                    logger.warning("PDF worker pool broke; restarting it")
+                    self._restart_pool(generation)
+                    raise PDFExtractionError("PDF parser crashed on this document")
+        raise PDFExtractionError("PDF worker pool restarted twice while reading this document")
+
+    async def _extract_with(self, data: bytes, backend: str, max_pages: int) -> Tuple[List[str], int]:
+        # Short documents (nearly every resume) finish in this single task
+        first_stop = min(self.pages_per_task, max_pages)
+        pages, page_count = await self._run(data, backend, 0, first_stop)
+        stop = min(page_count, max_pages)
+        if stop <= first_stop:
+            return pages, page_count
+
+        ranges = [(start, min(start + self.pages_per_task, stop))
+                  for start in range(first_stop, stop, self.pages_per_task)]
+        rest = await asyncio.gather(*(self._run(data, backend, start, end) for start, end in ranges))
+        for range_pages, _ in rest:
+            pages.extend(range_pages)
+        return pages, page_count
+
+    async def extract(self, data: bytes, backend: Optional[str] = None, max_pages: Optional[int] = None,
+                      timeout: Optional[float] = None) -> ExtractionResult:
+        """ Extract per-page text, falling back to the other backend if the first one fails """
+        backend = backend or self.backend
+        max_pages = max_pages or self.max_pages
+        timeout = timeout or self.timeout
+        fallback = next(b for b in BACKENDS if b != backend)
+
+        start = time.perf_counter()
+        fallback_from = None
+        generation = self._generation
+        try:
+            pages, page_count = await asyncio.wait_for(
+                self._extract_with(data, backend, max_pages), timeout=timeout)
+        except asyncio.TimeoutError:
+            # The worker would keep parsing this document; restart the pool to free it.
+            # Other documents on the pool at the time are run again on the new one
+            self._stats.timeouts += 1
+            self._restart_pool(generation)
+            raise PDFExtractionTimeout(f"PDF extraction exceeded {timeout:.0f}s")
+        except Exception as e:
+            logger.warning(f"PDF extraction with {backend} failed ({e}); trying {fallback}")
+            remaining = timeout - (time.perf_counter() - start)
+            generation = self._generation
+            try:
+                pages, page_count = await asyncio.wait_for(
+                    self._extract_with(data, fallback, max_pages), timeout=max(remaining, 0.1))
+            except asyncio.TimeoutError:
+                self._stats.timeouts += 1
+                self._restart_pool(generation)
+                raise PDFExtractionTimeout(f"PDF extraction exceeded {timeout:.0f}s")
+            except Exception as fallback_error:
+                self._stats.failures += 1
+                raise PDFExtractionError(f"Could not read PDF: {fallback_error}") from e
+            self._stats.fallbacks += 1
+            fallback_from, backend = backend, fallback
+
+        elapsed = time.perf_counter() - start
+        self._stats.documents += 1
+        self._stats.pages += len(pages)
+        self._stats.seconds += elapsed
+        self._stats.by_backend[backend] = self._stats.by_backend.get(backend, 0) + 1
+        return ExtractionResult(pages=pages, backend=backend, page_count=page_count, elapsed=elapsed,
+                                truncated=page_count > len(pages), fallback_from=fallback_from)
+
+    async def extract_text(self, data: bytes, **kwargs) -> str:
+        return (await self.extract(data, **kwargs)).text
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pids.close()
+            self._pids = None
+
+    def stats(self) -> dict:
+        s = self._stats
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "max_pages": self.max_pages,
+            "timeout": self.timeout,
+            "documents": s.documents,
+            "pages": s.pages,
+            "timeouts": s.timeouts,
+            "failures": s.failures,
+            "fallbacks": s.fallbacks,
+            "restarts": s.restarts,
+            "by_backend": dict(s.by_backend),
+            "avg_ms": round(s.seconds / s.documents * 1000, 1) if s.documents else 0.0,
+        }
+
+
+pdf_extractor = PDFExtractor()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.shared.pdf_extract [corpus_dir ...] [--rounds 3]
+# Extracts every PDF in the corpus with each installed backend, in-process, and
+# reports throughput plus text fidelity. Fidelity is token overlap with a .txt
+# sidecar of the same name when one exists, otherwise agreement between backends.
+# ---------------------------------------------------------------------------
+
+DEFAULT_CORPUS = [
+    os.path.join("src", "features", "ats_score", "uploads"),
+    os.path.join("src", "features", "resume_analyzer", "uploads"),
+    os.path.join("src", "features", "resume_analyzer", "__DATA__"),
+    "uploads",
+]
+
+
+def _tokens(text: str) -> set:
+    import re
+    return set(re.findall(r"[a-z0-9+#.]+", text.lower()))
+
+
+def _overlap(candidate: str, reference: str) -> float:
+    """ F1 of the token sets, so dropped words and garbled extra words both count """
+    a, b = _tokens(candidate), _tokens(reference)
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return round(2 * common / (len(a) + len(b)), 3)
+
+
+def benchmark(paths: List[str], rounds: int = 3) -> List[dict]:
+    import hashlib
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(".pdf")]
+        elif path.lower().endswith(".pdf"):
+            files.append(path)
+
+    # Byte-identical copies would only inflate the numbers
+    corpus, seen = [], set()
+    for file_path in files:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            corpus.append((file_path, data))
+
+    backends = [backend for backend in BACKENDS if backend_available(backend)]
+    texts = {backend: {} for backend in backends}
+    rows = []
+    for backend in backends:
+        pages = errors = 0
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for file_path, data in corpus:
+                try:
+                    extracted, _ = extract_page_range(data, backend, 0, PDF_MAX_PAGES)
+                except Exception:
+                    errors += 1
+                    continue
+                pages += len(extracted)
+                texts[backend][file_path] = "\n".join(extracted)
+        elapsed = time.perf_counter() - start
+        rows.append({"backend": backend, "documents": len(corpus) * rounds, "errors": errors, "pages": pages,
+                     "docs_per_s": round(len(corpus) * rounds / elapsed, 1) if elapsed else 0.0,
+                     "pages_per_s": round(pages / elapsed, 1) if elapsed else 0.0})
+
+    for row in rows:
+        scores = []
+        for file_path, _ in corpus:
+            text = texts[row["backend"]].get(file_path, "")
+            sidecar = os.path.splitext(file_path)[0] + ".txt"
+            if os.path.exists(sidecar):
+                with open(sidecar, "r", encoding="utf-8") as f:
+                    scores.append(_overlap(text, f.read()))
+            else:
+                others = [texts[b].get(file_path, "") for b in backends if b != row["backend"]]
+                if others:
+                    scores.append(_overlap(text, others[0]))
+        row["fidelity"] = round(sum(scores) / len(scores), 3) if scores else None
+        row["avg_chars"] = round(sum(len(t) for t in texts[row["backend"]].values()) / max(len(corpus), 1))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare PDF extraction backends")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_CORPUS)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    available = [backend for backend in BACKENDS if backend_available(backend)]
+    if not available:
+        raise SystemExit("Neither PyMuPDF nor PyPDF2 is installed")
+    for row in benchmark(args.paths, args.rounds):
+        print(row)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from src.features.shared.pdf_extract import pdf_extractor
+from src.features.shared.ttl_cache import TTLCache
+from src.features.shared.uploads import ingest
+
+# Matches ATS_CACHE_TTL_SECONDS: a resume_id must not expire while the scores computed
+# for it are still cached, or the client re-uploads a PDF only to get a cache hit.
+# Memory stays bounded by RESUME_SESSION_MAX_ENTRIES, not by the TTL
+RESUME_SESSION_TTL_SECONDS = float(os.getenv("RESUME_SESSION_TTL_SECONDS", 24 * 3600))
+RESUME_SESSION_MAX_ENTRIES = int(os.getenv("RESUME_SESSION_MAX_ENTRIES", 500))
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_text(text: str) -> str:
+    """ Collapse runs of spaces, strip each line and keep at most one blank line in a row """
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+@dataclass
+class ResumeRecord:
+    resume_id: str
+    sha256: str
+    filename: str
+    text: str
+    page_count: int
+    created_at: float
+
+    def summary(self, ttl_seconds: float) -> dict:
+        return {
+            "resume_id": self.resume_id,
+            "filename": self.filename,
+            "page_count": self.page_count,
+            "chars": len(self.text),
+            "expires_in": max(round(self.created_at + ttl_seconds - time.time()), 0),
+        }
+
+
+class ResumeStore:
+    """
+    Extracted resume text behind an opaque resume_id, so a resume is uploaded and parsed
+    once and then analysed any number of times by the ATS and resume features
+    """
+
+    def __init__(self, ttl_seconds: float = RESUME_SESSION_TTL_SECONDS,
+                 max_entries: int = RESUME_SESSION_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self._records = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        # The same PDF uploaded again maps to the record already holding its text
+        self._by_hash = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def add(self, sha256: str, filename: str, text: str, page_count: int = 0) -> ResumeRecord:
+        record = ResumeRecord(resume_id=uuid.uuid4().hex, sha256=sha256, filename=filename,
+                              text=normalize_text(text), page_count=page_count, created_at=time.time())
+        self._records.set(record.resume_id, record)
+        self._by_hash.set(sha256, record.resume_id)
+        return record
+
+    def find_by_hash(self, sha256: str) -> Optional[ResumeRecord]:
+        return self.get(self._by_hash.get(sha256))
+
+    async def register_upload(self, upload, max_mb: Optional[float] = None) -> ResumeRecord:
+        """
+        Ingest an UploadFile, extract and normalize its text and store it. Raises the
+        uploads and pdf_extract errors for the caller to map onto a response.
+        """
+        async with ingest(upload, max_mb=max_mb) as ingested:
+            return await self.register_bytes(ingested.data, ingested.filename, ingested.sha256)
+
+    async def register_bytes(self, data: bytes, filename: str, sha256: Optional[str] = None) -> ResumeRecord:
+        """ register_upload for a PDF already in memory (e.g. the input of a queued job) """
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        record = self.find_by_hash(sha256)
+        if record is not None:
+            return record
+        result = await pdf_extractor.extract(data)
+        return self.add(sha256, filename, result.text, result.page_count)
+
+    def get(self, resume_id: Optional[str]) -> Optional[ResumeRecord]:
+        if not resume_id:
+            return None
+        return self._records.get(resume_id.strip())
+
+    def delete(self, resume_id: str) -> bool:
+        return self._records.pop(resume_id) is not None
+
+    def stats(self) -> dict:
+        return self._records.stats()
+
+
+resume_store = ResumeStore()
@@ -0,0 +1,173 @@
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Canonical skill name -> other ways resumes and job postings spell it. Lookups are
+# case-insensitive and ignore spacing, so only genuinely different spellings go here.
+SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "JavaScript": ("js", "java script", "ecmascript", "es6", "vanilla js"),
+    "TypeScript": ("ts",),
+    "Python": ("python3", "python 3"),
+    "Java": ("core java", "java se", "j2se"),
+    "Java EE": ("j2ee", "jee", "jakarta ee"),
+    "C++": ("cpp", "c plus plus", "cplusplus"),
+    "C#": ("csharp", "c sharp"),
+    "C": ("c language", "c programming"),
+    "Go": ("golang",),
+    ".Net": ("dotnet", "dot net", ".net core", "asp.net"),
+    "React": ("reactjs", "react.js", "react js"),
+    "Angular": ("angularjs", "angular.js", "angular js"),
+    "Vue.js": ("vue", "vuejs", "vue js"),
+    "Node.js": ("node", "nodejs", "node js"),
+    "Express.js": ("expressjs", "express js"),
+    "Spring": ("spring framework", "spring boot", "springboot"),
+    "Django": (),
+    "Flask": (),
+    "HTML": ("html5",),
+    "CSS": ("css3",),
+    "SQL": ("structured query language",),
+    "MySQL": (),
+    "PostgreSQL": ("postgres", "postgresql", "psql"),
+    "MongoDB": ("mongo",),
+    "NoSQL": ("no sql", "non relational databases"),
+    "Databases": ("dbms", "database", "database management", "rdbms"),
+    "Data Structures": ("ds", "data structure", "dsa", "data structures and algorithms"),
+    "Algorithms": ("algorithm", "algo", "algos"),
+    "OOP": ("oops", "object oriented programming", "object-oriented programming", "oop concepts"),
+    "Operating Systems": ("os", "operating system"),
+    "Networking": ("computer networks", "computer networking"),
+    "Machine Learning": ("ml",),
+    "Deep Learning": ("dl",),
+    "Artificial Intelligence": ("ai",),
+    "Natural Language Processing": ("nlp",),
+    "Computer Vision": ("opencv", "image processing"),
+    "Data Analysis": ("data analytics",),
+    "Excel Modeling": ("excel", "ms excel", "microsoft excel", "excel modelling"),
+    "Cloud": ("cloud computing",),
+    "AWS": ("amazon web services",),
+    "Azure": ("microsoft azure",),
+    "GCP": ("google cloud", "google cloud platform"),
+    "Docker": (),
+    "Kubernetes": ("k8s",),
+    "DevOps": ("dev ops",),
+    "CI/CD": ("cicd", "ci cd", "continuous integration", "continuous delivery"),
+    "Jenkins": (),
+    "Git": ("github", "gitlab", "version control"),
+    "Linux": (),
+    "Web Services": ("rest", "rest api", "rest apis", "restful", "restful apis", "soap"),
+    "API Testing": ("postman",),
+    "Selenium": ("selenium webdriver",),
+    "JMeter": ("apache jmeter",),
+    "JIRA": ("atlassian jira",),
+    "Manual Testing": (),
+    "Software Testing": ("testing", "qa", "quality assurance"),
+    "Problem Solving": ("problem-solving",),
+    "Communication": ("communication skills",),
+    "Teamwork": ("team work", "team player"),
+    "UI Design": ("ui", "ui/ux", "ui ux", "user interface design"),
+}
+
+
+def normalize_skill(skill: Optional[str]) -> str:
+    """ " React-JS " -> "react js"; case, spacing and trailing punctuation folded """
+    text = re.sub(r"[\s_\-]+", " ", str(skill or "").casefold())
+    return text.strip(" ,;:").rstrip(".")
+
+
+class Vocabulary:
+    """ Dense integer IDs for normalized names, used as bit positions in uint64 bitsets """
+
+    def __init__(self, normalize: Callable[[str], str] = normalize_skill):
+        self.normalize = normalize
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str) -> Optional[int]:
+        key = self.normalize(name)
+        if not key:
+            return None
+        skill_id = self.ids.get(key)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self.ids.setdefault(key, len(self.names))
+                if skill_id == len(self.names):
+                    self.names.append(name.strip())
+        return skill_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self.ids.get(self.normalize(name))
+
+    def lookup_all(self, names: Iterable[str]) -> List[int]:
+        """ Sorted IDs of the known names; unknown names cannot match anything and are dropped """
+        return sorted({i for i in (self.lookup(name) for name in names) if i is not None})
+
+    @property
+    def words(self) -> int:
+        return max(1, (len(self.names) + 63) // 64)
+
+    def bitset(self, ids: Iterable[int], words: Optional[int] = None) -> np.ndarray:
+        ids = np.fromiter(ids, dtype=np.int64)
+        bits = np.zeros(words or self.words, dtype=np.uint64)
+        np.bitwise_or.at(bits, ids >> 6, np.left_shift(np.uint64(1), (ids & 63).astype(np.uint64)))
+        return bits
+
+    def bitsets(self, rows: np.ndarray, ids: np.ndarray, count: int) -> np.ndarray:
+        """ (count x words) bitset matrix with bit ids[i] set in row rows[i] """
+        bits = np.zeros((count, self.words), dtype=np.uint64)
+        np.bitwise_or.at(bits, (rows, ids >> 6), np.left_shift(np.uint64(1), (ids & 63).astype(np.uint64)))
+        return bits
+
+    @staticmethod
+    def positions(bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder="little"))
+
+    def decode(self, bits: np.ndarray) -> List[str]:
+        return [self.names[i] for i in self.positions(bits)]
+
+
+class SkillOntology(Vocabulary):
+    """
+    Skill vocabulary seeded with SYNONYMS: every alias resolves to its canonical skill's
+    ID, so "JS", "js" and "JavaScript" set the same bit. Skills outside the table get an
+    ID of their own the first time add() sees them.
+    """
+
+    def __init__(self, synonyms: Dict[str, Tuple[str, ...]] = SYNONYMS):
+        super().__init__(normalize_skill)
+        for canonical, aliases in synonyms.items():
+            skill_id = self.add(canonical)
+            for alias in aliases:
+                self.ids.setdefault(self.normalize(alias), skill_id)
+
+    def canonical(self, skill: str) -> str:
+        skill_id = self.lookup(skill)
+        return self.names[skill_id] if skill_id is not None else str(skill).strip()
+
+    def missing(self, candidate_skills: Iterable[str], required_skills: Sequence[str]) -> List[str]:
+        """ Required skills (in the posting's own wording) the candidate's skills do not cover """
+        required_ids = [self.add(skill) for skill in required_skills]
+        words = self.words
+        uncovered = (self.bitset((i for i in required_ids if i is not None), words)
+                     & ~self.bitset(self.lookup_all(candidate_skills), words))
+        missing_ids = set(self.positions(uncovered).tolist())
+        return [skill for skill, skill_id in zip(required_skills, required_ids) if skill_id in missing_ids]
+
+    def token_aliases(self, tokenize: Callable[[str], List[str]]) -> Dict[str, str]:
+        """
+        Single-token spellings of single-token skills ("js" -> "javascript", "k8s" ->
+        "kubernetes"), for rewriting token streams before term counting. Aliases that
+        expand to a phrase ("ml", "rest") are left out, as free text uses them loosely
+        """
+        aliases: Dict[str, str] = {}
+        for key, skill_id in self.ids.items():
+            tokens = tokenize(key)
+            canonical = tokenize(self.names[skill_id].casefold())
+            if len(tokens) == 1 and len(canonical) == 1 and tokens != canonical:
+                aliases[tokens[0]] = canonical[0]
+        return aliases
+
+
+skill_ontology = SkillOntology()
@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import io
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+# Uploads are read in chunks so an oversized file is rejected after at most one chunk past the cap
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_MB = float(os.getenv("UPLOAD_MAX_MB", 5))
+# Upper bound on upload bytes held in memory across all requests
+UPLOAD_MEMORY_BUDGET_MB = float(os.getenv("UPLOAD_MEMORY_BUDGET_MB", 64))
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadTooLarge(Exception):
+    """ The upload exceeded the configured size limit """
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        super().__init__(f"File exceeds the {limit_bytes / (1024 * 1024):g} MB upload limit")
+
+
+class InvalidUpload(Exception):
+    """ The upload is empty or is not the expected file type """
+
+
+@dataclass
+class IngestedUpload:
+    filename: str
+    data: bytes
+    sha256: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def stream(self) -> io.BytesIO:
+        """ A fresh in-memory file object for parsers that expect one """
+        return io.BytesIO(self.data)
+
+
+def limit_bytes(max_mb: Optional[float] = None) -> int:
+    return int((DEFAULT_MAX_UPLOAD_MB if max_mb is None else max_mb) * 1024 * 1024)
+
+
+class UploadSlots:
+    """
+    Admission control for in-memory uploads: each upload reserves its full size cap
+    before reading, so the bytes held at once never exceed the memory budget
+    """
+
+    def __init__(self, budget_mb: float = UPLOAD_MEMORY_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.reserved = 0
+        self.waiting = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    async def acquire(self, size: int) -> None:
+        # A single upload larger than the whole budget is still admitted, alone
+        size = min(size, self.budget_bytes)
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.reserved + size <= self.budget_bytes)
+            finally:
+                self.waiting -= 1
+            self.reserved += size
+
+    async def release(self, size: int) -> None:
+        size = min(size, self.budget_bytes)
+        async with self._condition:
+            self.reserved -= size
+            self._condition.notify_all()
+
+    async def hold(self, size: int) -> "HeldBytes":
+        """ Reserve size bytes (at most the whole budget) as a reservation that can be given back in parts """
+        await self.acquire(size)
+        return HeldBytes(self, min(size, self.budget_bytes))
+
+    def stats(self) -> dict:
+        return {"budget_bytes": self.budget_bytes, "reserved_bytes": self.reserved, "waiting": self.waiting}
+
+
+class HeldBytes:
+    """ A reservation from UploadSlots.hold(), released bit by bit as the bytes it covers are dropped """
+
+    def __init__(self, slots: UploadSlots, size: int):
+        self.slots = slots
+        self.size = size
+
+    async def release(self, size: Optional[int] = None) -> None:
+        """ Give back size bytes, or everything still held """
+        size = self.size if size is None else min(size, self.size)
+        if size > 0:
+            self.size -= size
+            await self.slots.release(size)
+
+
+upload_slots = UploadSlots()
+
+
+@asynccontextmanager
+async def ingest(upload, max_mb: Optional[float] = None, require_pdf: bool = True,
+                 slots: UploadSlots = upload_slots) -> AsyncIterator["IngestedUpload"]:
+    """
+    Read an upload under the shared memory budget. Parse inside the block: the bytes are
+    dropped and the reservation released when it exits.
+    """
+    limit = limit_bytes(max_mb)
+    await slots.acquire(limit)
+    ingested = None
+    try:
+        ingested = await read_upload(upload, max_mb=max_mb, require_pdf=require_pdf)
+        yield ingested
+    finally:
+        if ingested is not None:
+            ingested.data = b""
+        await slots.release(limit)
+
+
+async def read_upload(upload, max_mb: Optional[float] = None, require_pdf: bool = True,
+                      chunk_size: int = CHUNK_SIZE) -> IngestedUpload:
+    """
+    Read an UploadFile chunk by chunk, enforcing the size cap while reading and hashing
+    as it goes. The bytes stay in memory and are handed straight to the PDF parser.
+    """
+    limit = limit_bytes(max_mb)
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise UploadTooLarge(limit)
+        digest.update(chunk)
+        chunks.append(chunk)
+
+    data = b"".join(chunks)
+    del chunks
+    if not data:
+        raise InvalidUpload("Uploaded file is empty")
+    if require_pdf and not data[:1024].lstrip().startswith(PDF_MAGIC):
+        raise InvalidUpload("Uploaded file is not a PDF")
+    return IngestedUpload(filename=upload.filename or "", data=data, sha256=digest.hexdigest())
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python -m src.features.shared.uploads [--concurrency 16] [--size-mb 5]
+# Compares the old "read everything, write to the uploads folder, re-open" flow with
+# chunked in-memory ingestion. Each mode runs in its own process so peak RSS is comparable.
+# ---------------------------------------------------------------------------
+
+def synthetic_pdf(size_mb: float) -> bytes:
+    """ A valid one-page PDF padded to roughly size_mb with an unreferenced stream object """
+    content = b"BT /F1 12 Tf 72 720 Td (Benchmark resume: Python, SQL, Docker) Tj ET"
+    padding = b"0" * max(int(size_mb * 1024 * 1024) - 1024, 0)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class _DiskUpload:
+    """
+    Stand-in for Starlette's UploadFile once it has rolled over to disk: every read
+    hops through the event loop, as UploadFile.read() does via the threadpool
+    """
+
+    def __init__(self, filename: str, path: str):
+        self.filename = filename
+        self.file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        import asyncio
+        await asyncio.sleep(0)
+        return self.file.read(size)
+
+
+def _parse(source) -> int:
+    """ Text length from whichever PDF parser is installed; falls back to reading the bytes """
+    try:
+        from PyPDF2 import PdfReader
+        return sum(len(page.extract_text() or "") for page in PdfReader(source).pages)
+    except ImportError:
+        pass
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            return len(file.read())
+    return len(source.getvalue())
+
+
+async def _legacy(upload, folder: str) -> int:
+    file_path = os.path.join(folder, upload.filename)
+    pdf_bytes = await upload.read()
+    hashlib.sha256(pdf_bytes).hexdigest()
+    with open(file_path, "wb") as f:
+        f.write(pdf_bytes)
+    del pdf_bytes
+    try:
+        return _parse(file_path)
+    finally:
+        os.unlink(file_path)
+
+
+async def _streamed(upload, max_mb: float, slots: UploadSlots) -> int:
+    async with ingest(upload, max_mb=max_mb, slots=slots) as ingested:
+        return _parse(ingested.stream())
+
+
+def _run_mode(mode: str, source: str, concurrency: int, size_mb: float, budget_mb: float) -> dict:
+    import resource
+    import tempfile
+    import time
+
+    uploads = [_DiskUpload(f"resume_{i}.pdf", source) for i in range(concurrency)]
+    slots = UploadSlots(budget_mb)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def one(upload):
+        start = time.perf_counter()
+        if mode == "legacy":
+            await _legacy(upload, folder)
+        else:
+            await _streamed(upload, size_mb + 0.5, slots)
+        return time.perf_counter() - start
+
+    async def run_all():
+        return await asyncio.gather(*(one(upload) for upload in uploads))
+
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        latencies = sorted(asyncio.run(run_all()))
+        wall = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "wall_ms": round(wall * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import subprocess
+    import sys
+
+    parser = argparse.ArgumentParser(description="Upload ingestion benchmark")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--budget-mb", type=float, default=UPLOAD_MEMORY_BUDGET_MB)
+    parser.add_argument("--mode", choices=["legacy", "streamed"])
+    parser.add_argument("--source")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, args.source, args.concurrency, args.size_mb, args.budget_mb)))
+        sys.exit(0)
+
+    import tempfile
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf:
+        pdf.write(synthetic_pdf(args.size_mb))
+    print(f"{args.concurrency} concurrent uploads of {args.size_mb:g} MB, "
+          f"memory budget {args.budget_mb:g} MB")
+    try:
+        for mode in ("legacy", "streamed"):
+            output = subprocess.run(
+                [sys.executable, "-m", "src.features.shared.uploads", "--mode", mode, "--source", pdf.name,
+                 "--concurrency", str(args.concurrency), "--size-mb", str(args.size_mb),
+                 "--budget-mb", str(args.budget_mb)],
+                capture_output=True, text=True, check=True).stdout
+            print(json.loads(output))
+    finally:
+        os.unlink(pdf.name)
@@ -6,6 +6,7 @@ import toast from 'react-hot-toast';
 
 function AtsScore() {
   const [file, setFile] = useState(null);
+  const [resumeId, setResumeId] = useState(null);
   const [fileName, setFileName] = useState('No file chosen');
   const [jobDescription, setJobDescription] = useState('');
   const [analysisOption, setAnalysisOption] = useState('Quick Scan');
@@ -25,6 +26,7 @@ function AtsScore() {
         return;
       }
       setFile(selectedFile);
+      setResumeId(null);
       setFileName(selectedFile.name);
     }
   };
@@ -43,22 +45,42 @@ function AtsScore() {
 
     try {
       const token = localStorage.getItem('token');
-      const formData = new FormData();
-      formData.append('resume', file);
-      formData.append('job_description', jobDescription);
-      formData.append('analysis_option', analysisOption);
-
-      const response = await axios.post(
-        'http://127.0.0.1:8000/api/ats/score',
-        formData,
-        {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'multipart/form-data'
+      const postScore = (useResumeId) => {
+        const formData = new FormData();
+        // Once the server has parsed this file, reruns only send its resume_id
+        if (useResumeId) {
+          formData.append('resume_id', resumeId);
+        } else {
+          formData.append('resume', file);
+        }
+        formData.append('job_description', jobDescription);
+        formData.append('analysis_option', analysisOption);
+
+        return axios.post(
+          'http://127.0.0.1:8000/api/ats/score',
+          formData,
+          {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Content-Type': 'multipart/form-data'
+            }
           }
+        );
+      };
+
+      let response;
+      try {
+        response = await postScore(Boolean(resumeId));
+      } catch (err) {
+        // The stored resume expired; upload the file again
+        if (resumeId && err.response?.status === 404) {
+          response = await postScore(false);
+        } else {
+          throw err;
         }
-      );
+      }
 
+      setResumeId(response.data.resume_id || null);
       setResult(response.data.response);
       toast.success('Resume analyzed successfully');
     } catch (error) {
@@ -167,6 +189,17 @@ function AtsScore() {
                   />
                   <span>ATS Optimization</span>
                 </label>
+                <label className="flex items-center space-x-2">
+                  <input
+                    type="radio"
+                    name="analysis_option"
+                    value="Keyword Match"
+                    checked={analysisOption === 'Keyword Match'}
+                    onChange={(e) => setAnalysisOption(e.target.value)}
+                    className="text-blue-500 focus:ring-blue-500"
+                  />
+                  <span>Keyword Match (instant, needs a job description)</span>
+                </label>
               </div>
             </div>
 
@@ -1,6 +1,5 @@
 import { motion } from "framer-motion";
 import { useState } from "react";
-import axios from "axios";
 import toast from "react-hot-toast";
 import { Book, CheckCircle, AlertCircle, XCircle } from "lucide-react";
 
@@ -15,6 +14,7 @@ function McqGenerator() {
   const [selectedAnswers, setSelectedAnswers] = useState({});
   const [showResults, setShowResults] = useState(false);
   const [isDialogOpen, setIsDialogOpen] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
 
   const subjects = ["OS", "CN", "DBMS", "OOPS"];
   const difficulties = ["Easy", "Medium", "Hard"];
@@ -27,13 +27,51 @@ function McqGenerator() {
     setShowResults(false);
 
     try {
-      const response = await axios.post(
-        "http://127.0.0.1:8000/api/mcq/generate_mcq",
-        formData
+      // Questions arrive one Server-Sent Event at a time, so show each as soon as it lands
+      const response = await fetch(
+        "http://127.0.0.1:8000/api/mcq/generate_mcq/stream",
+        {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ ...formData, session_id: sessionId }),
+        }
       );
-      if (response.data && response.data.question) {
-        setQuestions(response.data.question);
-        setIsDialogOpen(true); // Open dialog after generating questions
+      if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let received = 0;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          const lines = rawEvent.split("\n");
+          const event = lines.find((line) => line.startsWith("event: "))?.slice(7);
+          const data = lines.find((line) => line.startsWith("data: "))?.slice(6);
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "session") {
+            setSessionId(payload.session_id);
+          } else if (event === "question") {
+            received += 1;
+            setQuestions((prev) => [...prev, payload]);
+            setIsDialogOpen(true);
+          } else if (event === "error") {
+            throw new Error(payload.detail);
+          }
+        }
+      }
+
+      if (received > 0) {
         toast.success("Questions generated successfully");
       }
     } catch (error) {